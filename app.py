@@ -1,13 +1,31 @@
 # app.py — Sistema de Manutenção Preventiva (com upload múltiplo e observações técnicas)
 import streamlit as st
 from datetime import datetime, timedelta
-from supabase_client import get_supabase_client
-from fpdf import FPDF
+import io
 import os
+import threading
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 from streamlit_drawable_canvas import st_canvas
 from streamlit_calendar import calendar
-
-supabase = get_supabase_client()
+import attachments
+import bootstrap
+import importer
+import instrumentation
+import kpi
+import overdue_sweeper
+import pdf_reports
+import records
+import recurrence
+import repository
+import task_store
+import task_views
+
+# 🐞 Com o painel de depuração ligado (ou MANUTENCAO_QUERY_LOG=1) cada consulta desta
+# execução é registrada no recorder: tabela, filtro, linhas, bytes e tempo.
+recorder = instrumentation.Recorder()
+client = repository.get_client()  # Supabase ou backend local; um client por processo, reaproveitado a cada rerun
+if st.session_state.get("debug_panel") or instrumentation.LOG_ENABLED:
+    client = instrumentation.instrument(client, recorder)
 
 if "show_new_form" not in st.session_state:
     st.session_state["show_new_form"] = False
@@ -18,118 +36,77 @@ if "selected_task" not in st.session_state:
 if "view_mode" not in st.session_state:
     st.session_state["view_mode"] = "kanban"
 
-status_labels = {
-    "scheduled": "📅 Agendada",
-    "in_progress": "🛠️ Em Execução",
-    "completed": "✅ Concluída",
-    "overdue": "❗ Atrasada"
-}
+status_labels = task_views.STATUS_LABELS
 
-COLORS = {
-    "Refrigeração": "#e3f2fd",
-    "Elétrica": "#fff8e1",
-    "Hidráulica": "#f3e5f5",
-    "Mecânica": "#e8f5e9",
-    "Outra": "#eeeeee"
-}
+# ----------- Cache de dados de referência -----------
+# Técnicos, localidades, especialidades e modelos mudam raramente: ficam em cache
+# compartilhado entre sessões (st.cache_data é global ao processo) com TTL e
+# limite de entradas. Os formulários de cadastro chamam invalidate_reference_data().
+REFERENCE_CACHE_TTL = 300  # segundos
+REFERENCE_CACHE_MAX_ENTRIES = 16
 
 # ----------- Funções Auxiliares (sem ambientes) -----------
+@st.cache_data(ttl=REFERENCE_CACHE_TTL, max_entries=REFERENCE_CACHE_MAX_ENTRIES, show_spinner=False)
 def load_technicians():
-    res = supabase.table("technicians").select("*").execute()
-    return {t["id"]: t for t in res.data} if res.data else {}
+    return {t["id"]: t for t in repository.load_technicians(client)}
 
+@st.cache_data(ttl=REFERENCE_CACHE_TTL, max_entries=REFERENCE_CACHE_MAX_ENTRIES, show_spinner=False)
 def load_locations():
-    res = supabase.table("locations").select("*").execute()
-    return {l["id"]: l["name"] for l in res.data} if res.data else {}
+    return {l["id"]: l["name"] for l in repository.load_locations(client)}
 
-def get_technician_name(tech_id, tech_dict):
-    return tech_dict.get(str(tech_id), {}).get("name", "Não atribuído")
-
-def get_location_name(loc_id, loc_dict):
-    return loc_dict.get(str(loc_id), "—")
+get_technician_name = task_views.get_technician_name
+get_location_name = task_views.get_location_name
 
+@st.cache_data(ttl=REFERENCE_CACHE_TTL, max_entries=REFERENCE_CACHE_MAX_ENTRIES, show_spinner=False)
 def get_specialties_list():
-    res = supabase.table("technicians").select("specialty").execute()
-    specialties = {r["specialty"] for r in res.data if r.get("specialty")}
-    return sorted(specialties) if specialties else ["Refrigeração", "Elétrica", "Hidráulica", "Mecânica"]
+    return repository.load_specialties(client)
 
+@st.cache_data(ttl=REFERENCE_CACHE_TTL, max_entries=REFERENCE_CACHE_MAX_ENTRIES, show_spinner=False)
 def load_templates():
-    res = supabase.table("templates").select("*").execute()
-    return res.data if res.data else []
+    return repository.load_templates(client)
+
+def invalidate_reference_data():
+    """Descarta o cache de referência após qualquer escrita em técnicos, localidades ou modelos."""
+    load_technicians.clear()
+    load_locations.clear()
+    get_specialties_list.clear()
+    load_templates.clear()
 
 def load_checklist(task_id):
-    res = supabase.table("checklists").select("*").eq("task_id", task_id).execute()
-    return [{"id": item["id"], "item": item["item"], "is_completed": item["is_completed"]} for item in res.data] if res.data else []
-
-# ----------- Função: Calcular próxima data com recorrência -----------
-def get_next_due_date(due_date, recurrence):
-    if recurrence == "daily":
-        return due_date + timedelta(days=1)
-    elif recurrence == "weekly":
-        return due_date + timedelta(weeks=1)
-    elif recurrence == "monthly":
-        if due_date.month == 12:
-            return due_date.replace(year=due_date.year + 1, month=1)
-        else:
-            return due_date.replace(month=due_date.month + 1)
-    return None
+    return records.ChecklistItem.from_rows(repository.load_checklist(client, task_id))
+
+def load_task(task_id):
+    """Tarefa completa (inclusive campos pesados), carregada sob demanda para o detalhe."""
+    row = repository.load_task(client, task_id, records.TASK_DETAIL_COLUMNS)
+    return records.TaskRecord.from_row(row) if row else None
+
+def load_checklists_bulk(task_ids):
+    """Índice task_id → itens de checklist, carregado em lotes com in_("task_id", ...)."""
+    index = repository.load_checklists_bulk(client, task_ids)
+    return {task_id: records.ChecklistItem.from_rows(items) for task_id, items in index.items()}
+
+def toggle_selection(select_key, task_id):
+    """Callback dos checkboxes de seleção em massa."""
+    selected = st.session_state.setdefault(select_key, [])
+    if task_id in selected:
+        selected.remove(task_id)
+    else:
+        selected.append(task_id)
+
+def button_clicked(key):
+    """Indica se o botão com esta key foi clicado nesta execução (antes mesmo de ser desenhado)."""
+    return bool(st.session_state.get(key))
 
 # ----------- Função: Gerar PDF (com observações e imagens) -----------
-def generate_pdf(task, technician_name, location_name, checklist_items):
-    font_normal = os.path.join(os.path.dirname(__file__), "DejaVuSans.ttf")
-    font_bold = os.path.join(os.path.dirname(__file__), "DejaVuSans-Bold.ttf")
-    if not os.path.exists(font_normal): raise FileNotFoundError("Falta: DejaVuSans.ttf")
-    if not os.path.exists(font_bold): raise FileNotFoundError("Falta: DejaVuSans-Bold.ttf")
-
-    pdf = FPDF()
-    pdf.add_page()
-    pdf.add_font("DejaVu", "", font_normal, uni=True)
-    pdf.add_font("DejaVu", "B", font_bold, uni=True)
-    pdf.set_font("DejaVu", "", 12)
-    pdf.set_auto_page_break(auto=True, margin=15)
-    pdf.set_font("DejaVu", "B", 16)
-    pdf.cell(0, 10, "Relatório de Atividade", ln=True, align="C")
-    pdf.ln(10)
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 8, f"Título: {task['title']}", ln=True)
-    pdf.set_font("DejaVu", "", 12)
-    pdf.cell(0, 8, f"Descrição: {task.get('description', '—')}", ln=True)
-    pdf.cell(0, 8, f"Especialidade: {task.get('specialty', '—')}", ln=True)
-    pdf.cell(0, 8, f"Técnico: {technician_name}", ln=True)
-    pdf.cell(0, 8, f"Localidade: {location_name}", ln=True)
-    due = task['due_date'][:16].replace('T', ' ')
-    pdf.cell(0, 8, f"Agendado para: {due}", ln=True)
-    pdf.cell(0, 8, f"Status: {status_labels.get(task['status'], task['status'])}", ln=True)
-    recurrence_map_display = {None: "Nenhuma", "daily": "Diária", "weekly": "Semanal", "monthly": "Mensal"}
-    pdf.cell(0, 8, f"Recorrência: {recurrence_map_display.get(task.get('recurrence'), 'Nenhuma')}", ln=True)
-    
-    # Observações
-    if task.get("notes"):
-        pdf.ln(5)
-        pdf.set_font("DejaVu", "B", 12)
-        pdf.cell(0, 8, "Observações Técnicas:", ln=True)
-        pdf.set_font("DejaVu", "", 12)
-        pdf.multi_cell(0, 8, task["notes"])
-    
-    pdf.ln(5)
-    pdf.set_font("DejaVu", "B", 12)
-    pdf.cell(0, 8, "Checklist:", ln=True)
-    pdf.set_font("DejaVu", "", 12)
-    if checklist_items:
-        for item in checklist_items:
-            mark = "[x]" if item["checked"] else "[ ]"
-            pdf.cell(0, 8, f"{mark} {item['text']}", ln=True)
-    else:
-        pdf.cell(0, 8, "Nenhum item no checklist.", ln=True)
-    pdf.ln(10)
-    pdf.set_font("DejaVu", "I", 10)
-    pdf.cell(0, 8, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=True)
-    return bytes(pdf.output(dest='S'))
+def generate_pdf(task, technician_name, location_name, checklist_data):
+    """PDF da tarefa; cache por hash do conteúdo (pdf_reports)."""
+    with recorder.timer("pdf:tarefa"):
+        return task_views.task_report(task, technician_name, location_name, checklist_data)
 
 # ----------- Função: Arquivar tarefa ao concluir (com observações) -----------
 def archive_task(task, checklist_items):
     try:
-        supabase.table("task_history").insert({
+        archived = repository.archive_task(client, {
             "task_id": task["id"],
             "title": task["title"],
             "description": task.get("description"),
@@ -142,58 +119,220 @@ def archive_task(task, checklist_items):
             "recurrence": task.get("recurrence"),
             "created_from_template": task.get("is_template", False),
             "notes": task.get("notes", "")  # 🔥 Inclui observações no histórico
-        }).execute()
+        })
     except Exception as e:
         st.error(f"Erro ao arquivar: {str(e)}")
+        return
+    # 📈 Atualiza os resumos diários de KPIs com o registro arquivado
+    try:
+        kpi.record(client, archived)
+    except Exception as e:
+        st.warning(f"Indicadores não atualizados: {str(e)}")
+
+# ----------- Função: Atualizar atrasos (varredura incremental) -----------
+OVERDUE_SWEEP_INTERVAL = 60  # segundos
 
-# ----------- Função: Criar tarefa recorrente (com observações) -----------
+@st.cache_data(ttl=OVERDUE_SWEEP_INTERVAL, show_spinner=False)
+def sweep_overdue_tasks():
+    """Roda overdue_sweeper no máximo uma vez por intervalo por processo, para que as
+    telas possam confiar no status gravado mesmo sem o job agendado."""
+    try:
+        return overdue_sweeper.sweep(client)
+    except Exception:
+        return None  # o job de linha de comando continua sendo a via principal
+
+# ----------- Função: Materializar recorrência (com observações) -----------
 def create_recurring_task(original_task):
-    recurrence = original_task.get("recurrence")
-    if not recurrence:
+    """Garante as próximas ocorrências da série da tarefa até o horizonte configurado.
+
+    As ocorrências são geradas antecipadamente por recurrence.py (também ao criar a
+    tarefa e pelo job `python recurrence.py`); aqui apenas completamos o horizonte.
+    """
+    if not original_task.get("recurrence"):
         return
     try:
-        current_due = datetime.fromisoformat(original_task["due_date"])
-        next_due = get_next_due_date(current_due, recurrence)
-        if next_due:
-            res = supabase.table("maintenance_tasks").insert({
-                "title": original_task["title"],
-                "description": original_task.get("description"),
-                "specialty": original_task.get("specialty"),
-                "technician_id": original_task.get("technician_id"),
-                "location_id": original_task.get("location_id"),
-                "due_date": next_due.isoformat(),
-                "recurrence": recurrence,
-                "status": "scheduled",
-                "is_template": False,
-                "notes": original_task.get("notes")  # 🔥 Copia observações para a próxima tarefa
-            }).execute()
-            new_task_id = res.data[0]["id"] if res.data else None
-            checklist_data = load_checklist(original_task["id"])
-            if checklist_data:
-                for item in checklist_data:
-                    supabase.table("checklists").insert({
-                        "task_id": new_task_id,
-                        "item": item["item"],
-                        "is_completed": False
-                    }).execute()
+        result = recurrence.materialize_series(client, original_task)
+        load_calendar_month.clear()
+        if result["failed_tasks"]:
+            st.error(f"Erro ao criar tarefa recorrente: {result['failed_tasks'][0][1]}")
     except Exception as e:
         st.error(f"Erro ao criar tarefa recorrente: {str(e)}")
 
+# ----------- Função: Criar tarefas em massa (tarefas + checklists em lote) -----------
+def parse_checklist_input(text):
+    return [line.strip() for line in (text or "").split("\n") if line.strip()]
+
+def create_tasks_bulk(task_rows, checklist_items=None):
+    """Cria as tarefas num insert em lote e todos os itens de checklist num segundo lote.
+
+    Cada tarefa recebe os mesmos checklist_items; as falhas vêm por lote em
+    failed_tasks / failed_checklists (ver repository.insert_tasks_bulk). Tarefas
+    recorrentes têm as ocorrências do horizonte materializadas em seguida.
+    """
+    result = repository.insert_tasks_bulk(client, task_rows, [checklist_items or [] for _ in task_rows])
+    load_calendar_month.clear()
+    recurring = [row for row in result["created_rows"] if row.get("recurrence")]
+    if recurring:
+        try:
+            recurrence.materialize(client, recurring)
+        except Exception as e:
+            st.error(f"Erro ao criar tarefa recorrente: {str(e)}")
+    return result
+
+def clone_task_rows(task, location_ids):
+    """Linhas de inserção para clonar uma tarefa existente em várias localidades."""
+    return [{
+        "title": task["title"],
+        "description": task.get("description"),
+        "specialty": task.get("specialty"),
+        "technician_id": task.get("technician_id"),
+        "location_id": str(loc_id),
+        "due_date": task["due_date"],
+        "recurrence": task.get("recurrence"),
+        "recurrence_interval": task.get("recurrence_interval") or 1,
+        "recurrence_end": task.get("recurrence_end"),
+        "status": "scheduled",
+        "is_template": False,
+        "notes": task.get("notes")  # 🔥 Copia observações também
+    } for loc_id in location_ids]
+
+def show_bulk_result(result, success_message):
+    if result["created"]:
+        st.success(success_message.format(count=len(result["created"])))
+    if result["failed_tasks"]:
+        st.error(f"❌ {len(result['failed_tasks'])} tarefa(s) não foram criadas: {result['failed_tasks'][0][1]}")
+    if result["failed_checklists"]:
+        st.warning(f"⚠️ Checklist não salvo em {len(result['failed_checklists'])} tarefa(s): {result['failed_checklists'][0][1]}")
+
 # ----------- Função: Excluir tarefas em massa -----------
+def delete_tasks(task_ids):
+    """Exclusão set-based (RPC atômica ou in_() em lotes); devolve as contagens."""
+    load_calendar_month.clear()
+    return repository.delete_tasks(client, task_ids)
+
 def delete_tasks_in_bulk(task_ids):
     try:
-        for task_id in task_ids:
-            supabase.table("checklists").delete().eq("task_id", task_id).execute()
-            supabase.table("maintenance_tasks").delete().eq("id", task_id).execute()
-        st.success(f"✅ {len(task_ids)} tarefa(s) excluída(s)!")
+        counts = delete_tasks(task_ids)
+        st.success(f"✅ {counts['tasks']} tarefa(s) excluída(s)!")
         # Limpar seleção
         for task_id in task_ids:
             key = f"bulk_select_{task_id}"
             if key in st.session_state:
                 del st.session_state[key]
+        return counts
     except Exception as e:
         st.error(f"Erro ao excluir: {str(e)}")
 
+# ----------- Tarefas filtradas -----------
+# Os filtros vêm do session_state (keys dos widgets), para que a carga antecipada
+# (bootstrap) já saiba o que buscar antes de os widgets serem desenhados.
+def current_filters():
+    specialty = st.session_state.get("filter_specialty", "Todas")
+    location = st.session_state.get("filter_location", "Todas")
+    return {
+        "specialty": specialty if specialty != "Todas" else None,
+        "location_id": location if location != "Todas" else None,
+        "date": st.session_state.get("filter_date"),
+    }
+
+def load_board_tasks(filters):
+    """Tarefas do Kanban a partir da cópia local do processo (task_store), que a cada
+    execução busca só o que mudou desde a anterior; os filtros são aplicados em memória."""
+    sweep_overdue_tasks()
+    store = task_store.get_store(repository.get_client())
+    # Sincroniza pelo client desta execução (instrumentado, se for o caso)
+    return task_views.board_tasks(client, store, filters, list(status_labels))
+
+KANBAN_CHECKLIST_KEYS = ("expand_checklist_kanban_", "toggle_chk_kanban_", "done_", "pdf_")
+
+def kanban_checklist_ids():
+    """Cards do Kanban cujo checklist será usado nesta execução: expandidos ou com
+    Concluir/PDF/alternância clicados — lidos direto das keys do session_state."""
+    ids = []
+    for key, value in st.session_state.items():
+        prefix = next((p for p in KANBAN_CHECKLIST_KEYS if str(key).startswith(p)), None)
+        if prefix and value is True:
+            ids.append(str(key)[len(prefix):])
+    return list(dict.fromkeys(ids))
+
+# ----------- Lista: paginação no servidor -----------
+LIST_PAGE_SIZES = [25, 50, 100]
+LIST_SORT_KEYS = {"Data": "due_date", "Título": "title", "Status": "status", "Especialidade": "specialty"}
+
+def list_page_request(filters):
+    """(ordenação, decrescente, itens por página, página) da Lista; volta à primeira
+    página quando filtros, ordenação ou tamanho mudam."""
+    sort_label = st.session_state.get("list_sort", next(iter(LIST_SORT_KEYS)))
+    sort_desc = st.session_state.get("list_sort_desc", False)
+    page_size = st.session_state.get("list_page_size", LIST_PAGE_SIZES[0])
+    list_signature = (filters["specialty"], filters["location_id"], filters["date"], sort_label, sort_desc, page_size)
+    if st.session_state.get("list_signature") != list_signature:
+        st.session_state["list_signature"] = list_signature
+        st.session_state["list_page"] = 0
+    return sort_label, sort_desc, page_size, st.session_state["list_page"]
+
+def load_list_page(filters, sort_label, sort_desc, page_size, page):
+    sweep_overdue_tasks()
+    return task_views.filtered_tasks_page(client, filters, list(status_labels), LIST_SORT_KEYS[sort_label], sort_desc, page, page_size)
+
+# ----------- Calendário: carga por janela de datas -----------
+# O calendário busca só o período visível (mais uma margem), mês a mês em cache:
+# ao navegar para o mês anterior/seguinte os dados já estão carregados. A navegação
+# é feita pelos controles do app (‹ Hoje › e a visão), que definem a data de
+# referência; o componente não avisa o app quando o usuário muda de período.
+CALENDAR_VIEWS = {"Mês": "dayGridMonth", "Semana": "timeGridWeek", "Dia": "timeGridDay"}
+CALENDAR_PREFETCH_DAYS = 7
+CALENDAR_CACHE_TTL = 120  # segundos
+
+@st.cache_data(ttl=CALENDAR_CACHE_TTL, max_entries=64, show_spinner=False)
+def load_calendar_month(month, specialty, location_id):
+    """Tarefas com due_date no mês que começa em `month`, já filtradas."""
+    return task_views.calendar_month(client, month, specialty, location_id)
+
+def calendar_view_type():
+    return CALENDAR_VIEWS[st.session_state.get("calendar_view_label", "Mês")]
+
+def calendar_visible_range(anchor, view_type):
+    """Primeiro e último dia exibidos na visão que contém `anchor` (semanas de domingo a sábado)."""
+    if view_type == "timeGridDay":
+        return anchor, anchor
+    if view_type == "timeGridWeek":
+        start = anchor - timedelta(days=(anchor.weekday() + 1) % 7)
+        return start, start + timedelta(days=6)
+    month = anchor.replace(day=1)
+    return month, recurrence.add_months(month, 1) - timedelta(days=1)
+
+def shift_calendar(step):
+    """Avança (step=1) ou volta (step=-1) um período da visão atual."""
+    anchor, view_type = st.session_state["calendar_anchor"], calendar_view_type()
+    if view_type == "dayGridMonth":
+        st.session_state["calendar_anchor"] = recurrence.add_months(anchor.replace(day=1), step)
+    else:
+        st.session_state["calendar_anchor"] = anchor + timedelta(days=step * (7 if view_type == "timeGridWeek" else 1))
+
+def calendar_request(filters):
+    """Janela a carregar no Calendário: o dia filtrado ou o período visível mais a margem."""
+    if "calendar_anchor" not in st.session_state:
+        st.session_state["calendar_anchor"] = datetime.now().date()
+    if filters["date"]:
+        return filters["date"], filters["date"]
+    range_start, range_end = calendar_visible_range(st.session_state["calendar_anchor"], calendar_view_type())
+    return range_start - timedelta(days=CALENDAR_PREFETCH_DAYS), range_end + timedelta(days=CALENDAR_PREFETCH_DAYS)
+
+def load_calendar_tasks(filters, start, end):
+    sweep_overdue_tasks()
+    return load_calendar_window(start, end, filters["specialty"], filters["location_id"])
+
+def load_calendar_window(start, end, specialty, location_id):
+    """Tarefas entre start e end (datas), lidas dos meses em cache, mais o mês vizinho de cada lado."""
+    first = recurrence.add_months(start.replace(day=1), -1)
+    last = recurrence.add_months(end.replace(day=1), 1)
+    tasks, month = [], first
+    while month <= last:
+        tasks.extend(load_calendar_month(month, specialty, location_id))
+        month = recurrence.add_months(month, 1)
+    return [t for t in tasks if start.isoformat() <= t["due_date"][:10] <= end.isoformat()]
+
 # ----------- Página Principal -----------
 st.set_page_config(page_title="🔧 Manutenção Preventiva", layout="wide")
 st.title("🔧 Sistema de Manutenção Preventiva")
@@ -207,22 +346,68 @@ if missing:
 else:
     st.sidebar.success("✅ Fontes OK")
 
+SEARCH_MIN_LENGTH = 2  # prefixos de uma letra casariam quase tudo
+
+# --- Bootstrap: os dados da tela numa única rodada de consultas paralelas ---
+# Cadastros (que aquecem o cache de referência) e os dados da visão atual são
+# declarados aqui e buscados ao mesmo tempo; as seções abaixo leem `boot`.
+VIEW_MODES = {"📋 Lista": "list", "📊 Kanban": "kanban", "📅 Calendário": "calendar"}
+
+def with_script_run_ctx(fn):
+    """Anexa o contexto desta execução à thread do pool (necessário para st.cache_data)."""
+    ctx = get_script_run_ctx()
+    def run():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return fn()
+    return run
+
+def booted(name, loader):
+    """Resultado da carga antecipada ou, se a tela não o declarou, carga direta."""
+    return boot[name] if name in boot else loader()
+
+recorder.section("bootstrap")
+filters = current_filters()
+view = VIEW_MODES.get(st.session_state.get("view_mode_radio"), "list")
+loaders = {
+    "technicians": load_technicians,
+    "locations": load_locations,
+    "specialties": get_specialties_list,
+    "templates": load_templates,
+}
+if st.session_state["selected_task"]:
+    selected_id = st.session_state["selected_task"]
+    loaders["selected_task"] = lambda: load_task(selected_id)
+    loaders["selected_checklist"] = lambda: load_checklist(selected_id)
+elif view == "kanban":
+    checklist_ids = kanban_checklist_ids()
+    loaders["tasks"] = lambda: load_board_tasks(filters)
+    loaders["checklists"] = lambda: load_checklists_bulk(checklist_ids) if checklist_ids else {}
+elif view == "list":
+    list_request = list_page_request(filters)
+    loaders["tasks_page"] = lambda: load_list_page(filters, *list_request)
+elif view == "calendar":
+    calendar_window = calendar_request(filters)
+    loaders["calendar"] = lambda: load_calendar_tasks(filters, *calendar_window)
+search_query = st.session_state.get("search_query", "").strip()
+if len(search_query) >= SEARCH_MIN_LENGTH:
+    loaders["search"] = lambda: repository.search_tasks(client, search_query)
+boot = bootstrap.fetch(loaders, wrap=with_script_run_ctx)
+
 # --- Cadastros na sidebar ---
+recorder.section("sidebar")
 with st.sidebar:
     st.header("📁 Cadastros")
     with st.expander("👷 Técnicos"):
         with st.form("add_technician"):
             name = st.text_input("Nome")
-            specialties = get_specialties_list()
+            specialties = boot["specialties"]
             specialty = st.selectbox("Especialidade", specialties + ["Outra"])
             if specialty == "Outra":
                 specialty = st.text_input("Nova especialidade")
             if st.form_submit_button("Salvar"):
                 if name and specialty:
-                    supabase.table("technicians").insert({
-                        "name": name,
-                        "specialty": specialty
-                    }).execute()
+                    repository.insert_technician(client, name, specialty)
+                    invalidate_reference_data()
                     st.success("✅ Técnico salvo!")
                     st.rerun()
     with st.expander("📍 Localidades"):
@@ -230,13 +415,14 @@ with st.sidebar:
             loc_name = st.text_input("Nome da Localidade")
             if st.form_submit_button("Salvar"):
                 if loc_name:
-                    supabase.table("locations").insert({"name": loc_name}).execute()
+                    repository.insert_location(client, loc_name)
+                    invalidate_reference_data()
                     st.success("✅ Localidade salva!")
                     st.rerun()
 
     # --- Modelos ---
     st.header("📂 Modelos")
-    templates = load_templates()
+    templates = boot["templates"]
     if templates:
         selected_template = st.selectbox(
             "Usar modelo",
@@ -264,35 +450,124 @@ with st.sidebar:
         st.session_state["show_history"] = True
         st.rerun()
 
+    # --- Indicadores ---
+    if st.button("📈 Indicadores"):
+        st.session_state["show_kpis"] = True
+        st.rerun()
+
+    # --- Depuração ---
+    st.checkbox("🐞 Painel de depuração", key="debug_panel", help="Mostra as consultas e os tempos de cada execução")
+
 # --- Layout de Visualização ---
+recorder.section("filtros")
 st.markdown("### 🖼️ Modo de Visualização")
-view_mode = st.radio("Escolha como visualizar", ["📋 Lista", "📊 Kanban", "📅 Calendário"], key="view_mode_radio")
-if view_mode == "📋 Lista":
-    st.session_state["view_mode"] = "list"
-elif view_mode == "📊 Kanban":
-    st.session_state["view_mode"] = "kanban"
-elif view_mode == "📅 Calendário":
-    st.session_state["view_mode"] = "calendar"
+view_mode = st.radio("Escolha como visualizar", list(VIEW_MODES), key="view_mode_radio")
+st.session_state["view_mode"] = VIEW_MODES[view_mode]
 
 # --- Filtros ---
 col1, col2, col3 = st.columns(3)
 with col1:
-    all_specialties = get_specialties_list()  # 🔥 Corrigido
-    selected_speciality = st.selectbox("Especialidade", ["Todas"] + all_specialties)
+    all_specialties = boot["specialties"]  # 🔥 Corrigido
+    st.selectbox("Especialidade", ["Todas"] + all_specialties, key="filter_specialty")
 with col2:
-    all_locs = load_locations()
-    selected_loc = st.selectbox("Localidade", ["Todas"] + list(all_locs.values()))
+    all_locs = boot["locations"]
+    st.selectbox("Localidade", ["Todas"] + list(all_locs), format_func=lambda x: all_locs.get(x, x), key="filter_location")
 with col3:
-    filter_date = st.date_input("Data específica", value=None)
+    st.date_input("Data específica", value=None, key="filter_date")
+filter_date = filters["date"]
+
+# --- Busca textual (tarefas e histórico) ---
+st.text_input("🔎 Buscar em tarefas e histórico", key="search_query",
+              placeholder="Ex.: compressor vazando", help="Título, descrição, observações e checklist; acentos são ignorados")
+if len(search_query) >= SEARCH_MIN_LENGTH:
+    recorder.section("busca")
+    results = booted("search", lambda: repository.search_tasks(client, search_query))
+    with st.container(border=True):
+        st.caption(f"{len(results)} resultado(s) para “{search_query}”")
+        for i, hit in enumerate(results):
+            col_r1, col_r2 = st.columns([5, 1])
+            with col_r1:
+                origin = "🗂️ Histórico" if hit["source"] == "history" else status_labels.get(hit["status"], hit["status"])
+                when = (hit["happened_at"] or "")[:16].replace("T", " ")
+                st.markdown(f"**{hit['title']}** — {origin} · 📍 {get_location_name(hit['location_id'], boot['locations'])} · {when}")
+                if hit.get("snippet"):
+                    st.caption(hit["snippet"])
+            with col_r2:
+                # Tarefas abrem o detalhe; o registro do histórico é consultado na aba Histórico
+                if hit["source"] == "task" and st.button("🔍 Abrir", key=f"search_open_{i}_{hit['id']}"):
+                    st.session_state["selected_task"] = hit["id"]
+                    st.rerun()
 
 st.divider()
 
 # --- Botão Nova Atividade ---
 if st.button("➕ Nova Atividade", type="primary"):
     st.session_state["show_new_form"] = True
+if st.button("📥 Importar planilha"):
+    st.session_state["show_import"] = True
+
+# --------------- IMPORTAÇÃO: tarefas de CSV/XLSX em lotes (importer.py) ---------------
+if st.session_state.get("show_import"):
+    recorder.section("importacao")
+    st.markdown("### 📥 Importar tarefas de planilha")
+    st.caption("Colunas: titulo*, descricao, especialidade*, tecnico, localidade*, data*, recorrencia, "
+               "intervalo, fim_recorrencia, observacoes, checklist (itens separados por |). "
+               "Técnico e localidade pelo nome ou id.")
+    uploaded = st.file_uploader("Arquivo CSV ou XLSX", type=["csv", "xlsx"], key="import_file")
+    restart = st.checkbox("Reprocessar desde o início (grava só as linhas que não estão mais no banco)", key="import_restart")
+    col1, col2 = st.columns(2)
+    with col1:
+        start_import = st.button("📥 Importar", type="primary", disabled=uploaded is None)
+    with col2:
+        close_import = st.button("Fechar", key="close_import")
+
+    if start_import:
+        status = st.empty()
+        report = io.StringIO()
+        error = None
+        try:
+            summary = importer.import_tasks(
+                client, uploaded, uploaded.name, restart=restart,
+                on_error=importer.error_report_writer(report),
+                progress=lambda s: status.caption(f"⏳ Lote {s['batches']}: até a linha {s['next_row'] - 1} — "
+                                                  f"{s['created']} criada(s), {s['failed']} com erro"),
+            )
+        except Exception as e:
+            summary, error = None, str(e)
+        status.empty()
+        load_calendar_month.clear()
+        sweep_overdue_tasks.clear()
+        # Guardado na sessão: o download do relatório provoca um novo rerun
+        st.session_state["import_result"] = {"summary": summary, "error": error, "file": uploaded.name,
+                                             "report": report.getvalue().encode("utf-8-sig")}
+
+    result = st.session_state.get("import_result")
+    if result:
+        summary = result["summary"]
+        if result["error"]:
+            st.error(f"❌ Importação interrompida: {result['error']}. Envie o mesmo arquivo para retomar do último lote gravado.")
+        elif summary["already_imported"]:
+            st.info("ℹ️ Este arquivo já foi importado por completo. Marque \"Reprocessar desde o início\" para regravar "
+                    "as linhas que não estão mais no banco; tarefas existentes não são alteradas.")
+        else:
+            resumed = f" (retomado: {summary['skipped']} linha(s) já gravadas antes)" if summary["skipped"] else ""
+            st.success(f"✅ {summary['created']} tarefa(s) importada(s) em {summary['batches']} lote(s){resumed}.")
+            if summary["existing"]:
+                st.info(f"ℹ️ {summary['existing']} linha(s) já estavam no banco e não foram alteradas.")
+        if summary and summary["failed"]:
+            st.warning(f"⚠️ {summary['failed']} linha(s) com erro não foram importadas — veja o relatório.")
+        if result["report"]:
+            st.download_button("⬇️ Relatório de erros (CSV)", result["report"], file_name=f"{os.path.splitext(result['file'])[0]}.erros.csv",
+                               mime="text/csv", key="import_errors_download")
+
+    if close_import:
+        st.session_state["show_import"] = False
+        st.session_state.pop("import_result", None)
+        st.rerun()
 
 # --------------- FORMULÁRIO: Nova Atividade (com múltiplas localidades) ---------------
 if st.session_state.get("show_new_form"):
+    recorder.section("formulario")
     st.markdown("### ➕ Nova Atividade de Manutenção")
     
     cloned = st.session_state.get("cloned_task", {})
@@ -300,7 +575,8 @@ if st.session_state.get("show_new_form"):
     with st.form("form_new_task"):
         title = st.text_input("Título *", value=cloned.get("title", ""))
         description = st.text_area("Descrição", value=cloned.get("description", ""))
-        specialty = st.selectbox("Especialidade *", get_specialities_list() + ["Outra"], index=get_specialities_list().index(cloned.get("specialty")) if cloned.get("specialty") and cloned.get("specialty") in get_specialities_list() else len(get_specialities_list()))
+        specialty_options = get_specialties_list()
+        specialty = st.selectbox("Especialidade *", specialty_options + ["Outra"], index=specialty_options.index(cloned.get("specialty")) if cloned.get("specialty") and cloned.get("specialty") in specialty_options else len(specialty_options))
         if specialty == "Outra":
             specialty = st.text_input("Nova especialidade", value=cloned.get("specialty", ""))
 
@@ -324,7 +600,12 @@ if st.session_state.get("show_new_form"):
         recurrence_map_inv = {None: "Nenhuma", "daily": "Diária", "weekly": "Semanal", "monthly": "Mensal"}
         current_recurrence = cloned.get("recurrence", "Nenhuma")
         rec_index = ["Nenhuma", "Diária", "Semanal", "Mensal"].index(current_recurrence) if current_recurrence in ["Nenhuma", "Diária", "Semanal", "Mensal"] else 0
-        recurrence = st.selectbox("Recorrência", ["Nenhuma", "Diária", "Semanal", "Mensal"], index=rec_index)
+        recurrence_label = st.selectbox("Recorrência", ["Nenhuma", "Diária", "Semanal", "Mensal"], index=rec_index)
+        rec_col1, rec_col2 = st.columns(2)
+        with rec_col1:
+            recurrence_interval = st.number_input("Repetir a cada (dias/semanas/meses)", min_value=1, value=int(cloned.get("recurrence_interval") or 1))
+        with rec_col2:
+            recurrence_end = st.date_input("Recorrência termina em", value=None)
 
         checklist_input = st.text_area("Checklist (um item por linha)", 
                                        value=cloned.get("checklist_input", ""), 
@@ -341,56 +622,25 @@ if st.session_state.get("show_new_form"):
                 st.error("Título e localidade são obrigatórios.")
             else:
                 due_dt = datetime.combine(due_date, due_time)
-                status = "scheduled" if due_dt >= datetime.now() else "overdue"
                 recurrence_map = {"Nenhuma": None, "Diária": "daily", "Semanal": "weekly", "Mensal": "monthly"}
 
-                if use_multiple_locs and selected_locs:
-                    # Criar múltiplas tarefas
-                    for loc_id_single in selected_locs:
-                        res = supabase.table("maintenance_tasks").insert({
-                            "title": title,
-                            "description": description,
-                            "specialty": specialty,
-                            "technician_id": tech_id,
-                            "location_id": str(loc_id_single),
-                            "due_date": due_dt.isoformat(),
-                            "recurrence": recurrence_map[recurrence],
-                            "status": status,
-                            "is_template": False
-                        }).execute()
-                        task_id = res.data[0]["id"] if res.data else None
-                        if checklist_input and task_id:
-                            items = [line.strip() for line in checklist_input.split("\n") if line.strip()]
-                            for item in items:
-                                supabase.table("checklists").insert({
-                                    "task_id": task_id,
-                                    "item": item,
-                                    "is_completed": False
-                                }).execute()
-                    st.success(f"✅ {len(selected_locs)} tarefas criadas!")
-                else:
-                    # Criar uma tarefa normal
-                    res = supabase.table("maintenance_tasks").insert({
-                        "title": title,
-                        "description": description,
-                        "specialty": specialty,
-                        "technician_id": tech_id,
-                        "location_id": str(loc_id),
-                        "due_date": due_dt.isoformat(),
-                        "recurrence": recurrence_map[recurrence],
-                        "status": status,
-                        "is_template": False
-                    }).execute()
-                    task_id = res.data[0]["id"] if res.data else None
-                    if checklist_input and task_id:
-                        items = [line.strip() for line in checklist_input.split("\n") if line.strip()]
-                        for item in items:
-                            supabase.table("checklists").insert({
-                                "task_id": task_id,
-                                "item": item,
-                                "is_completed": False
-                            }).execute()
-                    st.success("✅ Atividade criada!")
+                target_locs = selected_locs if use_multiple_locs and selected_locs else [loc_id]
+                task_rows = [{
+                    "title": title,
+                    "description": description,
+                    "specialty": specialty,
+                    "technician_id": tech_id,
+                    "location_id": str(loc_id_single),
+                    "due_date": due_dt.isoformat(),
+                    "recurrence": recurrence_map[recurrence_label],
+                    "recurrence_interval": int(recurrence_interval),
+                    "recurrence_end": datetime.combine(recurrence_end, datetime.max.time()).isoformat() if recurrence_end else None,
+                    "status": "scheduled",  # overdue_sweeper marca os atrasos
+                    "is_template": False
+                } for loc_id_single in target_locs]
+                result = create_tasks_bulk(task_rows, parse_checklist_input(checklist_input))
+                sweep_overdue_tasks.clear()
+                show_bulk_result(result, "✅ {count} tarefas criadas!" if len(task_rows) > 1 else "✅ Atividade criada!")
 
                 st.session_state.pop("cloned_task", None)
                 st.session_state["show_new_form"] = False
@@ -402,7 +652,9 @@ if st.session_state.get("show_new_form"):
             st.rerun()
 
 # --------------- DETALHE DA ATIVIDADE EM MODAL (com imagens + observações) ---------------
-def show_task_modal(task):
+ATTACHMENT_GALLERY_PAGE_SIZE = 12
+
+def show_task_modal(task, checklist_data=None):
     techs = load_technicians()
     locs = load_locations()
     tech_name = get_technician_name(task["technician_id"], techs)
@@ -419,7 +671,8 @@ def show_task_modal(task):
         st.markdown(f"**Status:** {status_labels.get(task['status'], task['status'])}")
 
         # Checklist com expandir/retrair
-        checklist_data = load_checklist(task["id"])
+        if checklist_data is None:
+            checklist_data = load_checklist(task["id"])
         expand_key = f"expand_checklist_{task['id']}"
         if expand_key not in st.session_state:
             st.session_state[expand_key] = False
@@ -442,47 +695,77 @@ def show_task_modal(task):
 
         # 📎 Múltiplos uploads de imagem
         st.markdown("### 📎 Anexos")
+        # A key muda após cada envio para esvaziar o uploader (senão o rerun reenviaria tudo)
+        upload_nonce_key = f"upload_nonce_{task['id']}"
+        upload_nonce = st.session_state.get(upload_nonce_key, 0)
         uploaded_files = st.file_uploader(
             "Adicionar múltiplas imagens",
             type=["png", "jpg", "jpeg"],
             accept_multiple_files=True,
-            key=f"upload_multiple_{task['id']}"
+            key=f"upload_multiple_{task['id']}_{upload_nonce}"
         )
         if uploaded_files:
-            for file in uploaded_files:
+            with st.spinner(f"Enviando {len(uploaded_files)} arquivo(s)..."):
                 try:
-                    supabase.storage.from_("task-attachments").upload(
-                        f"{task['id']}/{file.name}",
-                        file.getvalue(),
-                        file_options={"content-type": file.type}
+                    st.session_state[f"upload_results_{task['id']}"] = attachments.upload_attachments(
+                        client, task["id"], [(f.name, f.getvalue(), f.type) for f in uploaded_files]
                     )
-                except Exception:
-                    pass  # Ignora se já foi enviado
-            st.success("✅ Imagens anexadas!")
+                except Exception as e:
+                    st.session_state[f"upload_results_{task['id']}"] = [{"name": f.name, "status": "error", "error": str(e)} for f in uploaded_files]
+            st.session_state[upload_nonce_key] = upload_nonce + 1
             st.rerun()
 
-        # Mostrar imagens existentes
+        upload_results = st.session_state.pop(f"upload_results_{task['id']}", None)
+        if upload_results:
+            uploaded = sum(r["status"] == "uploaded" for r in upload_results)
+            duplicates = sum(r["status"] == "duplicate" for r in upload_results)
+            if uploaded:
+                st.success(f"✅ {uploaded} imagem(ns) anexada(s)!")
+            if duplicates:
+                st.info(f"ℹ️ {duplicates} arquivo(s) já estavam anexados.")
+            for r in upload_results:
+                if r["status"] == "error":
+                    st.error(f"❌ {r['name']}: {r['error']}")
+
+        # Mostrar imagens existentes (miniaturas paginadas, com link para o original)
         try:
-            files = supabase.storage.from_("task-attachments").list(f"{task['id']}/")
+            files = attachments.list_attachments(client, task["id"])
             if files:
+                page_key = f"attach_page_{task['id']}"
+                pages = (len(files) - 1) // ATTACHMENT_GALLERY_PAGE_SIZE + 1
+                page = min(st.session_state.get(page_key, 0), pages - 1)
+                visible = files[page * ATTACHMENT_GALLERY_PAGE_SIZE:(page + 1) * ATTACHMENT_GALLERY_PAGE_SIZE]
+                # URLs resolvidas só para a página visível, numa única chamada
+                urls = attachments.resolve_urls(client, [p for f in visible for p in (f["path"], f["thumb_path"]) if p])
                 cols_img = st.columns(3)
-                for idx, file in enumerate(files):
-                    url = supabase.storage.from_("task-attachments").get_public_url(f"{task['id']}/{file['name']}")
+                for idx, file in enumerate(visible):
+                    url = urls.get(file["path"])
                     with cols_img[idx % 3]:
-                        st.image(url, width=200, caption=file["name"])
+                        st.image(urls.get(file["thumb_path"], url), width=200, caption=file["label"])
+                        st.markdown(f"[🔍 Original]({url})")
+                if pages > 1:
+                    nav1, nav2, nav3 = st.columns([1, 2, 1])
+                    with nav1:
+                        if st.button("◀", key=f"attach_prev_{task['id']}", disabled=page == 0):
+                            st.session_state[page_key] = page - 1
+                            st.rerun()
+                    with nav2:
+                        st.caption(f"Página {page + 1}/{pages} — {len(files)} anexo(s)")
+                    with nav3:
+                        if st.button("▶", key=f"attach_next_{task['id']}", disabled=page >= pages - 1):
+                            st.session_state[page_key] = page + 1
+                            st.rerun()
             else:
                 st.caption("_Nenhum anexo_")
-        except:
-            st.caption("_Falha ao carregar anexos_")
+        except Exception as e:
+            st.caption(f"_Falha ao carregar anexos: {str(e)}_")
 
         # 📝 Observações Técnicas
         st.markdown("### 📝 Observações Técnicas")
         note_key = f"note_{task['id']}"
         if note_key not in st.session_state:
-            # Carrega observação atual do banco
-            res = supabase.table("maintenance_tasks").select("notes").eq("id", task["id"]).execute()
-            current_note = res.data[0]["notes"] if res.data and res.data[0].get("notes") else ""
-            st.session_state[note_key] = current_note
+            # Observação atual (a tarefa do detalhe já vem completa do banco)
+            st.session_state[note_key] = task.get("notes") or ""
 
         observation = st.text_area(
             "Digite suas observações finais...",
@@ -498,22 +781,24 @@ def show_task_modal(task):
         with col1:
             if task["status"] in ["scheduled", "overdue"]:
                 if st.button("▶️ Iniciar", use_container_width=True):
-                    supabase.table("maintenance_tasks").update({"status": "in_progress"}).eq("id", task["id"]).execute()
+                    repository.update_task(client, task["id"], {"status": "in_progress"})
                     st.success("✅ Status atualizado!")
                     st.rerun()
             elif task["status"] == "in_progress":
                 if st.button("✅ Concluir", use_container_width=True):
                     # Atualizar checklist marcado
+                    changes = {}
                     for i, item in enumerate(checklist_data):
                         new_status = st.session_state.get(f"chk_modal_{task['id']}_{i}_state", item["is_completed"])
                         if new_status != item["is_completed"]:
-                            supabase.table("checklists").update({"is_completed": new_status}).eq("id", item["id"]).execute()
+                            changes[item["id"]] = new_status
+                    repository.set_checklist_status(client, changes)
 
                     # Salvar observação técnica
-                    supabase.table("maintenance_tasks").update({
+                    repository.update_task(client, task["id"], {
                         "status": "completed",
                         "notes": st.session_state[note_key]  # 🔥 Salva observação
-                    }).eq("id", task["id"]).execute()
+                    })
 
                     # 🔁 Arquivar
                     checklist_items = [{"text": item["item"], "checked": st.session_state.get(f"chk_modal_{task['id']}_{i}_state", item["is_completed"])} for i, item in enumerate(checklist_data)]
@@ -543,17 +828,15 @@ def show_task_modal(task):
                             buf = io.BytesIO()
                             img.save(buf, format="PNG")
                             img_bytes = buf.getvalue()
-                            signature_url = f"signatures/{task['id']}.png"
                             try:
-                                supabase.storage.from_("signatures").upload(signature_url, img_bytes, file_options={"content-type": "image/png"})
-                                signature_url = supabase.storage.from_("signatures").get_public_url(signature_url)
+                                signature_url = repository.upload_signature(client, task["id"], img_bytes)
                             except Exception as e:
                                 st.error(f"Erro ao salvar assinatura: {str(e)}")
                                 signature_url = None
                         else:
                             signature_url = None
 
-                    supabase.table("maintenance_tasks").update({"signature_url": signature_url}).eq("id", task["id"]).execute()
+                    repository.update_task(client, task["id"], {"signature_url": signature_url})
 
                     st.success("✅ Tarefa concluída!")
                     st.rerun()
@@ -570,36 +853,15 @@ def show_task_modal(task):
                     if st.button("Clonar para selecionadas", use_container_width=True):
                         if selected_locations:
                             checklist_data = load_checklist(task["id"])
-                            for loc_id in selected_locations:
-                                res = supabase.table("maintenance_tasks").insert({
-                                    "title": task["title"],
-                                    "description": task.get("description"),
-                                    "specialty": task.get("specialty"),
-                                    "technician_id": task.get("technician_id"),
-                                    "location_id": str(loc_id),
-                                    "due_date": task["due_date"],
-                                    "recurrence": task.get("recurrence"),
-                                    "status": "scheduled",
-                                    "is_template": False,
-                                    "notes": task.get("notes")  # 🔥 Copia observações também
-                                }).execute()
-                                new_task_id = res.data[0]["id"] if res.data else None
-                                if checklist_data and new_task_id:
-                                    for item in checklist_data:
-                                        supabase.table("checklists").insert({
-                                            "task_id": new_task_id,
-                                            "item": item["item"],
-                                            "is_completed": False
-                                        }).execute()
-                            st.success(f"✅ {len(selected_locations)} tarefas clonadas!")
+                            result = create_tasks_bulk(clone_task_rows(task, selected_locations), [item["item"] for item in checklist_data])
+                            show_bulk_result(result, "✅ {count} tarefas clonadas!")
                             st.rerun()
                         else:
                             st.warning("Selecione pelo menos uma localidade.")
 
         with col3:
             if st.button("🗑️ Excluir", use_container_width=True):
-                supabase.table("checklists").delete().eq("task_id", task["id"]).execute()
-                supabase.table("maintenance_tasks").delete().eq("id", task["id"]).execute()
+                delete_tasks([task["id"]])
                 st.success("✅ Tarefa excluída!")
                 st.session_state["selected_task"] = None
                 st.rerun()
@@ -610,36 +872,25 @@ def show_task_modal(task):
                 st.rerun()
 
 # Se houver tarefa selecionada, mostra o modal
-if st.session_state["selected_task"]:
-    show_task_modal(st.session_state["selected_task"])
+# selected_task guarda só o id; a tarefa completa é lida ao abrir o detalhe
+recorder.section("tarefas")
+selected_task = booted("selected_task", lambda: load_task(st.session_state["selected_task"])) if st.session_state["selected_task"] else None
+if selected_task:
+    show_task_modal(selected_task, boot.get("selected_checklist"))
 else:
     # --------------- LISTA DE ATIVIDADES (por modo) ---------------
-    techs = load_technicians()
-    locs = load_locations()
+    techs = boot["technicians"]
+    locs = boot["locations"]
 
-    def get_filtered_tasks(status_list):
-        query = supabase.table("maintenance_tasks")\
-            .select("*")\
-            .in_("status", status_list)\
-            .eq("is_template", False)\
-            .order("due_date", desc=False)
-        if selected_speciality != "Todas":
-            query = query.eq("specialty", selected_speciality)
-        if selected_loc != "Todas":
-            loc_id_by_name = {v: k for k, v in all_locs.items()}
-            loc_id = loc_id_by_name.get(selected_loc)
-            if loc_id:
-                query = query.eq("location_id", loc_id)
-        if filter_date:
-            start = datetime.combine(filter_date, datetime.min.time()).isoformat()
-            end = datetime.combine(filter_date, datetime.max.time()).isoformat()
-            query = query.gte("due_date", start).lte("due_date", end)
-        return query.execute().data or []
-
-    tasks_all = get_filtered_tasks(["scheduled", "in_progress", "completed", "overdue"])
+    # Uma única consulta por execução para o Kanban. A Lista é paginada no servidor
+    # e o Calendário carrega apenas a janela visível — todos já buscados no bootstrap.
+    if st.session_state["view_mode"] == "kanban":
+        tasks_all = booted("tasks", lambda: load_board_tasks(filters))
+        tasks_by_status = task_views.group_tasks_by_status(tasks_all)
 
     # Modo: Lista
     if st.session_state["view_mode"] == "list":
+        recorder.section("render:lista")
         st.subheader("📋 Visão em Lista")
 
         # Menu ⋯ para ações em massa
@@ -672,16 +923,43 @@ else:
             if st.session_state[select_key]:
                 st.caption(f"🟢 {len(st.session_state[select_key])} selecionada(s)")
 
-        for task in tasks_all:
+        # Paginação no servidor: só a página atual vira widgets
+        sort_col, dir_col, size_col = st.columns([2, 1, 1])
+        with sort_col:
+            sort_label = st.selectbox("Ordenar por", list(LIST_SORT_KEYS), key="list_sort")
+        with dir_col:
+            sort_desc = st.toggle("Decrescente", key="list_sort_desc")
+        with size_col:
+            page_size = st.selectbox("Por página", LIST_PAGE_SIZES, key="list_page_size")
+
+        page = list_page_request(filters)[3]
+        tasks_page, total = booted("tasks_page", lambda: load_list_page(filters, sort_label, sort_desc, page_size, page))
+        pages = max(1, (total - 1) // page_size + 1)
+
+        if st.session_state[bulk_key]:
+            sel_col1, sel_col2 = st.columns(2)
+            with sel_col1:
+                if st.button("☑️ Selecionar página", key="select_list_page", use_container_width=True):
+                    for task in tasks_page:
+                        if task["id"] not in st.session_state[select_key]:
+                            st.session_state[select_key].append(task["id"])
+                        st.session_state.pop(f"bulk_list_{task['id']}", None)
+                    st.rerun()
+            with sel_col2:
+                if st.button("✖️ Limpar seleção", key="clear_list_selection", use_container_width=True):
+                    for task_id in st.session_state[select_key]:
+                        st.session_state.pop(f"bulk_list_{task_id}", None)
+                    st.session_state[select_key] = []
+                    st.rerun()
+
+        for task in tasks_page:
             cols = st.columns([1, 1, 4, 2, 1, 1])
             with cols[0]:
                 if st.session_state[bulk_key]:
-                    key = f"bulk_list_{task['id']}"
-                    is_selected = st.checkbox("", value=task["id"] in st.session_state[select_key], key=key)
-                    if is_selected and task["id"] not in st.session_state[select_key]:
-                        st.session_state[select_key].append(task["id"])
-                    elif not is_selected and task["id"] in st.session_state[select_key]:
-                        st.session_state[select_key].remove(task["id"])
+                    # A seleção vive em session_state[select_key], não nos checkboxes,
+                    # e por isso sobrevive à troca de página.
+                    st.checkbox("", value=task["id"] in st.session_state[select_key], key=f"bulk_list_{task['id']}",
+                                on_change=toggle_selection, args=(select_key, task["id"]))
             with cols[1]:
                 st.markdown("**ID**")  # Espaço decorativo
             with cols[2]:
@@ -691,13 +969,26 @@ else:
                 st.write(status_labels.get(task["status"]))
             with cols[4]:
                 if st.button("🔍", key=f"open_{task['id']}"):
-                    st.session_state["selected_task"] = task
+                    st.session_state["selected_task"] = task["id"]
                     st.rerun()
             with cols[5]:
                 st.markdown(f"<small>{task['due_date'][:16].replace('T', ' ')}</small>", unsafe_allow_html=True)
 
+        nav1, nav2, nav3 = st.columns([1, 2, 1])
+        with nav1:
+            if st.button("◀ Anterior", key="list_prev", disabled=page == 0):
+                st.session_state["list_page"] = page - 1
+                st.rerun()
+        with nav2:
+            st.caption(f"Página {page + 1}/{pages} — {total} tarefa(s)")
+        with nav3:
+            if st.button("Próxima ▶", key="list_next", disabled=page >= pages - 1):
+                st.session_state["list_page"] = page + 1
+                st.rerun()
+
     # Modo: Kanban
     elif st.session_state["view_mode"] == "kanban":
+        recorder.section("render:kanban")
         st.subheader("📊 Quadro Kanban")
 
         # Menu ⋯ para ações em massa
@@ -730,17 +1021,23 @@ else:
             if st.session_state[select_key]:
                 st.caption(f"🟢 {len(st.session_state[select_key])} selecionada(s)")
 
-        cols = st.columns(3)
         status_groups = {
             "scheduled": "📅 Agendadas",
+            "overdue": "❗ Atrasadas",
             "in_progress": "🛠️ Em Andamento",
             "completed": "✅ Concluídas"
         }
+        cols = st.columns(len(status_groups))
+
+        # Checklists só são buscados para cards expandidos ou com Concluir/PDF/alternância
+        # clicados nesta execução — numa única consulta in_("task_id", ...), já no bootstrap.
+        checklist_ids = kanban_checklist_ids()
+        checklist_index = booted("checklists", lambda: load_checklists_bulk(checklist_ids) if checklist_ids else {})
 
         for idx, (status, label) in enumerate(status_groups.items()):
             with cols[idx]:
                 st.markdown(f"### {label}")
-                tasks = get_filtered_tasks([status])
+                tasks = tasks_by_status.get(status, [])
                 if not tasks:
                     st.caption("_Vazio_")
                 for task in tasks:
@@ -754,15 +1051,15 @@ else:
                             elif not is_selected and task["id"] in st.session_state[select_key]:
                                 st.session_state[select_key].remove(task["id"])
 
-                        st.markdown(f"**{task['title']}**")
-                        st.markdown(f"**Especialidade:** `{task.get('specialty', '—')}`")
-                        st.markdown(f"**Técnico:** {get_technician_name(task['technician_id'], techs)}")
-                        st.markdown(f"**Local:** 📍 `{get_location_name(task['location_id'], locs)}`")  # 🔥 Destaque
-                        due = task['due_date'][:16].replace('T', ' ')
-                        st.markdown(f"**Agendado para:** {due}")
+                        card = task_views.kanban_card(task, techs, locs)
+                        st.markdown(f"**{card['title']}**")
+                        st.markdown(f"**Especialidade:** `{card['specialty']}`")
+                        st.markdown(f"**Técnico:** {card['technician']}")
+                        st.markdown(f"**Local:** 📍 `{card['location']}`")  # 🔥 Destaque
+                        st.markdown(f"**Agendado para:** {card['due']}")
 
                         # Checklist com expandir/retrair
-                        checklist_data = load_checklist(task["id"])
+                        checklist_data = checklist_index.get(task["id"], [])
                         expand_key = f"expand_checklist_kanban_{task['id']}"
                         if expand_key not in st.session_state:
                             st.session_state[expand_key] = False
@@ -777,22 +1074,23 @@ else:
                                 st.markdown(f"{mark} {item['item']}")
 
                         # Observações (mini preview)
-                        if task.get("notes"):
-                            st.caption(f"📝 Obs: {task['notes'][:50]}...")
+                        if card["notes_preview"]:
+                            st.caption(f"📝 Obs: {card['notes_preview']}...")
 
                         # Botões
                         col1, col2, col3, col4 = st.columns(4)
                         with col1:
                             if task["status"] in ["scheduled", "overdue"]:
                                 if st.button("▶️ Iniciar", key=f"start_{task['id']}", use_container_width=True):
-                                    supabase.table("maintenance_tasks").update({"status": "in_progress"}).eq("id", task["id"]).execute()
+                                    repository.update_task(client, task["id"], {"status": "in_progress"})
                                     st.rerun()
                             elif task["status"] == "in_progress":
                                 if st.button("✅ Concluir", key=f"done_{task['id']}", use_container_width=True):
-                                    supabase.table("maintenance_tasks").update({"status": "completed"}).eq("id", task["id"]).execute()
+                                    repository.update_task(client, task["id"], {"status": "completed"})
                                     checklist_items = [{"text": item["item"], "checked": item["is_completed"]} for item in checklist_data]
-                                    archive_task(task, checklist_items)
-                                    create_recurring_task(task)
+                                    full_task = load_task(task["id"])  # campos pesados só ao concluir
+                                    archive_task(full_task, checklist_items)
+                                    create_recurring_task(full_task)
                                     st.rerun()
                         with col2:
                             if st.button("📋 Clonar", key=f"clone_{task['id']}", use_container_width=True):
@@ -807,36 +1105,15 @@ else:
                                     if st.button("Clonar para selecionadas", key=f"do_clone_{task['id']}", use_container_width=True):
                                         checklist_data = load_checklist(task["id"])
                                         if selected_locations:
-                                            for loc_id in selected_locations:
-                                                res = supabase.table("maintenance_tasks").insert({
-                                                    "title": task["title"],
-                                                    "description": task.get("description"),
-                                                    "specialty": task.get("specialty"),
-                                                    "technician_id": task.get("technician_id"),
-                                                    "location_id": str(loc_id),
-                                                    "due_date": task["due_date"],
-                                                    "recurrence": task.get("recurrence"),
-                                                    "status": "scheduled",
-                                                    "is_template": False,
-                                                    "notes": task.get("notes")  # 🔥 Copia observações
-                                                }).execute()
-                                                new_task_id = res.data[0]["id"] if res.data else None
-                                                if checklist_data and new_task_id:
-                                                    for item in checklist_data:
-                                                        supabase.table("checklists").insert({
-                                                            "task_id": new_task_id,
-                                                            "item": item["item"],
-                                                            "is_completed": False
-                                                        }).execute()
-                                            st.success(f"✅ {len(selected_locations)} tarefas clonadas!")
+                                            result = create_tasks_bulk(clone_task_rows(load_task(task["id"]), selected_locations), [item["item"] for item in checklist_data])
+                                            show_bulk_result(result, "✅ {count} tarefas clonadas!")
                                             st.rerun()
                                         else:
                                             st.warning("Selecione pelo menos uma localidade.")
                         with col3:
                             if st.button("📄 PDF", key=f"pdf_{task['id']}", use_container_width=True):
                                 try:
-                                    checklist_items = [{"text": item["item"], "checked": item["is_completed"]} for item in checklist_data]
-                                    pdf_bytes = generate_pdf(task, get_technician_name(task['technician_id'], techs), get_location_name(task['location_id'], locs), checklist_items)
+                                    pdf_bytes = generate_pdf(load_task(task["id"]), card["technician"], card["location"], checklist_data)
                                     st.download_button(
                                         "📥 Baixar",
                                         data=pdf_bytes,
@@ -849,35 +1126,51 @@ else:
                                     st.error(f"Erro ao gerar PDF: {str(e)}")
                         with col4:
                             if st.button("🔍 Detalhes", key=f"det_{task['id']}", use_container_width=True):
-                                st.session_state["selected_task"] = task
+                                st.session_state["selected_task"] = task["id"]
                                 st.rerun()
 
     # Modo: Calendário
     elif st.session_state["view_mode"] == "calendar":
+        recorder.section("render:calendario")
         st.subheader("📅 Visão em Calendário")
-        events = []
-        for task in tasks_all:
-            events.append({
-                "title": task["title"],
-                "start": task["due_date"][:16].replace("T", " "),
-                "color": COLORS.get(task.get("specialty"), "#eee"),
-                "resourceId": task["technician_id"] or "sem_tecnico"
-            })
-        
-        calendar(events=events, options={
-            "initialView": "dayGridMonth",
+        window = calendar_request(filters)
+        tasks_window = booted("calendar", lambda: load_calendar_tasks(filters, *window))
+
+        # Navegação: a data de referência e a visão definem a janela carregada
+        nav1, nav2, nav3, nav4 = st.columns([1, 1, 1, 3])
+        with nav1:
+            if st.button("‹", key="calendar_prev", use_container_width=True, disabled=bool(filter_date)):
+                shift_calendar(-1)
+                st.rerun()
+        with nav2:
+            if st.button("Hoje", key="calendar_today", use_container_width=True, disabled=bool(filter_date)):
+                st.session_state["calendar_anchor"] = datetime.now().date()
+                st.rerun()
+        with nav3:
+            if st.button("›", key="calendar_next", use_container_width=True, disabled=bool(filter_date)):
+                shift_calendar(1)
+                st.rerun()
+        with nav4:
+            st.selectbox("Visão", list(CALENDAR_VIEWS), key="calendar_view_label", label_visibility="collapsed")
+
+        view_type = calendar_view_type()
+        initial_date = filter_date or st.session_state["calendar_anchor"]
+        # A chave muda com o período: o componente só lê initialDate/initialView ao montar
+        calendar(events=task_views.calendar_events(tasks_window), options={
+            "initialView": view_type,
+            "initialDate": initial_date.isoformat(),
+            "fixedWeekCount": False,  # a grade do mês não passa da margem carregada
             "editable": True,
             "selectable": True,
-            "headerToolbar": {
-                "left": "prev,next today",
-                "center": "title",
-                "right": "dayGridMonth,timeGridWeek,timeGridDay"
-            },
+            "headerToolbar": {"left": "", "center": "title", "right": ""},
             "eventClick": "js:function(event) { alert('Tarefa: ' + event.event.title); }"
-        })
+        }, key=f"calendar_view_{view_type}_{initial_date.isoformat()}")
 
 # --------------- HISTÓRICO DE ATIVIDADES ---------------
+HISTORY_PAGE_SIZE = 50
+
 if st.session_state.get("show_history"):
+    recorder.section("historico")
     st.markdown("## 📋 Histórico de Atividades")
     
     col1, col2 = st.columns(2)
@@ -886,19 +1179,95 @@ if st.session_state.get("show_history"):
     with col2:
         end_date = st.date_input("Data final", value=datetime.now())
 
-    res = supabase.table("task_history").select("*")\
-        .gte("completed_at", str(start_date))\
-        .lte("completed_at", str(end_date))\
-        .order("completed_at", desc=True).execute()
-    history = res.data or []
+    # 📦 Relatório consolidado (pacote para auditoria)
+    with st.expander("📦 Relatório consolidado"):
+        rep_col1, rep_col2, rep_col3 = st.columns(3)
+        with rep_col1:
+            report_loc = st.selectbox("Localidade", options=[None] + list(all_locs.keys()), format_func=lambda x: all_locs[x] if x else "Todas", key="report_loc")
+        with rep_col2:
+            report_specialty = st.selectbox("Especialidade", ["Todas"] + all_specialties, key="report_specialty")
+        with rep_col3:
+            report_mode = st.radio("Formato", ["PDF único", "ZIP (um PDF por tarefa)"], key="report_mode")
+
+        if st.button("Gerar relatório", key="start_report"):
+            report_techs = load_technicians()
+            entries = []
+            for page in repository.iter_history_pages(
+                client, start_date.isoformat(), (end_date + timedelta(days=1)).isoformat(),
+                location_id=report_loc,
+                specialty=None if report_specialty == "Todas" else report_specialty,
+            ):
+                for h in page:
+                    payload = pdf_reports.history_payload(h, get_technician_name(h['technician_id'], report_techs), get_location_name(h['location_id'], all_locs))
+                    entries.append((f"{h['completed_at'][:10]}_{h['id']}.pdf", payload))
+            if entries:
+                st.session_state["report_job"] = pdf_reports.ConsolidatedReportJob(entries, mode="zip" if report_mode.startswith("ZIP") else "pdf")
+            else:
+                st.info("Nenhuma atividade encontrada para os filtros.")
+
+        report_job = st.session_state.get("report_job")
+        if report_job is not None:
+            if report_job.done():
+                try:
+                    st.download_button("📥 Baixar relatório", data=report_job.result(), file_name=report_job.filename, mime=report_job.mime, key="download_report")
+                except Exception as e:
+                    st.error(f"Erro ao gerar relatório: {str(e)}")
+                if st.button("Limpar", key="clear_report"):
+                    st.session_state.pop("report_job", None)
+                    st.rerun()
+            else:
+                # Só este fragmento é reexecutado enquanto os processos trabalham
+                @st.fragment(run_every="1s")
+                def report_progress():
+                    done, total = report_job.progress()
+                    st.progress(done / total if total else 1.0, text=f"Gerando relatório... {done}/{total}")
+                    if report_job.done():
+                        st.rerun()
+                report_progress()
+                if st.button("Cancelar", key="cancel_report"):
+                    report_job.cancel()
+                    st.session_state.pop("report_job", None)
+                    st.rerun()
+
+    # Paginação por chave em (completed_at, id): só as colunas do cabeçalho vêm na
+    # listagem; checklist e observações são carregados quando a linha é aberta.
+    history_range = (start_date, end_date)
+    if st.session_state.get("history_range") != history_range:
+        st.session_state["history_range"] = history_range
+        st.session_state["history_cursors"] = [None]
+    history_cursors = st.session_state["history_cursors"]
+
+    history = repository.fetch_history_page(
+        client, start_date.isoformat(), (end_date + timedelta(days=1)).isoformat(),
+        cursor=history_cursors[-1], columns=records.HISTORY_HEADER_COLUMNS,
+        page_size=HISTORY_PAGE_SIZE + 1, desc=True
+    )
+    has_next = len(history) > HISTORY_PAGE_SIZE
+    history = history[:HISTORY_PAGE_SIZE]
 
     if not history:
         st.info("Nenhuma atividade encontrada no período.")
     else:
+        history_techs = load_technicians()
+        history_locs = load_locations()
+        open_ids = [h["id"] for h in history if st.session_state.get(f"history_open_{h['id']}") or button_clicked(f"toggle_history_{h['id']}")]
+        details = repository.load_history_details(client, open_ids, records.HISTORY_DETAIL_COLUMNS) if open_ids else {}
+
         for h in history:
-            with st.expander(f"✅ {h['title']} — {get_technician_name(h['technician_id'], load_technicians())} ({h['completed_at'][:10]})"):
-                st.write(f"**Técnico:** {get_technician_name(h['technician_id'], load_technicians())}")
-                st.write(f"**Local:** {get_location_name(h['location_id'], load_locations())}")
+            tech_name = get_technician_name(h['technician_id'], history_techs)
+            open_key = f"history_open_{h['id']}"
+            with st.container(border=True):
+                col_h1, col_h2 = st.columns([5, 1])
+                with col_h1:
+                    st.markdown(f"✅ **{h['title']}** — {tech_name} ({h['completed_at'][:10]})")
+                with col_h2:
+                    if st.button("❌ Fechar" if st.session_state.get(open_key) else "📂 Abrir", key=f"toggle_history_{h['id']}", use_container_width=True):
+                        st.session_state[open_key] = not st.session_state.get(open_key, False)
+                if not st.session_state.get(open_key) or h["id"] not in details:
+                    continue
+                h = records.HistoryRecord.from_row({**h, **details[h["id"]]})
+                st.write(f"**Técnico:** {tech_name}")
+                st.write(f"**Local:** {get_location_name(h['location_id'], history_locs)}")
                 st.write(f"**Agendado para:** {h['due_date'][:16].replace('T', ' ')}")
                 st.write(f"**Concluído em:** {h['completed_at'][:16].replace('T', ' ')}")
                 st.write(f"**Recorrência:** {h.get('recurrence', '—')}")
@@ -914,6 +1283,107 @@ if st.session_state.get("show_history"):
                 if h.get("notes"):
                     st.write(f"📝 Observações: {h['notes']}")
 
+                if st.button("📄 PDF", key=f"history_pdf_{h['id']}"):
+                    try:
+                        with recorder.timer("pdf:historico"):
+                            pdf_bytes = pdf_reports.render_history_report(h, tech_name, get_location_name(h['location_id'], history_locs))
+                        st.download_button(
+                            "📥 Baixar",
+                            data=pdf_bytes,
+                            file_name=f"historico_{h['id']}.pdf",
+                            mime="application/pdf",
+                            key=f"download_history_pdf_{h['id']}"
+                        )
+                    except Exception as e:
+                        st.error(f"Erro ao gerar PDF: {str(e)}")
+
+    nav1, nav2, nav3 = st.columns([1, 2, 1])
+    with nav1:
+        if st.button("◀ Anterior", key="history_prev", disabled=len(history_cursors) == 1):
+            history_cursors.pop()
+            st.rerun()
+    with nav2:
+        st.caption(f"Página {len(history_cursors)}")
+    with nav3:
+        if st.button("Próxima ▶", key="history_next", disabled=not has_next):
+            history_cursors.append(repository.history_cursor(history[-1]))
+            st.rerun()
+
     if st.button("Voltar"):
         st.session_state["show_history"] = False
-        st.rerun()
\ No newline at end of file
+        st.rerun()
+
+# --------------- INDICADORES (KPIs) ---------------
+if st.session_state.get("show_kpis"):
+    recorder.section("indicadores")
+    st.markdown("## 📈 Indicadores de Manutenção")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        kpi_start = st.date_input("Data inicial", value=datetime.now() - timedelta(days=30), key="kpi_start")
+    with col2:
+        kpi_end = st.date_input("Data final", value=datetime.now(), key="kpi_end")
+    with col3:
+        kpi_dimension = st.selectbox("Agrupar por", ["Técnico", "Localidade", "Especialidade"], key="kpi_dimension")
+
+    # Somente os resumos diários são lidos — nunca o task_history completo
+    summaries = kpi.load_summaries(client, kpi_start, kpi_end)
+    if not summaries:
+        st.info("Nenhum indicador no período. Rode `python kpi.py backfill` para gerar a partir do histórico.")
+    else:
+        dimension = {"Técnico": "technician_id", "Localidade": "location_id", "Especialidade": "specialty"}[kpi_dimension]
+        kpi_techs = load_technicians()
+        kpi_locs = load_locations()
+        names = {
+            "technician_id": lambda v: get_technician_name(v, kpi_techs) if v else "Não atribuído",
+            "location_id": lambda v: get_location_name(v, kpi_locs),
+            "specialty": lambda v: v or "—",
+        }[dimension]
+
+        totals = kpi.aggregate(summaries, dimension)
+        completed = sum(r["completed"] for r in totals)
+        on_time = sum(r["completed"] * (r["on_time_rate"] or 0) for r in totals)
+        m1, m2 = st.columns(2)
+        m1.metric("Concluídas", completed)
+        m2.metric("No prazo", f"{on_time / completed:.0%}" if completed else "—")
+
+        st.dataframe([{
+            kpi_dimension: names(r[dimension]),
+            "Concluídas": r["completed"],
+            "No prazo": f"{r['on_time_rate']:.0%}" if r["on_time_rate"] is not None else "—",
+            "Atraso médio (h)": round(r["mean_lateness_hours"], 1) if r["mean_lateness_hours"] is not None else "—",
+            "Checklist concluído": f"{r['checklist_ratio']:.0%}" if r["checklist_ratio"] is not None else "—",
+        } for r in totals], use_container_width=True, hide_index=True)
+
+    if st.button("Voltar", key="kpi_back"):
+        st.session_state["show_kpis"] = False
+        st.rerun()
+
+# --------------- PAINEL DE DEPURAÇÃO (opt-in) ---------------
+total_ms = recorder.finish()
+if instrumentation.LOG_ENABLED:
+    recorder.log(total_ms, view=st.session_state["view_mode"])
+if st.session_state.get("debug_panel"):
+    with st.sidebar:
+        st.header("🐞 Depuração")
+        st.caption(f"Execução: {total_ms:.0f} ms — {len(recorder.queries)} consulta(s), "
+                   f"{sum(q.ms for q in recorder.queries):.0f} ms no backend")
+        for table, shape, n in recorder.nplus1():
+            st.warning(f"⚠️ Possível N+1: `{table}` consultada {n}x com o mesmo filtro ({shape or 'sem filtro'})")
+
+        st.markdown("**Por tabela**")
+        st.dataframe([{"Tabela": table, "Consultas": t["requests"], "Linhas": t["rows"],
+                       "KB": round(t["bytes"] / 1024, 1), "ms": round(t["ms"], 1)}
+                      for table, t in recorder.by_table().items()], use_container_width=True, hide_index=True)
+
+        st.markdown("**Seções**")
+        st.dataframe([{"Seção": t.name, "ms": round(t.ms, 1)} for t in recorder.timings],
+                     use_container_width=True, hide_index=True)
+
+        with st.expander("Consultas desta execução"):
+            st.dataframe([{"Tabela": q.table, "Ação": q.action, "Filtro": q.shape, "Linhas": q.rows,
+                           "Bytes": q.bytes, "ms": round(q.ms, 1)} for q in recorder.queries],
+                         use_container_width=True, hide_index=True)
+
+        with st.expander("Métricas do processo (OpenMetrics)"):
+            st.code(instrumentation.openmetrics(), language="text")
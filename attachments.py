@@ -0,0 +1,242 @@
+# attachments.py — Anexos das tarefas no bucket "task-attachments"
+#
+# Os arquivos são gravados em "<task_id>/<hash>-<nome>", onde <hash> é o início do
+# SHA-256 do conteúdo enviado: a mesma foto enviada duas vezes (mesmo com outro nome)
+# é detectada e não sobe de novo. Os envios rodam em paralelo num pool limitado.
+#
+# Imagens passam por ingest_image antes do envio: orientação EXIF aplicada e
+# metadados removidos, resolução limitada, recodificação em WebP e uma miniatura
+# gravada em "<task_id>/thumbs/" com o mesmo nome.
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, ImageOps
+
+BUCKET = "task-attachments"
+THUMBS_DIR = "thumbs"
+HASH_PREFIX_LEN = 16
+UPLOAD_WORKERS = int(os.getenv("ATTACHMENT_UPLOAD_WORKERS", "4"))
+
+# Índice de anexos por tarefa, em cache no processo e invalidado a cada envio
+INDEX_CACHE_TTL = 300  # segundos
+INDEX_CACHE_MAX_ENTRIES = 256  # tarefas
+URL_CACHE_MAX_ENTRIES = 2048  # URLs assinadas
+LIST_PAGE_SIZE = 1000
+# Bucket privado: defina ATTACHMENTS_PUBLIC_BUCKET=0 para usar URLs assinadas
+PUBLIC_BUCKET = os.getenv("ATTACHMENTS_PUBLIC_BUCKET", "1") != "0"
+SIGNED_URL_TTL = 3600  # segundos
+
+IMAGE_MAX_SIZE = int(os.getenv("ATTACHMENT_MAX_SIZE", "2048"))  # maior lado, em px
+THUMBNAIL_SIZE = 320
+IMAGE_FORMAT, IMAGE_EXTENSION, IMAGE_CONTENT_TYPE = "WEBP", ".webp", "image/webp"
+IMAGE_QUALITY = 82
+THUMBNAIL_QUALITY = 70
+
+_HASHED_NAME = re.compile(r"^([0-9a-f]{%d})-(.+)$" % HASH_PREFIX_LEN)
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:HASH_PREFIX_LEN]
+
+
+def split_name(stored_name):
+    """(hash, nome original) de um arquivo gravado; hash é None para anexos antigos."""
+    match = _HASHED_NAME.match(stored_name)
+    return (match.group(1), match.group(2)) if match else (None, stored_name)
+
+
+class _ExpiringCache:
+    """Dicionário com validade por entrada e limite de tamanho (descarta o menos usado).
+
+    Não é thread-safe por si: o acesso é protegido por _cache_lock.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # chave → (expira_em, valor), do menos ao mais usado
+
+    def get(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, expires, value):
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def pop(self, key):
+        self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_index_cache = _ExpiringCache(INDEX_CACHE_MAX_ENTRIES)
+_url_cache = _ExpiringCache(URL_CACHE_MAX_ENTRIES)
+_cache_lock = threading.Lock()
+
+
+def _list_all(storage, prefix):
+    """Lista uma "pasta" inteira (a API devolve no máximo `limit` itens por chamada)."""
+    entries, offset = [], 0
+    while True:
+        page = storage.list(prefix, {"limit": LIST_PAGE_SIZE, "offset": offset, "sortBy": {"column": "name", "order": "asc"}}) or []
+        entries.extend(page)
+        if len(page) < LIST_PAGE_SIZE:
+            return entries
+        offset += LIST_PAGE_SIZE
+
+
+def list_attachments(client, task_id):
+    """Anexos da tarefa: [{"name", "label", "path", "thumb_path"}], em cache por task_id.
+
+    thumb_path é None para anexos sem miniatura (enviados antes da ingestão).
+    """
+    now = time.monotonic()
+    with _cache_lock:
+        cached = _index_cache.get(task_id, now)
+        if cached is not None:
+            return cached
+    storage = client.storage.from_(BUCKET)
+    files = [f for f in _list_all(storage, f"{task_id}/") if f.get("id")]  # ignora pastas
+    thumbs = {f["name"] for f in _list_all(storage, f"{task_id}/{THUMBS_DIR}/")}
+    index = []
+    for f in files:
+        path = f"{task_id}/{f['name']}"
+        index.append({
+            "name": f["name"],
+            "label": split_name(f["name"])[1],
+            "path": path,
+            "thumb_path": thumbnail_path(path) if f["name"] in thumbs else None,
+        })
+    with _cache_lock:
+        _index_cache.put(task_id, now + INDEX_CACHE_TTL, index)
+    return index
+
+
+def invalidate(task_id):
+    with _cache_lock:
+        _index_cache.pop(task_id)
+
+
+def resolve_urls(client, paths):
+    """URLs de vários arquivos de uma vez: {path: url}.
+
+    Em bucket público as URLs são montadas localmente; em bucket privado todas as
+    que faltam no cache são assinadas numa única chamada create_signed_urls.
+    """
+    storage = client.storage.from_(BUCKET)
+    if PUBLIC_BUCKET:
+        return {path: storage.get_public_url(path) for path in paths}
+
+    now = time.monotonic()
+    urls, missing = {}, []
+    with _cache_lock:
+        for path in paths:
+            cached = _url_cache.get(path, now)
+            if cached is not None:
+                urls[path] = cached
+            else:
+                missing.append(path)
+    if missing:
+        signed = storage.create_signed_urls(missing, SIGNED_URL_TTL)
+        expires = now + SIGNED_URL_TTL * 0.9  # renova antes de expirar
+        with _cache_lock:
+            for item in signed:
+                url = item.get("signedURL") or item.get("signedUrl")
+                if url:
+                    urls[item["path"]] = url
+                    _url_cache.put(item["path"], expires, url)
+    return urls
+
+
+def thumbnail_path(path):
+    task_id, name = path.split("/", 1)
+    return f"{task_id}/{THUMBS_DIR}/{name}"
+
+
+def _encode(img, quality):
+    buf = io.BytesIO()
+    img.save(buf, format=IMAGE_FORMAT, quality=quality, method=4)
+    return buf.getvalue()
+
+
+def ingest_image(data):
+    """Prepara uma imagem para armazenamento: (original, miniatura), ambos em WebP.
+
+    Aplica a orientação EXIF e descarta os metadados (a imagem é recodificada sem
+    eles), limita o maior lado a IMAGE_MAX_SIZE e gera a miniatura a partir do
+    resultado. Levanta exceção se os bytes não forem uma imagem válida.
+    """
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+        img.thumbnail((IMAGE_MAX_SIZE, IMAGE_MAX_SIZE))
+        original = _encode(img, IMAGE_QUALITY)
+        img.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE))
+        thumbnail = _encode(img, THUMBNAIL_QUALITY)
+    return original, thumbnail
+
+
+def _is_duplicate_error(error):
+    text = str(error).lower()
+    return "already exists" in text or "duplicate" in text or "409" in text
+
+
+def upload_attachments(client, task_id, files, max_workers=UPLOAD_WORKERS):
+    """Envia os arquivos em paralelo, deduplicando por conteúdo.
+
+    files é uma lista de (nome, bytes, content_type). Devolve um resultado por
+    arquivo, na mesma ordem: {"name", "path", "status": uploaded|duplicate|error, "error"}.
+    """
+    storage = client.storage.from_(BUCKET)
+    existing = {split_name(f["name"])[0] for f in list_attachments(client, task_id)}
+
+    results, pending = [], []
+    for name, data, content_type in files:
+        digest = content_hash(data)
+        if content_type.startswith("image/"):
+            name = os.path.splitext(name)[0] + IMAGE_EXTENSION
+        result = {"name": name, "path": f"{task_id}/{digest}-{name}", "status": "duplicate", "error": None}
+        results.append(result)
+        if digest not in existing:
+            existing.add(digest)  # duplicatas dentro do mesmo envio também contam
+            pending.append((result, data, content_type))
+
+    def upload(job):
+        result, data, content_type = job
+        try:
+            thumbnail = None
+            if content_type.startswith("image/"):
+                data, thumbnail = ingest_image(data)
+                content_type = IMAGE_CONTENT_TYPE
+            storage.upload(result["path"], data, file_options={"content-type": content_type})
+            if thumbnail:
+                storage.upload(thumbnail_path(result["path"]), thumbnail, file_options={"content-type": IMAGE_CONTENT_TYPE})
+            result["status"] = "uploaded"
+        except Exception as e:
+            if _is_duplicate_error(e):
+                result["status"] = "duplicate"
+            else:
+                result["status"] = "error"
+                result["error"] = str(e)
+
+    if pending:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+            list(executor.map(upload, pending))
+        invalidate(task_id)
+    return results
@@ -0,0 +1,310 @@
+# benchmark.py — Benchmarks com dados sintéticos sobre o backend local
+#
+# Gera, com semente fixa, técnicos, localidades, modelos, N tarefas com checklists e
+# M registros de histórico num banco SQLite temporário (local_backend.py) e mede os
+# mesmos caminhos de código usados pelo app, chamando as mesmas funções (task_views,
+# repository, recurrence): a consulta filtrada de tarefas, a preparação dos cards do
+# Kanban, a página da Lista, o mês do Calendário, create_recurring_task,
+# delete_tasks_in_bulk, generate_pdf e as consultas do histórico.
+#
+# Um caso que falha fica registrado como falho ({"failed": erro}) e os demais seguem.
+#
+# Para cada tamanho são reportados percentis de latência e o número de chamadas ao
+# backend por execução; o resultado vai para um JSON que serve de linha de base:
+#     python benchmark.py --sizes 100 1000 10000 100000 --output bench_baseline.json
+#     python benchmark.py --sizes 100 1000 --compare bench_baseline.json
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import instrumentation
+import recurrence
+import records
+import repository
+import task_store
+import task_views
+from local_backend import LocalClient
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_SEED = 42
+DEFAULT_REPEAT = 20
+HISTORY_RATIO = 0.5  # registros de histórico por tarefa
+REGRESSION_THRESHOLD = 1.25  # p50 25% acima da linha de base
+
+BOARD_STATUSES = list(task_views.STATUS_LABELS)
+STATUSES = ["scheduled"] * 10 + ["in_progress"] * 3 + ["overdue"] * 3 + ["completed"] * 4
+SPECIALTIES = list(repository.DEFAULT_SPECIALTIES)
+RECURRENCE_RULES = [None] * 9 + ["daily", "weekly", "monthly"]
+KANBAN_EXPANDED_CARDS = 5  # cards com checklist aberto em cada execução
+DELETE_BATCH = 50
+HISTORY_PAGE_SIZE = 50  # mesmo tamanho da tela de histórico
+
+
+# ----------- Dados sintéticos -----------
+def seed_dataset(client, size, seed=DEFAULT_SEED, history_ratio=HISTORY_RATIO):
+    """Popula o backend com `size` tarefas (e checklists) e size * history_ratio registros de histórico."""
+    rng = random.Random(seed)
+    base = datetime.now().replace(hour=8, minute=0, second=0, microsecond=0)
+
+    technicians = []
+    for i in range(max(5, size // 500)):
+        technicians += repository.insert_technician(client, f"Técnico {i + 1}", SPECIALTIES[i % len(SPECIALTIES)])
+    locations = []
+    for i in range(max(5, size // 200)):
+        locations += repository.insert_location(client, f"Unidade {i + 1}")
+    client.table("templates").insert([{
+        "title": f"Modelo {i + 1}", "description": "Rotina preventiva", "specialty": SPECIALTIES[i % len(SPECIALTIES)],
+        "technician_id": rng.choice(technicians)["id"], "location_id": rng.choice(locations)["id"],
+        "recurrence": "monthly", "checklist": ["Inspecionar", "Limpar", "Testar"],
+    } for i in range(5)]).execute()
+
+    task_rows, checklists = [], []
+    for i in range(size):
+        tech = rng.choice(technicians)
+        notes = "Verificar ruído no compressor e pressão de trabalho." if rng.random() < 0.3 else None
+        task_rows.append({
+            "title": f"Manutenção {i + 1}",
+            "description": "Atividade gerada para benchmark",
+            "specialty": tech["specialty"],
+            "technician_id": tech["id"],
+            "location_id": rng.choice(locations)["id"],
+            "due_date": (base + timedelta(days=rng.randint(-60, 60), hours=rng.randint(0, 9))).isoformat(),
+            "status": rng.choice(STATUSES),
+            "recurrence": rng.choice(RECURRENCE_RULES),
+            "is_template": False,
+            "notes": notes,
+        })
+        checklists.append([f"Item {j + 1}" for j in range(rng.randint(2, 6))])
+    result = repository.insert_tasks_bulk(client, task_rows, checklists)
+
+    history_rows = []
+    for i in range(int(size * history_ratio)):
+        task = rng.choice(result["created_rows"])
+        completed = base - timedelta(days=rng.randint(0, 180), minutes=rng.randint(0, 600))
+        history_rows.append({
+            "task_id": task["id"], "title": task["title"], "description": task["description"],
+            "specialty": task["specialty"], "technician_id": task["technician_id"], "location_id": task["location_id"],
+            "due_date": (completed - timedelta(hours=rng.randint(-24, 48))).isoformat(),
+            "completed_at": completed.isoformat(),
+            "checklist": [{"item": item, "is_completed": rng.random() < 0.8} for item in checklists[i % size]],
+            "recurrence": task["recurrence"], "created_from_template": False, "notes": task["notes"] or "",
+        })
+    for batch in repository.batched(history_rows, repository.INSERT_BATCH_SIZE):
+        client.table("task_history").insert(batch).execute()
+
+    return {
+        "technicians": {t["id"]: t for t in technicians},
+        "locations": {l["id"]: l["name"] for l in locations},
+        "tasks": result["created_rows"],
+        "history_range": ((base - timedelta(days=181)).isoformat(), (base + timedelta(days=1)).isoformat()),
+    }
+
+
+# ----------- Casos medidos -----------
+# Cada caso recebe (client, dataset, rng) e repete o que o app faz numa execução.
+def case_get_filtered_tasks(client, data, rng):
+    rows, _ = task_views.find_filtered_tasks(client, task_views.NO_FILTERS, BOARD_STATUSES, records.TASK_BOARD_COLUMNS)
+    return records.TaskRecord.from_rows(rows)
+
+
+def case_kanban_render(client, data, rng):
+    # Como no app: uma cópia local por processo, que a cada execução só busca o que mudou
+    store = data.setdefault("_task_store", task_store.TaskStore(client))
+    tasks = task_views.board_tasks(client, store, task_views.NO_FILTERS, BOARD_STATUSES)
+    groups = task_views.group_tasks_by_status(tasks)
+    expanded = [t["id"] for t in rng.sample(tasks, min(KANBAN_EXPANDED_CARDS, len(tasks)))]
+    checklist_index = repository.load_checklists_bulk(client, expanded)
+    cards = []
+    for status in ("scheduled", "overdue", "in_progress", "completed"):
+        for task in groups.get(status, []):
+            cards.append((task_views.kanban_card(task, data["technicians"], data["locations"]),
+                          checklist_index.get(task["id"], [])))
+    return cards
+
+
+def case_list_page(client, data, rng):
+    page = rng.randint(0, max(0, len(data["tasks"]) // 50 - 1))
+    return task_views.filtered_tasks_page(client, task_views.NO_FILTERS, BOARD_STATUSES, "due_date", False, page, 50)
+
+
+def case_calendar_month(client, data, rng):
+    month = datetime.now().date().replace(day=1)
+    return task_views.calendar_events(task_views.calendar_month(client, month, None, None))
+
+
+def case_create_recurring_task(client, data, rng):
+    roots = data.setdefault("_recurring_roots", [t for t in data["tasks"] if t.get("recurrence")])
+    if roots:
+        return recurrence.materialize_series(client, roots.pop())
+
+
+def case_delete_tasks_in_bulk(client, data, rng):
+    victims = data.setdefault("_deletable", [t["id"] for t in data["tasks"] if not t.get("recurrence")])
+    # Lotes menores nas bases pequenas, para que todas as repetições excluam algo
+    size = max(1, min(DELETE_BATCH, len(data["tasks"]) // (2 * data["repeat"])))
+    batch = [victims.pop() for _ in range(min(size, len(victims)))]
+    return repository.delete_tasks(client, batch)
+
+
+def case_generate_pdf(client, data, rng):
+    import pdf_reports  # ImportError sem fpdf2: o caso é ignorado
+    pdf_reports.report_cache.clear()  # mede a renderização, não o cache
+    task = repository.load_task(client, rng.choice(data["tasks"])["id"], records.TASK_DETAIL_COLUMNS)
+    if task is None:
+        return None
+    return task_views.task_report(
+        task, task_views.get_technician_name(task["technician_id"], data["technicians"]),
+        task_views.get_location_name(task["location_id"], data["locations"]), repository.load_checklist(client, task["id"])
+    )
+
+
+def case_history_page(client, data, rng):
+    start, end = data["history_range"]
+    page = repository.fetch_history_page(client, start, end, columns=records.HISTORY_HEADER_COLUMNS,
+                                         page_size=HISTORY_PAGE_SIZE + 1, desc=True)
+    opened = [row["id"] for row in page[:3]]
+    return page, repository.load_history_details(client, opened, records.HISTORY_DETAIL_COLUMNS)
+
+
+def case_history_scan(client, data, rng):
+    start, end = data["history_range"]
+    return sum(len(page) for page in repository.iter_history_pages(client, start, end))
+
+
+# Leituras primeiro; os casos que escrevem (recorrência, exclusão) alteram a base.
+CASES = {
+    "get_filtered_tasks": case_get_filtered_tasks,
+    "kanban_render": case_kanban_render,
+    "list_page": case_list_page,
+    "calendar_month": case_calendar_month,
+    "history_page": case_history_page,
+    "history_scan": case_history_scan,
+    "generate_pdf": case_generate_pdf,
+    "create_recurring_task": case_create_recurring_task,
+    "delete_tasks_in_bulk": case_delete_tasks_in_bulk,
+}
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(case, client, data, rng, repeat):
+    """Executa o caso `repeat` vezes e resume latências (ms) e chamadas por execução."""
+    timings = []
+    client.recorder.reset()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        case(client, data, rng)
+        timings.append((time.perf_counter() - started) * 1000)
+    counts = Counter(q.table for q in client.recorder.queries)
+    calls = {label: round(n / repeat, 2) for label, n in sorted(counts.items())}
+    return {
+        "p50_ms": round(percentile(timings, 50), 3),
+        "p90_ms": round(percentile(timings, 90), 3),
+        "p99_ms": round(percentile(timings, 99), 3),
+        "max_ms": round(max(timings), 3),
+        "calls": calls,
+        "calls_total": round(sum(calls.values()), 2),
+    }
+
+
+def run_size(size, repeat, seed, cases, workdir):
+    db_path = os.path.join(workdir, f"bench_{size}.sqlite3")
+    # Sem medir bytes: a serialização extra distorceria as latências
+    recorder = instrumentation.Recorder(measure_bytes=False)
+    client = instrumentation.instrument(LocalClient(db_path, os.path.join(workdir, f"storage_{size}")), recorder)
+    started = time.perf_counter()
+    data = seed_dataset(client, size, seed)
+    data["repeat"] = repeat
+    print(f"— {size} tarefas: base gerada em {time.perf_counter() - started:.1f}s", file=sys.stderr)
+    rng = random.Random(seed)
+    results = {}
+    for name in cases:
+        case_repeat = max(1, repeat // 10) if name == "history_scan" else repeat
+        try:
+            results[name] = measure(CASES[name], client, data, rng, case_repeat)
+        except ImportError as e:  # ex.: fpdf ausente para generate_pdf
+            results[name] = {"skipped": str(e)}
+        except Exception as e:
+            results[name] = {"failed": f"{type(e).__name__}: {e}"}
+        summary = results[name]
+        if "skipped" in summary:
+            print(f"  {name:24s} ignorado ({summary['skipped']})", file=sys.stderr)
+        elif "failed" in summary:
+            print(f"  {name:24s} FALHOU ({summary['failed']})", file=sys.stderr)
+        else:
+            print(f"  {name:24s} p50 {summary['p50_ms']:9.2f} ms  p90 {summary['p90_ms']:9.2f} ms  "
+                  f"p99 {summary['p99_ms']:9.2f} ms  chamadas {summary['calls_total']:g}", file=sys.stderr)
+    return results
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """Lista (tamanho, caso, motivo) das regressões em relação à linha de base."""
+    regressions = []
+    for size, cases in current["results"].items():
+        for name, now in cases.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if not before or "skipped" in now or "skipped" in before or "failed" in before:
+                continue
+            if "failed" in now:
+                regressions.append((size, name, f"falhou: {now['failed']}"))
+                continue
+            if before["p50_ms"] > 0 and now["p50_ms"] / before["p50_ms"] > threshold:
+                regressions.append((size, name, f"p50 {before['p50_ms']:.2f} → {now['p50_ms']:.2f} ms"))
+            if now["calls_total"] > before["calls_total"]:
+                regressions.append((size, name, f"chamadas {before['calls_total']:g} → {now['calls_total']:g}"))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do app com dados sintéticos no backend local.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Quantidades de tarefas (padrão: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Execuções por caso (padrão: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--output", help="Grava os resultados neste JSON (linha de base)")
+    parser.add_argument("--compare", help="JSON de linha de base para comparar")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="Fator de regressão do p50 (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    report = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "seed": args.seed,
+            "repeat": args.repeat,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory(prefix="manutencao_bench_") as workdir:
+        for size in args.sizes:
+            report["results"][str(size)] = run_size(size, args.repeat, args.seed, args.cases, workdir)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+    else:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        for size, name, reason in regressions:
+            print(f"⚠️ {size} tarefas / {name}: {reason}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+# bootstrap.py — Carga concorrente dos conjuntos de dados de uma tela, sem Streamlit
+#
+# A tela declara de antemão tudo o que vai ler ({nome: função sem argumentos}) e
+# fetch() dispara as consultas ao mesmo tempo num pool de threads do processo: o
+# tempo da carga passa a ser o da consulta mais lenta, não a soma de todas. As
+# consultas são quase só espera de rede, então threads bastam (o client é
+# compartilhado e thread-safe — ver supabase_client.py).
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+BOOTSTRAP_WORKERS = int(os.getenv("BOOTSTRAP_WORKERS", "16"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Pool compartilhado por todas as sessões do processo."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=BOOTSTRAP_WORKERS, thread_name_prefix="bootstrap")
+    return _executor
+
+
+def fetch(loaders, wrap=None):
+    """Executa {nome: função} em paralelo e devolve {nome: resultado}.
+
+    wrap(função), se informado, adapta cada função antes de ir para o pool (ex.:
+    anexar o contexto da execução do Streamlit). Se alguma carga falhar, a exceção
+    da primeira (na ordem declarada) é propagada depois que todas terminarem.
+    """
+    futures = {name: get_executor().submit(wrap(fn) if wrap else fn) for name, fn in loaders.items()}
+    errors = [f.exception() for f in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,405 @@
+# importer.py — Importação de tarefas (com checklist) a partir de CSV ou XLSX
+#
+# O arquivo é lido linha a linha (csv.reader / openpyxl em modo read_only), cada
+# linha é validada contra índices em memória de técnicos, localidades e
+# especialidades, e as tarefas válidas são gravadas em lotes de tamanho fixo. As
+# linhas inválidas vão para um relatório de erros em CSV.
+#
+# Retomada: o arquivo é identificado pelo sha256 do conteúdo e import_runs guarda a
+# primeira linha ainda não gravada, atualizada a cada lote confirmado. Os ids das
+# tarefas e dos itens derivam do arquivo e da linha (uuid5) e são gravados com
+# "on conflict do nothing": regravar o lote que estava em andamento quando a
+# execução caiu (ou o arquivo inteiro, com --restart) não duplica nada nem desfaz
+# o que já foi alterado nas tarefas (status, observações, checklist...). Só as
+# linhas que não estão no banco são gravadas (ex.: tarefas excluídas depois da
+# primeira importação); as demais são contadas como já existentes.
+#
+# Colunas (cabeçalho em português ou inglês; maiúsculas e acentos são ignorados):
+#     titulo*, descricao, especialidade*, tecnico (nome ou id), localidade* (nome ou id),
+#     data* (AAAA-MM-DD [HH:MM] ou DD/MM/AAAA [HH:MM]), recorrencia (nenhuma, diaria,
+#     semanal, mensal), intervalo, fim_recorrencia, observacoes,
+#     checklist (itens separados por "|" ou quebra de linha)
+#
+# Uso em linha de comando:
+#     python importer.py tarefas.xlsx
+#     python importer.py tarefas.csv --batch-size 200 --errors erros.csv
+#     python importer.py tarefas.csv --restart    # ignora o progresso salvo
+import argparse
+import csv
+import hashlib
+import io
+import itertools
+import os
+import unicodedata
+import uuid
+from collections import namedtuple
+from datetime import date, datetime, time, timezone
+
+import bootstrap
+import recurrence
+import repository
+
+IMPORT_BATCH_SIZE = 200
+DEFAULT_DUE_TIME = time(8, 0)  # datas informadas sem hora
+ID_NAMESPACE = uuid.UUID("a3ef846e-82fc-4017-a794-77485a1fcfd9")
+
+# Campo → nomes aceitos no cabeçalho (já normalizados); o primeiro aparece nas mensagens
+COLUMN_ALIASES = {
+    "title": ("titulo", "title"),
+    "description": ("descricao", "description"),
+    "specialty": ("especialidade", "specialty"),
+    "technician": ("tecnico", "technician", "technician_id"),
+    "location": ("localidade", "local", "location", "location_id"),
+    "due_date": ("data", "data_agendamento", "vencimento", "due_date"),
+    "recurrence": ("recorrencia", "recurrence"),
+    "recurrence_interval": ("intervalo", "recurrence_interval"),
+    "recurrence_end": ("fim_recorrencia", "recurrence_end"),
+    "notes": ("observacoes", "notes"),
+    "checklist": ("checklist",),
+}
+REQUIRED_COLUMNS = ("title", "specialty", "location", "due_date")
+RECURRENCE_VALUES = {
+    "": None, "nenhuma": None, "none": None,
+    "diaria": "daily", "daily": "daily",
+    "semanal": "weekly", "weekly": "weekly",
+    "mensal": "monthly", "monthly": "monthly",
+}
+DATE_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+CHECKLIST_SEPARATOR = "|"
+
+Lookups = namedtuple("Lookups", "technicians locations specialties")
+AMBIGUOUS = object()  # mais de um cadastro com o mesmo nome
+
+
+def normalize(text):
+    """Minúsculas, sem acentos e com espaços simples (chave dos índices e do cabeçalho)."""
+    text = unicodedata.normalize("NFKD", str(text or ""))
+    return " ".join("".join(c for c in text if not unicodedata.combining(c)).casefold().split())
+
+
+# ----------- Leitura do arquivo -----------
+def _cell(value):
+    """Célula do XLSX como texto (datas em ISO, inteiros sem ".0")."""
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _records(stream, filename):
+    """Linhas do arquivo como listas de texto; a primeira é o cabeçalho."""
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ImportError("⚠️ Instale openpyxl para importar arquivos XLSX (pip install openpyxl)")
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        try:
+            for values in workbook.worksheets[0].iter_rows(values_only=True):
+                yield [_cell(v) for v in values]
+        finally:
+            workbook.close()
+    elif extension == ".csv":
+        text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+        try:
+            # Planilhas exportadas em português costumam usar ";" como separador
+            first = text.readline()
+            delimiter = ";" if first.count(";") > first.count(",") else ","
+            yield from csv.reader(itertools.chain([first], text), delimiter=delimiter)
+        finally:
+            text.detach()  # o stream continua do chamador
+    else:
+        raise ValueError(f"Formato não suportado: {extension or filename} (use .csv ou .xlsx)")
+
+
+def read_rows(stream, filename):
+    """(linha, {coluna original: texto}, {campo: texto}) de cada linha de dados não vazia.
+
+    A linha é numerada como na planilha (cabeçalho = 1). Levanta ValueError se
+    faltar alguma coluna obrigatória.
+    """
+    records = _records(stream, filename)
+    header = [h.strip() for h in next(records, [])]
+    columns = {}
+    for i, name in enumerate(header):
+        key = normalize(name).replace(" ", "_")
+        field = next((f for f, aliases in COLUMN_ALIASES.items() if key in aliases), None)
+        if field:
+            columns.setdefault(field, i)
+    missing = [COLUMN_ALIASES[f][0] for f in REQUIRED_COLUMNS if f not in columns]
+    if missing:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(missing)}")
+
+    for number, values in enumerate(records, start=2):
+        if not any(v.strip() for v in values):
+            continue
+        values = list(values) + [""] * (len(header) - len(values))
+        yield number, dict(zip(header, values)), {f: values[i].strip() for f, i in columns.items()}
+
+
+# ----------- Validação -----------
+def _index(rows):
+    """Id e nome normalizado → id; nomes repetidos ficam marcados como ambíguos."""
+    index = {}
+    for row in rows:
+        row_id = str(row["id"])
+        index[row_id] = row_id
+        name = normalize(row.get("name"))
+        if name:
+            index[name] = AMBIGUOUS if index.get(name, row_id) != row_id else row_id
+    return index
+
+
+def build_lookups(client):
+    """Índices em memória dos cadastros, carregados em paralelo (uma consulta cada)."""
+    data = bootstrap.fetch({
+        "technicians": lambda: repository.load_technicians(client),
+        "locations": lambda: repository.load_locations(client),
+        "specialties": lambda: repository.load_specialties(client),
+    })
+    return Lookups(
+        technicians=_index(data["technicians"]),
+        locations=_index(data["locations"]),
+        specialties={normalize(s): s for s in data["specialties"]},
+    )
+
+
+def _resolve(index, value, label, errors):
+    if not value:
+        return None
+    found = index.get(value, index.get(normalize(value)))
+    if found is AMBIGUOUS:
+        errors.append(f"{label} com nome repetido no cadastro, use o id: {value}")
+    elif found is None:
+        errors.append(f"{label} sem cadastro: {value}")
+    return found if isinstance(found, str) else None
+
+
+def parse_date(text):
+    """datetime de AAAA-MM-DD[ HH:MM] (ISO) ou DD/MM/AAAA[ HH:MM]; sem hora, DEFAULT_DUE_TIME."""
+    try:
+        value = datetime.fromisoformat(text)
+        has_time = len(text) > 10
+    except ValueError:
+        for fmt in DATE_FORMATS:
+            try:
+                value = datetime.strptime(text, fmt)
+                has_time = "%H" in fmt
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"data inválida: {text}")
+    return value if has_time else datetime.combine(value.date(), DEFAULT_DUE_TIME)
+
+
+def validate(fields, lookups):
+    """Converte uma linha em (linha de maintenance_tasks, itens do checklist).
+
+    Levanta ValueError com todos os problemas da linha, separados por "; ".
+    """
+    errors = []
+    title = fields.get("title", "")
+    if not title:
+        errors.append("título vazio")
+    specialty = lookups.specialties.get(normalize(fields.get("specialty")))
+    if not specialty:
+        errors.append(f"especialidade sem cadastro: {fields.get('specialty') or '—'}")
+    if not fields.get("location"):
+        errors.append("localidade vazia")
+    location_id = _resolve(lookups.locations, fields.get("location"), "localidade", errors)
+    technician_id = _resolve(lookups.technicians, fields.get("technician"), "técnico", errors)
+
+    due = recurrence_end = None
+    if not fields.get("due_date"):
+        errors.append("data vazia")
+    try:
+        due = parse_date(fields["due_date"]) if fields.get("due_date") else None
+    except ValueError as e:
+        errors.append(str(e))
+    try:
+        if fields.get("recurrence_end"):
+            recurrence_end = datetime.combine(parse_date(fields["recurrence_end"]).date(), datetime.max.time())
+    except ValueError as e:
+        errors.append(f"fim da recorrência: {e}")
+
+    rule = RECURRENCE_VALUES.get(normalize(fields.get("recurrence")), "?")
+    if rule == "?":
+        errors.append(f"recorrência inválida: {fields['recurrence']}")
+    interval = 1
+    if fields.get("recurrence_interval"):
+        try:
+            interval = int(float(fields["recurrence_interval"].replace(",", ".")))
+        except ValueError:
+            interval = 0
+        if interval < 1:
+            errors.append(f"intervalo inválido: {fields['recurrence_interval']}")
+
+    if errors:
+        raise ValueError("; ".join(errors))
+    items = [item.strip() for line in fields.get("checklist", "").splitlines()
+             for item in line.split(CHECKLIST_SEPARATOR) if item.strip()]
+    return {
+        "title": title,
+        "description": fields.get("description") or None,
+        "specialty": specialty,
+        "technician_id": technician_id,
+        "location_id": location_id,
+        "due_date": due.isoformat(),
+        "recurrence": rule,
+        "recurrence_interval": interval,
+        "recurrence_end": recurrence_end.isoformat() if recurrence_end else None,
+        "status": "scheduled",  # overdue_sweeper marca os atrasos
+        "is_template": False,
+        "notes": fields.get("notes") or None,
+    }, items
+
+
+# ----------- Importação -----------
+def file_digest(stream, chunk_size=1 << 20):
+    """sha256 do conteúdo (identifica o arquivo para a retomada); volta ao início do stream."""
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def row_id(run_id, number):
+    """Id estável da tarefa da linha `number` do arquivo `run_id`."""
+    return str(uuid.uuid5(ID_NAMESPACE, f"{run_id}:{number}"))
+
+
+def _write_batch(client, run_id, batch, lookups):
+    """Valida e grava um lote; devolve (tarefas inseridas, já existentes, [(linha, valores, erro)])."""
+    tasks, checklist_rows, errors = [], [], []
+    for number, raw, fields in batch:
+        try:
+            task, items = validate(fields, lookups)
+        except ValueError as e:
+            errors.append((number, raw, str(e)))
+            continue
+        task["id"] = row_id(run_id, number)
+        tasks.append(task)
+        checklist_rows.extend({"id": str(uuid.uuid5(ID_NAMESPACE, f"{task['id']}:{i}")), "task_id": task["id"],
+                               "item": item, "is_completed": False} for i, item in enumerate(items))
+    created = repository.upsert_tasks_batch(client, tasks, checklist_rows)
+    recurring = [t["id"] for t in tasks if t["recurrence"]]
+    if recurring:
+        # Séries como estão no banco: numa regravação, valem as alterações feitas
+        # desde a primeira gravação. Idempotente: ocorrências existentes não se repetem.
+        roots = repository.load_tasks(client, recurring, recurrence.SERIES_COLUMNS + ", recurrence_parent_id")
+        recurrence.materialize(client, roots)
+    return len(created), len(tasks) - len(created), errors
+
+
+def import_tasks(client, stream, filename, batch_size=IMPORT_BATCH_SIZE, restart=False, on_error=None, progress=None):
+    """Importa as tarefas do arquivo em lotes de `batch_size` linhas e devolve o resumo.
+
+    Continua da primeira linha ainda não gravada numa execução anterior do mesmo
+    arquivo (restart=True recomeça do início). on_error(linha, valores originais,
+    erro) recebe as linhas inválidas de cada lote depois que ele é confirmado;
+    progress(resumo) é chamado a cada lote. Resumo: run_id, skipped (já gravadas
+    antes), read, created (tarefas inseridas), existing (válidas, mas já no banco),
+    failed, batches, next_row e already_imported.
+    """
+    run_id = file_digest(stream)
+    run = None if restart else repository.load_import_run(client, run_id)
+    if run is None:
+        run = {"id": run_id, "file_name": os.path.basename(filename), "next_row": 0,
+               "created": 0, "existing": 0, "failed": 0, "finished_at": None}
+    summary = {"run_id": run_id, "skipped": 0, "read": 0, "created": 0, "existing": 0, "failed": 0, "batches": 0,
+               "next_row": run["next_row"], "already_imported": bool(run["finished_at"])}
+    if run["finished_at"]:
+        return summary
+
+    lookups = build_lookups(client)
+
+    def commit(batch, next_row):
+        created, existing, errors = _write_batch(client, run_id, batch, lookups)
+        run.update(next_row=next_row, created=run["created"] + created, existing=run.get("existing", 0) + existing,
+                   failed=run["failed"] + len(errors), updated_at=datetime.now(timezone.utc).isoformat())
+        repository.save_import_run(client, run)
+        summary.update(created=summary["created"] + created, existing=summary["existing"] + existing,
+                       failed=summary["failed"] + len(errors), batches=summary["batches"] + 1, next_row=next_row)
+        if on_error:
+            for error in errors:
+                on_error(*error)
+        if progress:
+            progress(summary)
+
+    batch = []
+    for number, raw, fields in read_rows(stream, filename):
+        if number < run["next_row"]:
+            summary["skipped"] += 1
+            continue
+        batch.append((number, raw, fields))
+        summary["read"] += 1
+        if len(batch) >= batch_size:
+            commit(batch, number + 1)
+            batch = []
+    if batch:
+        commit(batch, batch[-1][0] + 1)
+
+    run.update(finished_at=datetime.now(timezone.utc).isoformat(), updated_at=datetime.now(timezone.utc).isoformat())
+    repository.save_import_run(client, run)
+    return summary
+
+
+def error_report_writer(stream, header=True):
+    """on_error para import_tasks que grava o relatório CSV: linha, erro e as colunas originais."""
+    writer = None
+
+    def write(number, raw, message):
+        nonlocal writer
+        if writer is None:
+            writer = csv.DictWriter(stream, fieldnames=["linha", "erro", *raw])
+            if header:
+                writer.writeheader()
+        writer.writerow({"linha": number, "erro": message, **raw})
+    return write
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa tarefas (com checklist) de um arquivo CSV ou XLSX.")
+    parser.add_argument("file", help="Arquivo .csv ou .xlsx")
+    parser.add_argument("--batch-size", type=int, default=IMPORT_BATCH_SIZE, help="Linhas por lote gravado")
+    parser.add_argument("--errors", help="Relatório das linhas inválidas (padrão: <arquivo>.erros.csv)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Ignora o progresso salvo e relê o arquivo desde o início; só grava as linhas que não estão no banco")
+    args = parser.parse_args()
+
+    errors_path = args.errors or os.path.splitext(args.file)[0] + ".erros.csv"
+    # Ao retomar, os erros dos lotes novos são acrescentados ao relatório existente
+    append = not args.restart and os.path.exists(errors_path) and os.path.getsize(errors_path) > 0
+    client = repository.get_client()
+    with open(args.file, "rb") as stream, open(errors_path, "a" if append else "w", newline="", encoding="utf-8-sig") as report:
+        try:
+            summary = import_tasks(
+                client, stream, args.file, args.batch_size, args.restart,
+                on_error=error_report_writer(report, header=not append),
+                progress=lambda s: print(f"Lote {s['batches']}: até a linha {s['next_row'] - 1} — "
+                                         f"{s['created']} tarefa(s) criada(s), {s['failed']} linha(s) com erro"),
+            )
+        except Exception as e:
+            raise SystemExit(f"Importação interrompida: {e}\nRode o mesmo comando para retomar do último lote gravado.")
+
+    if summary["already_imported"]:
+        print("Este arquivo já foi importado por completo (use --restart para regravar as linhas que não estão mais no banco).")
+    else:
+        if summary["skipped"]:
+            print(f"Retomado: {summary['skipped']} linha(s) já gravadas numa execução anterior.")
+        print(f"Concluído: {summary['created']} tarefa(s) criada(s), {summary['existing']} já existente(s), "
+              f"{summary['failed']} linha(s) com erro.")
+    if os.path.getsize(errors_path) == 0:
+        os.remove(errors_path)
+    elif summary["failed"]:
+        print(f"Relatório de erros: {errors_path}")
+
+
+if __name__ == "__main__":
+    main()
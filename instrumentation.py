@@ -0,0 +1,245 @@
+# instrumentation.py — Registro de consultas e tempos por execução, sem Streamlit
+#
+# instrument(client, recorder) devolve um client com a mesma API cujas consultas
+# (table, rpc e storage) são registradas no Recorder com tabela, formato do filtro
+# (colunas e operadores, sem valores), linhas, bytes da resposta e tempo. O Recorder
+# também cronometra seções (renderização, PDFs) e aponta padrões N+1 — a mesma
+# consulta repetida várias vezes numa execução.
+#
+# Os totais do processo ficam em contadores exportáveis no formato OpenMetrics
+# (openmetrics()); com MANUTENCAO_QUERY_LOG=1 cada execução também gera logs JSON.
+import json
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict, namedtuple
+from contextlib import contextmanager
+
+LOG_ENABLED = os.getenv("MANUTENCAO_QUERY_LOG", "0") == "1"
+NPLUS1_THRESHOLD = int(os.getenv("NPLUS1_THRESHOLD", "3"))
+
+logger = logging.getLogger("manutencao.queries")
+
+ACTIONS = ("select", "insert", "upsert", "update", "delete")
+QueryEvent = namedtuple("QueryEvent", "table action shape rows bytes ms")
+TimingEvent = namedtuple("TimingEvent", "name ms")
+
+
+# ----------- Contadores do processo (OpenMetrics) -----------
+_metrics_lock = threading.Lock()
+_query_metrics = defaultdict(Counter)  # (table, action) → requests/rows/bytes/seconds
+_section_metrics = defaultdict(Counter)  # seção → count/seconds
+_nplus1_metrics = Counter()  # tabela → execuções com padrão N+1
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def openmetrics():
+    """Contadores acumulados do processo no formato de exposição OpenMetrics."""
+    lines = []
+    with _metrics_lock:
+        for metric, field, help_text in (
+            ("manutencao_backend_requests", "requests", "Requisições ao backend"),
+            ("manutencao_backend_rows", "rows", "Linhas devolvidas pelo backend"),
+            ("manutencao_backend_bytes", "bytes", "Bytes (JSON) devolvidos pelo backend"),
+            ("manutencao_backend_seconds", "seconds", "Tempo de espera pelo backend"),
+        ):
+            lines += [f"# TYPE {metric} counter", f"# HELP {metric} {help_text}."]
+            for (table, action), values in sorted(_query_metrics.items()):
+                lines.append(f'{metric}_total{{table="{_label(table)}",action="{action}"}} {values[field]:g}')
+        lines += ["# TYPE manutencao_section_seconds counter", "# HELP manutencao_section_seconds Tempo por seção."]
+        for name, values in sorted(_section_metrics.items()):
+            lines.append(f'manutencao_section_seconds_total{{section="{_label(name)}"}} {values["seconds"]:g}')
+        lines += ["# TYPE manutencao_nplus1 counter", "# HELP manutencao_nplus1 Execuções com consultas repetidas."]
+        for table, count in sorted(_nplus1_metrics.items()):
+            lines.append(f'manutencao_nplus1_total{{table="{_label(table)}"}} {count}')
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
+
+
+# ----------- Registro por execução -----------
+class Recorder:
+    """Consultas e tempos de uma execução do script (thread-safe)."""
+
+    def __init__(self, measure_bytes=True):
+        self.measure_bytes = measure_bytes
+        self.queries = []
+        self.timings = []
+        self._lock = threading.Lock()
+        self._section = None
+        self.started = time.perf_counter()
+
+    def record_query(self, event):
+        with self._lock:
+            self.queries.append(event)
+        with _metrics_lock:
+            values = _query_metrics[(event.table, event.action)]
+            values["requests"] += 1
+            values["rows"] += event.rows
+            values["bytes"] += event.bytes
+            values["seconds"] += event.ms / 1000
+
+    def record_timing(self, name, ms):
+        with self._lock:
+            self.timings.append(TimingEvent(name, ms))
+        with _metrics_lock:
+            _section_metrics[name]["count"] += 1
+            _section_metrics[name]["seconds"] += ms / 1000
+
+    @contextmanager
+    def timer(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_timing(name, (time.perf_counter() - started) * 1000)
+
+    def section(self, name):
+        """Encerra a seção corrente e inicia `name` (fases sequenciais do script)."""
+        now = time.perf_counter()
+        if self._section:
+            self.record_timing(self._section[0], (now - self._section[1]) * 1000)
+        self._section = (name, now) if name else None
+
+    def finish(self):
+        """Fecha a última seção, contabiliza os padrões N+1 e devolve a duração total (ms)."""
+        self.section(None)
+        with _metrics_lock:
+            for table in {table for table, _, _ in self.nplus1()}:
+                _nplus1_metrics[table] += 1
+        return (time.perf_counter() - self.started) * 1000
+
+    def reset(self):
+        with self._lock:
+            self.queries.clear()
+            self.timings.clear()
+        self._section = None
+        self.started = time.perf_counter()
+
+    def nplus1(self, threshold=NPLUS1_THRESHOLD):
+        """[(tabela, formato, vezes)] das consultas idênticas (sem valores) repetidas."""
+        with self._lock:
+            shapes = Counter((q.table, q.shape) for q in self.queries if q.action == "select")
+        return [(table, shape, n) for (table, shape), n in shapes.most_common() if n >= threshold]
+
+    def by_table(self):
+        """Totais por tabela: {tabela: {"requests", "rows", "bytes", "ms"}}."""
+        totals = defaultdict(Counter)
+        with self._lock:
+            for q in self.queries:
+                totals[q.table].update({"requests": 1, "rows": q.rows, "bytes": q.bytes, "ms": q.ms})
+        return {table: dict(values) for table, values in sorted(totals.items(), key=lambda kv: -kv[1]["ms"])}
+
+    def log(self, total_ms=None, **context):
+        """Emite as consultas, os tempos e o resumo da execução como linhas JSON."""
+        for q in self.queries:
+            logger.info(json.dumps({"event": "query", **q._asdict(), **context}, ensure_ascii=False))
+        for t in self.timings:
+            logger.info(json.dumps({"event": "timing", **t._asdict(), **context}, ensure_ascii=False))
+        for table, shape, n in self.nplus1():
+            logger.warning(json.dumps({"event": "nplus1", "table": table, "shape": shape, "count": n, **context}, ensure_ascii=False))
+        logger.info(json.dumps({
+            "event": "rerun", "queries": len(self.queries), "total_ms": total_ms,
+            "query_ms": round(sum(q.ms for q in self.queries), 3), **context,
+        }, ensure_ascii=False))
+
+
+# ----------- Client instrumentado -----------
+def _describe(name, args, kwargs):
+    """Passo do construtor de consulta sem os valores: eq(status), in(id), order(due_date)..."""
+    if name in ACTIONS:
+        return name
+    if name in ("order", "limit", "range", "single", "maybe_single"):
+        return f"{name}({args[0]})" if name == "order" and args else name
+    if name == "or_":
+        return "or"
+    column = args[0] if args else kwargs.get("column", "")
+    return f"{name.rstrip('_')}({column})"
+
+
+def _size(data, measure_bytes):
+    rows = len(data) if isinstance(data, list) else (1 if data else 0)
+    if not measure_bytes or data is None:
+        return rows, 0
+    return rows, len(json.dumps(data, default=str, ensure_ascii=False).encode("utf-8"))
+
+
+class _InstrumentedQuery:
+    def __init__(self, recorder, table, inner, steps=()):
+        self._recorder = recorder
+        self._table = table
+        self._inner = inner
+        self._steps = steps
+
+    def execute(self):
+        started = time.perf_counter()
+        res = self._inner.execute()
+        ms = (time.perf_counter() - started) * 1000
+        rows, size = _size(getattr(res, "data", None), self._recorder.measure_bytes)
+        action = next((s for s in self._steps if s in ACTIONS), "rpc" if self._table.startswith("rpc:") else "select")
+        shape = " ".join(s for s in self._steps if s not in ACTIONS)
+        self._recorder.record_query(QueryEvent(self._table, action, shape, rows, size, round(ms, 3)))
+        return res
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            # ex.: .not_ no postgrest-py é uma propriedade que devolve o construtor
+            return _InstrumentedQuery(self._recorder, self._table, attr, self._steps + (name,)) if hasattr(attr, "execute") else attr
+
+        def chained(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            return _InstrumentedQuery(self._recorder, self._table, result, self._steps + (_describe(name, args, kwargs),))
+        return chained
+
+
+class _InstrumentedBucket:
+    def __init__(self, recorder, bucket, inner):
+        self._recorder = recorder
+        self._bucket = bucket
+        self._inner = inner
+
+    def __getattr__(self, name):
+        attr = getattr(self._inner, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            started = time.perf_counter()
+            result = attr(*args, **kwargs)
+            ms = (time.perf_counter() - started) * 1000
+            rows, size = _size(result if isinstance(result, list) else None, self._recorder.measure_bytes)
+            self._recorder.record_query(QueryEvent(f"storage:{self._bucket}", name, "", rows, size, round(ms, 3)))
+            return result
+        return call
+
+
+class _InstrumentedStorage:
+    def __init__(self, recorder, inner):
+        self._recorder = recorder
+        self._inner = inner
+
+    def from_(self, bucket):
+        return _InstrumentedBucket(self._recorder, bucket, self._inner.from_(bucket))
+
+
+class InstrumentedClient:
+    """Mesma API do client (table, rpc, storage), registrando cada requisição no Recorder."""
+
+    def __init__(self, client, recorder):
+        self.client = client
+        self.recorder = recorder
+        self.storage = _InstrumentedStorage(recorder, client.storage)
+
+    def table(self, name):
+        return _InstrumentedQuery(self.recorder, name, self.client.table(name))
+
+    def rpc(self, name, params=None):
+        return _InstrumentedQuery(self.recorder, f"rpc:{name}", self.client.rpc(name, params or {}))
+
+
+def instrument(client, recorder):
+    return InstrumentedClient(client, recorder)
@@ -0,0 +1,127 @@
+# kpi.py — Indicadores de manutenção pré-calculados a partir de task_history
+#
+# Cada conclusão arquivada soma um delta à linha diária de kpi_daily da sua
+# combinação (dia, técnico, localidade, especialidade), via a função
+# kpi_apply_deltas. O painel lê apenas esses resumos.
+#
+# Reconstrução a partir do histórico existente, em blocos:
+#     python kpi.py backfill --start 2025-01-01 --end 2026-12-31 --chunk 5000
+import argparse
+from collections import defaultdict
+from datetime import date, timedelta, timezone
+
+import repository
+from recurrence import parse_datetime
+
+DIMENSIONS = ("technician_id", "location_id", "specialty")
+COUNTERS = ("completed", "on_time", "lateness_seconds", "checklist_items", "checklist_done")
+HISTORY_COLUMNS = "id, completed_at, due_date, technician_id, location_id, specialty, checklist"
+BACKFILL_CHUNK_SIZE = 5000
+SUMMARY_PAGE_SIZE = 1000  # limite padrão de linhas por resposta do PostgREST
+
+
+def _as_utc(value):
+    dt = parse_datetime(value)
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt
+
+
+def summarize(history_rows):
+    """Agrega registros de task_history em deltas por (dia, técnico, localidade, especialidade)."""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in history_rows:
+        completed_at = _as_utc(row["completed_at"])
+        lateness = (completed_at - _as_utc(row["due_date"])).total_seconds()
+        checklist = row.get("checklist") or []
+        key = (completed_at.date().isoformat(),) + tuple(str(row.get(d) or "") for d in DIMENSIONS)
+        t = totals[key]
+        t["completed"] += 1
+        t["on_time"] += lateness <= 0
+        t["lateness_seconds"] += int(max(0, lateness))
+        t["checklist_items"] += len(checklist)
+        t["checklist_done"] += sum(1 for i in checklist if i.get("is_completed"))
+    return [{"day": key[0], **dict(zip(DIMENSIONS, key[1:])), **counters} for key, counters in totals.items()]
+
+
+def record(client, history_rows):
+    """Soma os registros recém-arquivados aos resumos diários."""
+    deltas = summarize(history_rows)
+    if deltas:
+        client.rpc("kpi_apply_deltas", {"deltas": deltas}).execute()
+    return len(deltas)
+
+
+def backfill(client, start, end, chunk_size=BACKFILL_CHUNK_SIZE, progress=None):
+    """Reconstrói kpi_daily para [start, end] a partir de task_history, em blocos.
+
+    Os resumos do intervalo são apagados e o histórico é relido página a página;
+    cada bloco vira um único kpi_apply_deltas.
+    """
+    client.table("kpi_daily").delete().gte("day", start.isoformat()).lte("day", end.isoformat()).execute()
+    processed = 0
+    for page in repository.iter_history_pages(
+        client, start.isoformat(), (end + timedelta(days=1)).isoformat(),
+        columns=HISTORY_COLUMNS, page_size=chunk_size
+    ):
+        record(client, page)
+        processed += len(page)
+        if progress:
+            progress(processed)
+    return processed
+
+
+def load_summaries(client, start, end):
+    """Resumos diários do período, paginados em ordem de chave primária.
+
+    Há uma linha por dia × técnico × localidade × especialidade, então um mês
+    ultrapassa facilmente o limite de linhas por resposta do PostgREST.
+    """
+    rows = []
+    while True:
+        page = client.table("kpi_daily").select("*")\
+            .gte("day", start.isoformat())\
+            .lte("day", end.isoformat())\
+            .order("day").order("technician_id").order("location_id").order("specialty")\
+            .range(len(rows), len(rows) + SUMMARY_PAGE_SIZE - 1)\
+            .execute().data or []
+        rows.extend(page)
+        if len(page) < SUMMARY_PAGE_SIZE:
+            return rows
+
+
+def aggregate(summaries, dimension):
+    """KPIs por valor da dimensão: conclusões, % no prazo, atraso médio (h), % checklist."""
+    totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+    for row in summaries:
+        t = totals[row[dimension]]
+        for c in COUNTERS:
+            t[c] += row[c]
+    result = []
+    for key, t in totals.items():
+        result.append({
+            dimension: key,
+            "completed": t["completed"],
+            "on_time_rate": t["on_time"] / t["completed"] if t["completed"] else None,
+            "mean_lateness_hours": t["lateness_seconds"] / t["completed"] / 3600 if t["completed"] else None,
+            "checklist_ratio": t["checklist_done"] / t["checklist_items"] if t["checklist_items"] else None,
+        })
+    return sorted(result, key=lambda r: -r["completed"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Indicadores de manutenção (kpi_daily).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    bf = sub.add_parser("backfill", help="Reconstrói os resumos a partir de task_history")
+    bf.add_argument("--start", type=date.fromisoformat, default=date(2000, 1, 1))
+    bf.add_argument("--end", type=date.fromisoformat, default=date.today())
+    bf.add_argument("--chunk", type=int, default=BACKFILL_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    processed = backfill(
+        repository.get_client(), args.start, args.end, args.chunk,
+        progress=lambda n: print(f"{n} registro(s) processado(s)...")
+    )
+    print(f"Concluído: {processed} registro(s) de histórico resumidos.")
+
+
+if __name__ == "__main__":
+    main()
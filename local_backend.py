@@ -0,0 +1,631 @@
+# local_backend.py — Backend local (SQLite + sistema de arquivos) com a API do client Supabase
+#
+# Implementa o subconjunto do supabase-py usado pelo app — table().select/insert/
+# update/upsert/delete com eq, neq, in_, gt/gte/lt/lte, is_, or_, order, limit e
+# range; rpc(); storage.from_() — com a mesma semântica de consulta. Permite rodar o
+# app, os jobs e os benchmarks sem rede:
+#     MANUTENCAO_BACKEND=sqlite streamlit run app.py
+#
+# Cada tabela é guardada como documentos JSON (coluna `data`) com índices de
+# expressão nas colunas filtradas com frequência. Os arquivos do storage ficam em
+# <LOCAL_STORAGE_DIR>/<bucket>/<caminho>.
+#
+# As tabelas com busca textual (SEARCH_COLUMNS) têm um índice invertido FTS5
+# (<tabela>_search), sem acentos, mantido por gatilhos — o equivalente local do
+# search_vector/GIN do Postgres, consultado pela RPC search_tasks.
+#
+# client.changes é um feed de mudanças em memória, no formato dos eventos do
+# Supabase Realtime (INSERT/UPDATE/DELETE com new/old), publicado após cada commit.
+import json
+import mimetypes
+import os
+import re
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+TABLE_KEYS = {
+    "job_state": ("name",),
+    "kpi_daily": ("day", "technician_id", "location_id", "specialty"),
+    "task_tombstones": ("task_id",),
+}
+
+INDEXED_COLUMNS = {
+    "maintenance_tasks": ("status", "due_date", "location_id", "specialty", "recurrence_parent_id", "created_at", "updated_at"),
+    "checklists": ("task_id",),
+    "task_history": ("completed_at", "id"),
+    "kpi_daily": ("day",),
+    "task_tombstones": ("deleted_at",),
+}
+
+# Colunas da busca textual e seus pesos no bm25 (como setweight A/B/C/D no Postgres)
+SEARCH_COLUMNS = {
+    "maintenance_tasks": ("title", "description", "notes"),
+    "task_history": ("title", "description", "notes", "checklist"),
+}
+SEARCH_WEIGHTS = {"title": 10.0, "description": 4.0, "notes": 2.0, "checklist": 1.0}
+# Linhas que ficam fora do índice (modelos não aparecem na busca)
+SEARCH_EXCLUDE = {"maintenance_tasks": "coalesce(json_extract({source}, '$.is_template'), 0)"}
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _task_defaults():
+    return {"recurrence_interval": 1, "recurrence_end": None, "recurrence_parent_id": None,
+            "is_template": False, "notes": None, "created_at": _now()}
+
+
+TABLE_DEFAULTS = {
+    "maintenance_tasks": _task_defaults,
+    "checklists": lambda: {"is_completed": False},
+    "kpi_daily": lambda: {"technician_id": "", "location_id": "", "specialty": "", "completed": 0, "on_time": 0,
+                          "lateness_seconds": 0, "checklist_items": 0, "checklist_done": 0},
+}
+
+
+def _derive_columns(table, row):
+    """Colunas geradas ou mantidas por gatilho no Postgres (ver supabase/migrations)."""
+    if table == "maintenance_tasks":
+        row["notes_preview"] = row["notes"][:50] if row.get("notes") else None
+        row["updated_at"] = _now()
+    return row
+
+
+class LocalAPIError(Exception):
+    """Erro no formato do postgrest (atributo `code`)."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+
+
+class LocalResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+_IDENT = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def _field(column):
+    if not _IDENT.match(column):
+        raise LocalAPIError(f"Coluna inválida: {column}", code="42703")
+    return f"json_extract(data, '$.{column}')"
+
+
+def _search_text(column, source):
+    """Texto indexado de uma coluna; do checklist, só os itens."""
+    if column == "checklist":
+        return f"(SELECT group_concat(json_extract(value, '$.item'), ' ') FROM json_each({source}, '$.checklist'))"
+    return f"json_extract({source}, '$.{column}')"
+
+
+def _sql_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _split_top_level(text):
+    """Divide por vírgulas fora de parênteses e aspas (sintaxe de filtros do PostgREST)."""
+    parts, depth, quoted, current = [], 0, False, ""
+    for ch in text:
+        if ch == '"':
+            quoted = not quoted
+        elif not quoted and ch == "(":
+            depth += 1
+        elif not quoted and ch == ")":
+            depth -= 1
+        if ch == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+def _unquote(value):
+    return value[1:-1] if len(value) >= 2 and value[0] == value[-1] == '"' else value
+
+
+_OPERATORS = {"eq": "=", "neq": "!=", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+
+def _condition(column, op, value):
+    """(sql, params) para um filtro simples."""
+    field = _field(column)
+    if op in _OPERATORS:
+        return f"{field} {_OPERATORS[op]} ?", [_sql_value(value)]
+    if op == "in":
+        values = list(value)
+        if not values:
+            return "0", []
+        return f"{field} IN ({', '.join('?' for _ in values)})", [_sql_value(v) for v in values]
+    if op == "is":
+        target = str(value).lower()
+        if target == "null":
+            return f"{field} IS NULL", []
+        return f"{field} = ?", [1 if target == "true" else 0]
+    if op == "ilike":
+        return f"{field} LIKE ?", [str(value).replace("*", "%")]
+    raise LocalAPIError(f"Operador não suportado: {op}", code="PGRST100")
+
+
+def _parse_logic(expression, joiner):
+    """Converte um filtro or=(...)/and=(...) do PostgREST em SQL."""
+    clauses, params = [], []
+    for term in _split_top_level(expression):
+        term = term.strip()
+        for logic in ("and", "or"):
+            if term.startswith(logic + "(") and term.endswith(")"):
+                sql, sub = _parse_logic(term[len(logic) + 1:-1], " AND " if logic == "and" else " OR ")
+                break
+        else:
+            column, op, raw = term.split(".", 2)
+            if op == "in":
+                sql, sub = _condition(column, "in", [_unquote(v) for v in _split_top_level(raw.strip("()"))])
+            else:
+                sql, sub = _condition(column, op, _unquote(raw))
+        clauses.append(f"({sql})")
+        params.extend(sub)
+    return joiner.join(clauses), params
+
+
+class LocalQuery:
+    """Construtor de consultas encadeável, equivalente ao do postgrest-py."""
+
+    def __init__(self, client, table):
+        self._client = client
+        self._table = table
+        self._action = "select"
+        self._columns = "*"
+        self._count = None
+        self._payload = None
+        self._ignore_duplicates = False
+        self._where = []
+        self._params = []
+        self._order = []
+        self._limit = None
+        self._offset = None
+
+    # --- ações ---
+    def select(self, columns="*", count=None):
+        self._action, self._columns, self._count = "select", columns, count
+        return self
+
+    def insert(self, rows, **kwargs):
+        self._action, self._payload = "insert", rows
+        return self
+
+    def upsert(self, rows, ignore_duplicates=False, **kwargs):
+        self._action, self._payload, self._ignore_duplicates = "upsert", rows, ignore_duplicates
+        return self
+
+    def update(self, values, **kwargs):
+        self._action, self._payload = "update", values
+        return self
+
+    def delete(self, **kwargs):
+        self._action = "delete"
+        return self
+
+    # --- filtros ---
+    def _filter(self, column, op, value):
+        sql, params = _condition(column, op, value)
+        self._where.append(sql)
+        self._params.extend(params)
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, "eq", value)
+
+    def neq(self, column, value):
+        return self._filter(column, "neq", value)
+
+    def gt(self, column, value):
+        return self._filter(column, "gt", value)
+
+    def gte(self, column, value):
+        return self._filter(column, "gte", value)
+
+    def lt(self, column, value):
+        return self._filter(column, "lt", value)
+
+    def lte(self, column, value):
+        return self._filter(column, "lte", value)
+
+    def in_(self, column, values):
+        return self._filter(column, "in", values)
+
+    def is_(self, column, value):
+        return self._filter(column, "is", value)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, "ilike", pattern)
+
+    def or_(self, filters):
+        sql, params = _parse_logic(filters, " OR ")
+        self._where.append(f"({sql})")
+        self._params.extend(params)
+        return self
+
+    # --- ordenação e paginação ---
+    def order(self, column, desc=False, **kwargs):
+        field = _field(column)
+        # Mesmo padrão do Postgres: nulos por último em ASC e primeiro em DESC
+        self._order.append(f"({field} IS NULL) {'DESC' if desc else 'ASC'}, {field} {'DESC' if desc else 'ASC'}")
+        return self
+
+    def limit(self, size):
+        self._limit = size
+        return self
+
+    def range(self, start, end):
+        self._offset, self._limit = start, end - start + 1
+        return self
+
+    # --- execução ---
+    def _where_sql(self):
+        return f" WHERE {' AND '.join(self._where)}" if self._where else ""
+
+    def _project(self, row):
+        if self._columns.strip() == "*":
+            return row
+        return {c.strip(): row.get(c.strip()) for c in self._columns.split(",")}
+
+    def execute(self):
+        return self._client._execute(self)
+
+
+class LocalRpc:
+    def __init__(self, client, name, params):
+        self._client, self._name, self._params = client, name, params
+
+    def execute(self):
+        function = self._client.rpc_functions.get(self._name)
+        if function is None:
+            raise LocalAPIError(f"Função {self._name} não encontrada", code="PGRST202")
+        with self._client._lock, self._client._transaction():
+            return LocalResponse(function(self._client, **self._params))
+
+
+class LocalBucket:
+    """Bucket do storage sobre um diretório; mesma interface do storage3."""
+
+    def __init__(self, root):
+        self._root = root
+
+    def _path(self, path):
+        full = os.path.normpath(os.path.join(self._root, path))
+        if not full.startswith(os.path.normpath(self._root)):
+            raise LocalAPIError(f"Caminho inválido: {path}", code="400")
+        return full
+
+    def upload(self, path, file, file_options=None):
+        full = self._path(path)
+        upsert = str((file_options or {}).get("upsert", (file_options or {}).get("x-upsert", "false"))).lower() == "true"
+        if os.path.exists(full) and not upsert:
+            raise LocalAPIError("The resource already exists", code="409")
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(file)
+        return {"path": path}
+
+    def list(self, path="", options=None):
+        options = options or {}
+        directory = self._path(path)
+        if not os.path.isdir(directory):
+            return []
+        entries = []
+        for name in sorted(os.listdir(directory)):
+            full = os.path.join(directory, name)
+            if os.path.isdir(full):
+                entries.append({"name": name, "id": None, "metadata": None})
+            else:
+                entries.append({
+                    "name": name,
+                    "id": name,
+                    "metadata": {"size": os.path.getsize(full), "mimetype": mimetypes.guess_type(name)[0]},
+                })
+        offset = options.get("offset", 0)
+        return entries[offset:offset + options.get("limit", 100)]
+
+    def get_public_url(self, path):
+        return self._path(path)
+
+    def create_signed_urls(self, paths, expires_in, options=None):
+        return [{"path": p, "signedURL": self._path(p)} for p in paths]
+
+    def remove(self, paths):
+        removed = []
+        for p in paths:
+            full = self._path(p)
+            if os.path.exists(full):
+                os.remove(full)
+                removed.append({"name": p})
+        return removed
+
+
+class LocalStorage:
+    def __init__(self, root):
+        self._root = root
+
+    def from_(self, bucket):
+        return LocalBucket(os.path.join(self._root, bucket))
+
+
+class ChangeFeed:
+    """Eventos de mudança por tabela, entregues aos assinantes na ordem do commit."""
+
+    def __init__(self):
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, table, callback):
+        """Chama callback(evento) a cada mudança em `table`; devolve a função que cancela."""
+        entry = (table, callback)
+        with self._lock:
+            self._subscribers.append(entry)
+
+        def unsubscribe():
+            with self._lock:
+                if entry in self._subscribers:
+                    self._subscribers.remove(entry)
+        return unsubscribe
+
+    def publish(self, table, event_type, new=None, old=None):
+        event = {"table": table, "eventType": event_type, "new": new or {}, "old": old or {}, "commit_timestamp": _now()}
+        with self._lock:
+            callbacks = [callback for t, callback in self._subscribers if t == table]
+        for callback in callbacks:
+            callback(event)
+
+
+# ----------- Funções RPC (equivalentes às de supabase/migrations) -----------
+def _rpc_delete_tasks_bulk(client, task_ids):
+    checklists = client._delete_where("checklists", *_condition("task_id", "in", task_ids))
+    tasks = client._delete_where("maintenance_tasks", *_condition("id", "in", task_ids))
+    return {"tasks": len(tasks), "checklists": len(checklists)}
+
+
+def _rpc_kpi_apply_deltas(client, deltas):
+    counters = ("completed", "on_time", "lateness_seconds", "checklist_items", "checklist_done")
+    for delta in deltas:
+        row = {**TABLE_DEFAULTS["kpi_daily"](), **{k: v for k, v in delta.items() if v is not None}}
+        existing = client._get("kpi_daily", row)
+        if existing:
+            for c in counters:
+                row[c] = existing[c] + row[c]
+        client._put("kpi_daily", row)
+    return None
+
+
+def _rpc_search_tasks(client, search_query, result_limit=50):
+    # Todas as palavras (E), cada uma como prefixo — mesma regra do to_tsquery da migração
+    terms = re.findall(r"\w+", search_query or "")
+    if not terms:
+        return []
+    match = " ".join(f'"{term}"*' for term in terms)
+    hits = []
+    for table, source in (("maintenance_tasks", "task"), ("task_history", "history")):
+        client._ensure_table(table)
+        index = f"{table}_search"
+        bm25 = f'bm25("{index}", {", ".join(str(SEARCH_WEIGHTS[c]) for c in SEARCH_COLUMNS[table])})'
+        # Ordena só no índice; os documentos são lidos apenas para as linhas devolvidas
+        ranked = client._conn.execute(
+            f'SELECT rowid, -{bm25}, snippet("{index}", -1, \'**\', \'**\', \' … \', 12) '
+            f'FROM "{index}" WHERE "{index}" MATCH ? ORDER BY {bm25} LIMIT ?',
+            (match, int(result_limit)),
+        ).fetchall()
+        if not ranked:
+            continue
+        documents = dict(client._conn.execute(
+            f'SELECT rowid, data FROM "{table}" WHERE rowid IN ({", ".join("?" * len(ranked))})',
+            [rowid for rowid, _, _ in ranked],
+        ).fetchall())
+        for rowid, rank, snippet in ranked:
+            row = json.loads(documents[rowid])
+            hits.append({
+                "source": source,
+                "id": str(row["id"]),
+                "title": row.get("title"),
+                "status": row.get("status") if source == "task" else "completed",
+                "location_id": row.get("location_id"),
+                "happened_at": row.get("due_date") if source == "task" else row.get("completed_at"),
+                "rank": rank,
+                "snippet": snippet,
+            })
+    hits.sort(key=lambda h: (h["rank"], h["happened_at"] or ""), reverse=True)
+    return hits[:int(result_limit)]
+
+
+RPC_FUNCTIONS = {
+    "delete_tasks_bulk": _rpc_delete_tasks_bulk,
+    "kpi_apply_deltas": _rpc_kpi_apply_deltas,
+    "search_tasks": _rpc_search_tasks,
+}
+
+
+class LocalClient:
+    """Substituto local do client Supabase (table, rpc e storage)."""
+
+    def __init__(self, db_path, storage_dir):
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        # Uma conexão compartilhada, serializada por _lock; cada operação é uma transação
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # O INSERT OR REPLACE de _put só dispara os gatilhos de DELETE (índice de busca) assim
+        self._conn.execute("PRAGMA recursive_triggers=ON")
+        self._lock = threading.RLock()
+        self._tables = set()
+        self.storage = LocalStorage(storage_dir)
+        self.rpc_functions = dict(RPC_FUNCTIONS)
+        self.changes = ChangeFeed()
+        self._pending_events = []
+
+    def table(self, name):
+        return LocalQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return LocalRpc(self, name, params or {})
+
+    # --- armazenamento ---
+    @contextmanager
+    def _transaction(self):
+        """Transação SQLite; os eventos do feed só são publicados depois do commit."""
+        self._pending_events = []
+        try:
+            with self._conn:
+                yield
+        except BaseException:
+            self._pending_events = []
+            raise
+        events, self._pending_events = self._pending_events, []
+        for event in events:
+            self.changes.publish(*event)
+
+    def _emit(self, table, event_type, new=None, old=None):
+        self._pending_events.append((table, event_type, new, old))
+
+    def _ensure_table(self, table):
+        if table in self._tables:
+            return
+        if not _IDENT.match(table):
+            raise LocalAPIError(f"Tabela inválida: {table}", code="42P01")
+        self._conn.execute(f'CREATE TABLE IF NOT EXISTS "{table}" (pk TEXT PRIMARY KEY, data TEXT NOT NULL)')
+        for column in INDEXED_COLUMNS.get(table, ()):
+            self._conn.execute(f'CREATE INDEX IF NOT EXISTS "{table}_{column}_idx" ON "{table}" ({_field(column)})')
+        if table in SEARCH_COLUMNS:
+            self._ensure_search_index(table)
+        self._tables.add(table)
+
+    def _ensure_search_index(self, table):
+        """Índice FTS5 <tabela>_search, mantido por gatilhos (rowid = rowid da tabela)."""
+        index = f"{table}_search"
+        if self._conn.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (index,)).fetchone():
+            return
+        columns = SEARCH_COLUMNS[table]
+        names = ", ".join(columns)
+        exclude = SEARCH_EXCLUDE.get(table)
+
+        def values(source):
+            return ", ".join(_search_text(c, source) for c in columns)
+
+        def where(source):
+            return f" WHERE NOT {exclude.format(source=source)}" if exclude else ""
+
+        self._conn.execute(f'CREATE VIRTUAL TABLE "{index}" USING fts5({names}, '
+                           f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')")
+        insert = f'INSERT INTO "{index}" (rowid, {names}) SELECT new.rowid, {values("new.data")}{where("new.data")};'
+        delete = f'DELETE FROM "{index}" WHERE rowid = old.rowid;'
+        self._conn.execute(f'CREATE TRIGGER "{index}_ai" AFTER INSERT ON "{table}" BEGIN {insert} END')
+        self._conn.execute(f'CREATE TRIGGER "{index}_ad" AFTER DELETE ON "{table}" BEGIN {delete} END')
+        self._conn.execute(f'CREATE TRIGGER "{index}_au" AFTER UPDATE ON "{table}" BEGIN {delete} {insert} END')
+        # Linhas gravadas antes de o índice existir
+        self._conn.execute(f'INSERT INTO "{index}" (rowid, {names}) SELECT rowid, {values("data")} FROM "{table}"{where("data")}')
+
+    def _key(self, table, row):
+        return json.dumps([row.get(k) for k in TABLE_KEYS.get(table, ("id",))])
+
+    def _get(self, table, row):
+        self._ensure_table(table)
+        found = self._conn.execute(f'SELECT data FROM "{table}" WHERE pk = ?', (self._key(table, row),)).fetchone()
+        return json.loads(found[0]) if found else None
+
+    def _put(self, table, row):
+        self._ensure_table(table)
+        self._conn.execute(f'INSERT OR REPLACE INTO "{table}" (pk, data) VALUES (?, ?)',
+                           (self._key(table, row), json.dumps(row, default=str)))
+
+    def _select_where(self, table, where, params):
+        self._ensure_table(table)
+        return self._conn.execute(f'SELECT pk, data FROM "{table}"{where}', params).fetchall()
+
+    def _delete_where(self, table, where_sql, params):
+        rows = self._select_where(table, f" WHERE {where_sql}", params)
+        self._conn.executemany(f'DELETE FROM "{table}" WHERE pk = ?', [(pk,) for pk, _ in rows])
+        deleted = [json.loads(data) for _, data in rows]
+        for row in deleted:
+            self._emit(table, "DELETE", old=row)
+            if table == "maintenance_tasks":  # gatilho record_task_tombstone no Postgres
+                self._put("task_tombstones", {"task_id": row["id"], "deleted_at": _now()})
+        if table == "maintenance_tasks" and deleted:
+            self._detach_orphans([row["id"] for row in deleted])
+        return deleted
+
+    def _detach_orphans(self, root_ids):
+        """Ocorrências de séries cuja raiz foi excluída viram tarefas avulsas
+        (gatilho detach_orphan_occurrences no Postgres)."""
+        where, params = _condition("recurrence_parent_id", "in", root_ids)
+        for pk, data in self._select_where("maintenance_tasks", f" WHERE {where}", params):
+            old = json.loads(data)
+            row = _derive_columns("maintenance_tasks", {**old, "recurrence": None, "recurrence_parent_id": None})
+            self._conn.execute('UPDATE "maintenance_tasks" SET data = ? WHERE pk = ?', (json.dumps(row, default=str), pk))
+            self._emit("maintenance_tasks", "UPDATE", new=row, old=old)
+
+    def _new_row(self, table, row):
+        new = {**TABLE_DEFAULTS.get(table, dict)(), **row}
+        if "id" not in new and table not in TABLE_KEYS:
+            new["id"] = str(uuid.uuid4())
+        return _derive_columns(table, new)
+
+    def _execute(self, query):
+        table = query._table
+        with self._lock, self._transaction():
+            self._ensure_table(table)
+            where = query._where_sql()
+
+            if query._action == "select":
+                sql = f'SELECT data FROM "{table}"{where}'
+                if query._order:
+                    sql += " ORDER BY " + ", ".join(query._order)
+                if query._limit is not None or query._offset:
+                    sql += f" LIMIT {int(query._limit if query._limit is not None else -1)} OFFSET {int(query._offset or 0)}"
+                rows = [query._project(json.loads(r[0])) for r in self._conn.execute(sql, query._params)]
+                count = None
+                if query._count:
+                    count = self._conn.execute(f'SELECT COUNT(*) FROM "{table}"{where}', query._params).fetchone()[0]
+                return LocalResponse(rows, count)
+
+            if query._action in ("insert", "upsert"):
+                payload = query._payload if isinstance(query._payload, list) else [query._payload]
+                rows = []
+                for row in payload:
+                    row = self._new_row(table, row) if query._action == "insert" else row
+                    existing = self._get(table, row)
+                    if existing is not None and query._ignore_duplicates:
+                        continue  # on conflict do nothing: só as linhas novas voltam
+                    if query._action == "upsert":
+                        row = _derive_columns(table, {**existing, **row}) if existing else self._new_row(table, row)
+                    elif existing is not None:
+                        raise LocalAPIError(f"duplicate key value violates unique constraint on {table}", code="23505")
+                    self._put(table, row)
+                    self._emit(table, "UPDATE" if existing else "INSERT", new=row, old=existing)
+                    rows.append(row)
+                return LocalResponse(rows)
+
+            if query._action == "update":
+                rows = []
+                for pk, data in self._select_where(table, where, query._params):
+                    old = json.loads(data)
+                    row = _derive_columns(table, {**old, **query._payload})
+                    self._conn.execute(f'UPDATE "{table}" SET data = ? WHERE pk = ?', (json.dumps(row, default=str), pk))
+                    self._emit(table, "UPDATE", new=row, old=old)
+                    rows.append(row)
+                return LocalResponse(rows)
+
+            if query._action == "delete":
+                if not query._where:
+                    raise LocalAPIError("DELETE requires a WHERE clause", code="21000")
+                return LocalResponse(self._delete_where(table, " AND ".join(query._where), query._params))
+
+        raise LocalAPIError(f"Ação desconhecida: {query._action}")
@@ -0,0 +1,74 @@
+# overdue_sweeper.py — Marca como "overdue" as tarefas agendadas cuja data já passou
+#
+# Cada execução faz um único UPDATE set-based e guarda marcas d'água (job_state)
+# com o instante de corte: a próxima execução só examina tarefas vencidas depois
+# dela, ou criadas depois dela (ex.: cadastradas com data retroativa).
+#
+# due_date é gravado pelo app e pelo importador como hora local sem fuso, então o
+# corte de vencimento usa o mesmo relógio (datetime.now() local). created_at é um
+# instante real (now() do banco), comparado com uma marca própria em UTC.
+#
+# Uso em linha de comando (cron, ou em laço com --every):
+#     python overdue_sweeper.py
+#     python overdue_sweeper.py --every 300
+#     python overdue_sweeper.py --full    # ignora a marca d'água
+import argparse
+import time
+from datetime import datetime, timezone
+
+import repository
+
+JOB_NAME = "overdue_sweeper"
+CREATED_JOB_NAME = "overdue_sweeper_created_at"
+
+
+def load_high_water_mark(client, name=JOB_NAME):
+    res = client.table("job_state").select("value").eq("name", name).execute()
+    return res.data[0]["value"] if res.data else None
+
+
+def save_high_water_mark(client, value, name=JOB_NAME):
+    client.table("job_state").upsert({"name": name, "value": value}).execute()
+
+
+def sweep(client, full=False, now=None):
+    """Marca como atrasadas as tarefas agendadas vencidas desde a última execução.
+
+    `now` é a hora local sem fuso, no mesmo formato de due_date.
+    Devolve {"updated": n, "since": marca anterior, "cutoff": novo corte}.
+    """
+    cutoff = (now or datetime.now()).isoformat()
+    created_cutoff = datetime.now(timezone.utc).isoformat()
+    since = None if full else load_high_water_mark(client)
+    created_since = None if full else load_high_water_mark(client, CREATED_JOB_NAME)
+
+    query = client.table("maintenance_tasks").update({"status": "overdue"})\
+        .eq("status", "scheduled")\
+        .lt("due_date", cutoff)
+    if since and created_since:
+        query = query.or_(f'due_date.gte."{since}",created_at.gte."{created_since}"')
+    res = query.execute()
+
+    save_high_water_mark(client, cutoff)
+    save_high_water_mark(client, created_cutoff, CREATED_JOB_NAME)
+    return {"updated": len(res.data or []), "since": since, "cutoff": cutoff}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Marca tarefas agendadas vencidas como atrasadas.")
+    parser.add_argument("--full", action="store_true", help="Varre todas as tarefas, ignorando a marca d'água")
+    parser.add_argument("--every", type=int, default=0, help="Repete a cada N segundos (0 = executa uma vez)")
+    args = parser.parse_args()
+
+    client = repository.get_client()
+    while True:
+        result = sweep(client, full=args.full)
+        print(f"[{result['cutoff']}] {result['updated']} tarefa(s) marcada(s) como atrasada(s).")
+        if not args.every:
+            break
+        args.full = False
+        time.sleep(args.every)
+
+
+if __name__ == "__main__":
+    main()
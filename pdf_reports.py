@@ -0,0 +1,299 @@
+# pdf_reports.py — Geração de relatórios PDF com cache por conteúdo
+#
+# Os arquivos das fontes DejaVu são localizados e conferidos uma única vez por
+# processo; cada relatório é um FPDF novo com as fontes registradas. (Não dá para
+# copiar um documento "protótipo": o fpdf2 recorta o TTFont da fonte no output() e
+# a cópia compartilharia esse objeto, quebrando o relatório seguinte.) Os PDFs gerados
+# ficam num cache LRU indexado pelo hash do conteúdo (tarefa, checklist, observações),
+# de modo que uma tarefa inalterada nunca é renderizada de novo.
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+from fpdf import FPDF
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+FONT_FILES = {"": "DejaVuSans.ttf", "B": "DejaVuSans-Bold.ttf"}
+RECURRENCE_LABELS = {None: "Nenhuma", "daily": "Diária", "weekly": "Semanal", "monthly": "Mensal"}
+
+REPORT_CACHE_MAX_BYTES = int(os.getenv("REPORT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPORT_WORKERS = int(os.getenv("REPORT_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+REPORT_CHUNK_SIZE = 50
+
+
+class ReportCache:
+    """Cache LRU de saídas binárias (PDFs etc.) indexado por hash de conteúdo."""
+
+    def __init__(self, max_bytes=REPORT_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._items = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(kind, payload):
+        raw = json.dumps([kind, payload], sort_keys=True, default=str, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_or_render(self, kind, payload, render):
+        """Devolve a saída em cache para (kind, payload) ou chama render(payload) e guarda."""
+        key = self.key(kind, payload)
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        data = render(payload)
+        with self._lock:
+            if key not in self._items:
+                self._items[key] = data
+                self._size += len(data)
+            while self._size > self.max_bytes and len(self._items) > 1:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+class PdfRenderer:
+    """Fábrica de documentos FPDF com as fontes DejaVu registradas."""
+
+    def __init__(self, font_dir=BASE_DIR):
+        self._fonts = {}
+        for style, name in FONT_FILES.items():
+            path = os.path.join(font_dir, name)
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Falta: {name}")
+            self._fonts[style] = path
+
+    def new_document(self):
+        pdf = FPDF()
+        for style, path in self._fonts.items():
+            pdf.add_font("DejaVu", style, path, uni=True)
+        pdf.set_auto_page_break(auto=True, margin=15)
+        return pdf
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+report_cache = ReportCache()
+
+
+def get_renderer():
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PdfRenderer()
+    return _renderer
+
+
+def _write_task_page(pdf, payload, title):
+    pdf.add_page()
+    pdf.set_font("DejaVu", "B", 16)
+    pdf.cell(0, 10, title, ln=True, align="C")
+    pdf.ln(10)
+    pdf.set_font("DejaVu", "B", 12)
+    pdf.cell(0, 8, f"Título: {payload['title']}", ln=True)
+    pdf.set_font("DejaVu", "", 12)
+    pdf.cell(0, 8, f"Descrição: {payload.get('description') or '—'}", ln=True)
+    pdf.cell(0, 8, f"Especialidade: {payload.get('specialty') or '—'}", ln=True)
+    pdf.cell(0, 8, f"Técnico: {payload['technician_name']}", ln=True)
+    pdf.cell(0, 8, f"Localidade: {payload['location_name']}", ln=True)
+    pdf.cell(0, 8, f"Agendado para: {payload['due_date'][:16].replace('T', ' ')}", ln=True)
+    if payload.get("completed_at"):
+        pdf.cell(0, 8, f"Concluído em: {payload['completed_at'][:16].replace('T', ' ')}", ln=True)
+    if payload.get("status_label"):
+        pdf.cell(0, 8, f"Status: {payload['status_label']}", ln=True)
+    pdf.cell(0, 8, f"Recorrência: {RECURRENCE_LABELS.get(payload.get('recurrence'), 'Nenhuma')}", ln=True)
+
+    # Observações
+    if payload.get("notes"):
+        pdf.ln(5)
+        pdf.set_font("DejaVu", "B", 12)
+        pdf.cell(0, 8, "Observações Técnicas:", ln=True)
+        pdf.set_font("DejaVu", "", 12)
+        pdf.multi_cell(0, 8, payload["notes"])
+
+    pdf.ln(5)
+    pdf.set_font("DejaVu", "B", 12)
+    pdf.cell(0, 8, "Checklist:", ln=True)
+    pdf.set_font("DejaVu", "", 12)
+    if payload["checklist"]:
+        for item in payload["checklist"]:
+            mark = "[x]" if item["checked"] else "[ ]"
+            pdf.cell(0, 8, f"{mark} {item['text']}", ln=True)
+    else:
+        pdf.cell(0, 8, "Nenhum item no checklist.", ln=True)
+
+
+def _write_footer(pdf):
+    pdf.ln(10)
+    pdf.set_font("DejaVu", "", 10)
+    pdf.cell(0, 8, f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}", ln=True)
+
+
+def _render_single(payload, title):
+    pdf = get_renderer().new_document()
+    _write_task_page(pdf, payload, title)
+    _write_footer(pdf)
+    return bytes(pdf.output(dest='S'))
+
+
+def task_payload(task, technician_name, location_name, checklist_items, status_label=None):
+    """Somente os campos que aparecem no relatório — é sobre eles que o hash é calculado."""
+    return {
+        "title": task["title"],
+        "description": task.get("description"),
+        "specialty": task.get("specialty"),
+        "technician_name": technician_name,
+        "location_name": location_name,
+        "due_date": task["due_date"],
+        "status_label": status_label,
+        "recurrence": task.get("recurrence"),
+        "notes": task.get("notes"),
+        "checklist": [{"text": i["text"], "checked": bool(i["checked"])} for i in checklist_items],
+    }
+
+
+def history_payload(entry, technician_name, location_name):
+    """Payload de um registro de task_history (checklist no formato item/is_completed)."""
+    payload = task_payload(
+        entry, technician_name, location_name,
+        [{"text": i["item"], "checked": i["is_completed"]} for i in entry.get("checklist") or []],
+    )
+    payload["completed_at"] = entry.get("completed_at")
+    return payload
+
+
+def render_task_report(task, technician_name, location_name, checklist_items, status_label=None):
+    payload = task_payload(task, technician_name, location_name, checklist_items, status_label)
+    return report_cache.get_or_render("task", payload, lambda p: _render_single(p, "Relatório de Atividade"))
+
+
+def render_history_report(entry, technician_name, location_name):
+    payload = history_payload(entry, technician_name, location_name)
+    return report_cache.get_or_render("history", payload, lambda p: _render_single(p, "Relatório de Atividade Concluída"))
+
+
+# ----------- Relatório consolidado (vários registros, em processos separados) -----------
+_progress = None
+_cancelled = None
+
+
+class ReportCancelled(Exception):
+    pass
+
+
+def _init_worker(counter, cancelled):
+    global _progress, _cancelled
+    _progress = counter
+    _cancelled = cancelled
+
+
+def _tick():
+    with _progress.get_lock():
+        _progress.value += 1
+
+
+def _check_cancelled():
+    """Interrompe o processo entre um registro e outro se o job foi cancelado."""
+    if _cancelled.is_set():
+        raise ReportCancelled()
+
+
+def _render_zip_chunk(entries):
+    files = []
+    for filename, payload in entries:
+        _check_cancelled()
+        files.append((filename, _render_single(payload, "Relatório de Atividade Concluída")))
+        _tick()
+    return files
+
+
+def _render_combined(entries, title):
+    pdf = get_renderer().new_document()
+    pdf.add_page()
+    pdf.set_font("DejaVu", "B", 16)
+    pdf.cell(0, 10, title, ln=True, align="C")
+    pdf.set_font("DejaVu", "", 12)
+    pdf.cell(0, 8, f"{len(entries)} atividade(s)", ln=True, align="C")
+    _write_footer(pdf)
+    for _, payload in entries:
+        _check_cancelled()
+        _write_task_page(pdf, payload, "Atividade Concluída")
+        _tick()
+    return bytes(pdf.output(dest='S'))
+
+
+class ConsolidatedReportJob:
+    """Gera um relatório de vários registros num pool de processos, sem bloquear a sessão.
+
+    entries é uma lista de (nome_do_arquivo, payload) — ver history_payload. Com
+    mode="pdf" as páginas vão para um único documento (renderizado num processo);
+    com mode="zip" os PDFs individuais são divididos em blocos entre os processos.
+    O progresso é contado por registro num contador compartilhado.
+    """
+
+    def __init__(self, entries, mode="pdf", title="Relatório Consolidado", workers=REPORT_WORKERS):
+        self.mode = mode
+        self.total = len(entries)
+        self.filename = "relatorio_consolidado.zip" if mode == "zip" else "relatorio_consolidado.pdf"
+        self.mime = "application/zip" if mode == "zip" else "application/pdf"
+        context = multiprocessing.get_context("spawn")  # evita fork de um servidor com threads
+        self._counter = context.Value("i", 0)
+        self._cancelled = context.Event()
+        self._executor = ProcessPoolExecutor(
+            max_workers=1 if mode == "pdf" else workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(self._counter, self._cancelled),
+        )
+        if mode == "zip":
+            self._futures = [
+                self._executor.submit(_render_zip_chunk, entries[start:start + REPORT_CHUNK_SIZE])
+                for start in range(0, len(entries), REPORT_CHUNK_SIZE)
+            ]
+        else:
+            self._futures = [self._executor.submit(_render_combined, entries, title)]
+        # O pool só é encerrado ao terminar (done) ou em cancel(): depois de um
+        # shutdown não há mais como descartar os blocos ainda na fila
+        self._result = None
+
+    def progress(self):
+        return self._counter.value, self.total
+
+    def done(self):
+        if all(f.done() for f in self._futures):
+            self._executor.shutdown(wait=False)
+            return True
+        return False
+
+    def result(self):
+        """Bytes do relatório (levanta a exceção do processo, se houver)."""
+        if self._result is None:
+            if self.mode == "zip":
+                buf = io.BytesIO()
+                with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+                    for future in self._futures:
+                        for filename, data in future.result():
+                            zf.writestr(filename, data)
+                self._result = buf.getvalue()
+            else:
+                self._result = self._futures[0].result()
+        return self._result
+
+    def cancel(self):
+        """Descarta os blocos na fila e faz os processos pararem no próximo registro."""
+        self._cancelled.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,86 @@
+# records.py — Registros tipados e compactos para tarefas, checklists e histórico
+#
+# Cada tela declara as colunas de que precisa (TASK_*_COLUMNS / HISTORY_*_COLUMNS)
+# e recebe registros com __slots__ em vez de dicts: sem __dict__ por linha, e a data
+# de agendamento é convertida uma única vez (atributo `due`). Campos pesados
+# (descrição, observações, assinatura) só vêm na carga completa do detalhe.
+#
+# Os registros também aceitam leitura no estilo dict (record["title"],
+# record.get("notes")), para as funções que recebem linhas vindas do banco.
+from recurrence import parse_datetime
+
+# --- Conjuntos de colunas por tela ---
+TASK_BOARD_COLUMNS = "id, title, specialty, technician_id, location_id, due_date, status, recurrence, notes_preview"
+TASK_LIST_COLUMNS = "id, title, specialty, location_id, due_date, status"
+TASK_CALENDAR_COLUMNS = "id, title, due_date, specialty, technician_id, status"
+TASK_DETAIL_COLUMNS = "*"
+
+HISTORY_HEADER_COLUMNS = "id, title, technician_id, location_id, completed_at"
+HISTORY_DETAIL_COLUMNS = "id, description, specialty, due_date, recurrence, checklist, notes"
+
+
+class Record:
+    """Base: campos em __slots__, preenchidos só com as colunas efetivamente lidas."""
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        record = cls.__new__(cls)
+        for field in cls.__slots__:
+            if field in row:
+                object.__setattr__(record, field, row[field])
+        record._parse()
+        return record
+
+    @classmethod
+    def from_rows(cls, rows):
+        return [cls.from_row(row) for row in rows or []]
+
+    def _parse(self):
+        pass
+
+    def __getitem__(self, field):
+        try:
+            return getattr(self, field)
+        except AttributeError:
+            raise KeyError(field) from None
+
+    def __contains__(self, field):
+        return hasattr(self, field)
+
+    def get(self, field, default=None):
+        return getattr(self, field, default)
+
+    def to_dict(self):
+        return {f: getattr(self, f) for f in self.__slots__ if hasattr(self, f)}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class TaskRecord(Record):
+    __slots__ = (
+        "id", "title", "specialty", "technician_id", "location_id", "due_date", "due",
+        "status", "recurrence", "recurrence_interval", "recurrence_end", "recurrence_parent_id",
+        "is_template", "notes_preview", "description", "notes", "signature_url", "created_at",
+    )
+
+    def _parse(self):
+        if hasattr(self, "due_date"):
+            self.due = parse_datetime(self.due_date)
+
+
+class ChecklistItem(Record):
+    __slots__ = ("id", "task_id", "item", "is_completed")
+
+
+class HistoryRecord(Record):
+    __slots__ = (
+        "id", "task_id", "title", "description", "specialty", "technician_id", "location_id",
+        "due_date", "completed_at", "completed", "checklist", "recurrence", "created_from_template", "notes",
+    )
+
+    def _parse(self):
+        if hasattr(self, "completed_at"):
+            self.completed = parse_datetime(self.completed_at)
@@ -0,0 +1,224 @@
+# recurrence.py — Motor de recorrência: materializa ocorrências futuras num horizonte
+#
+# Uma série é a tarefa raiz (recurrence preenchido, recurrence_parent_id nulo) mais
+# as ocorrências geradas a partir dela (recurrence_parent_id = id da raiz). Todas as
+# datas são calculadas a partir da data da raiz (âncora), nunca da ocorrência
+# anterior: uma tarefa mensal do dia 31 cai em 28/29 de fevereiro e volta a 31 em março.
+#
+# Uso em linha de comando (ex.: agendado diariamente):
+#     python recurrence.py --horizon 90
+import argparse
+import calendar
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import repository
+
+RULES = ("daily", "weekly", "monthly")
+DEFAULT_HORIZON_DAYS = int(os.getenv("RECURRENCE_HORIZON_DAYS", "90"))
+
+SERIES_COLUMNS = ("id, title, description, specialty, technician_id, location_id, due_date, "
+                  "recurrence, recurrence_interval, recurrence_end, notes")
+
+
+def parse_datetime(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def add_months(anchor, months):
+    """Soma meses limitando o dia ao último dia do mês de destino."""
+    month_index = anchor.year * 12 + anchor.month - 1 + months
+    year, month = divmod(month_index, 12)
+    day = min(anchor.day, calendar.monthrange(year, month + 1)[1])
+    return anchor.replace(year=year, month=month + 1, day=day)
+
+
+def occurrence(anchor, rule, k, interval=1):
+    """k-ésima ocorrência da regra a partir da âncora (k=0 é a própria âncora)."""
+    if rule == "daily":
+        return anchor + timedelta(days=k * interval)
+    if rule == "weekly":
+        return anchor + timedelta(weeks=k * interval)
+    if rule == "monthly":
+        return add_months(anchor, k * interval)
+    raise ValueError(f"Recorrência desconhecida: {rule}")
+
+
+def _first_index_after(anchor, rule, after, interval):
+    """Menor k >= 1 cuja ocorrência é posterior a `after`, calculado sem iterar."""
+    if after < anchor:
+        return 1
+    if rule == "monthly":
+        months = (after.year - anchor.year) * 12 + after.month - anchor.month
+        k = max(1, months // interval)
+    else:
+        step = timedelta(days=interval) if rule == "daily" else timedelta(weeks=interval)
+        k = max(1, (after - anchor) // step)
+    while occurrence(anchor, rule, k, interval) <= after:
+        k += 1
+    return k
+
+
+def expand(anchor, rule, after, until, interval=1, end=None):
+    """Todas as ocorrências da regra no intervalo (after, until], respeitando `end`.
+
+    Os índices inicial e final são obtidos aritmeticamente e as datas geradas
+    de uma vez a partir da âncora.
+    """
+    interval = max(1, int(interval or 1))
+    limit = min(until, end) if end else until
+    if limit <= after:
+        return []
+    first = _first_index_after(anchor, rule, after, interval)
+    last = _first_index_after(anchor, rule, limit, interval)
+    dates = [occurrence(anchor, rule, k, interval) for k in range(first, last + 1)]
+    return [d for d in dates if d <= limit]
+
+
+def next_occurrence(anchor, rule, after, interval=1, end=None):
+    """Próxima ocorrência estritamente posterior a `after` (None se a série terminou)."""
+    interval = max(1, int(interval or 1))
+    nxt = occurrence(anchor, rule, _first_index_after(anchor, rule, after, interval), interval)
+    return None if end and nxt > end else nxt
+
+
+def plan_series(root, latest_due, now, horizon_days):
+    """Datas a materializar para uma série cuja última ocorrência existente é latest_due.
+
+    Gera tudo entre max(latest_due, agora) e agora + horizonte; se o horizonte já
+    estiver coberto, garante ao menos a ocorrência seguinte a latest_due.
+    """
+    anchor = parse_datetime(root["due_date"])
+    rule = root["recurrence"]
+    interval = root.get("recurrence_interval") or 1
+    end = parse_datetime(root.get("recurrence_end"))
+    if rule not in RULES:
+        return []
+    now = now.astimezone(anchor.tzinfo) if anchor.tzinfo else now
+    start = max(latest_due, now)
+    dates = expand(anchor, rule, start, now + timedelta(days=horizon_days), interval, end)
+    if not dates and latest_due >= now:
+        return []
+    if not dates:
+        nxt = next_occurrence(anchor, rule, latest_due, interval, end)
+        dates = [nxt] if nxt else []
+    return dates
+
+
+def occurrence_row(root, due):
+    return {
+        "title": root["title"],
+        "description": root.get("description"),
+        "specialty": root.get("specialty"),
+        "technician_id": root.get("technician_id"),
+        "location_id": root.get("location_id"),
+        "due_date": due.isoformat(),
+        "recurrence": root["recurrence"],
+        "recurrence_interval": root.get("recurrence_interval") or 1,
+        "recurrence_end": root.get("recurrence_end"),
+        "recurrence_parent_id": root["id"],
+        "status": "scheduled",
+        "is_template": False,
+        "notes": root.get("notes"),
+    }
+
+
+def latest_due_by_series(client, roots):
+    """Última data já existente em cada série (a própria raiz ou a ocorrência mais tardia)."""
+    latest = {r["id"]: parse_datetime(r["due_date"]) for r in roots}
+    for batch in repository.batched(latest, repository.IN_FILTER_BATCH_SIZE):
+        res = client.table("maintenance_tasks").select("recurrence_parent_id, due_date")\
+            .in_("recurrence_parent_id", batch).execute()
+        for row in res.data or []:
+            due = parse_datetime(row["due_date"])
+            if due > latest[row["recurrence_parent_id"]]:
+                latest[row["recurrence_parent_id"]] = due
+    return latest
+
+
+def materialize(client, roots, horizon_days=DEFAULT_HORIZON_DAYS, now=None):
+    """Materializa as ocorrências de várias séries num único insert em lote (+ checklists).
+
+    Idempotente: só gera datas posteriores à última ocorrência existente de cada série.
+    Devolve o resultado de repository.insert_tasks_bulk.
+    """
+    # Só raízes: uma ocorrência (mesmo órfã) nunca é expandida como série própria
+    roots = [r for r in roots if r.get("recurrence") in RULES and not r.get("recurrence_parent_id")]
+    if not roots:
+        return {"created": [], "created_rows": [], "failed_tasks": [], "failed_checklists": []}
+    now = now or datetime.now()
+    latest = latest_due_by_series(client, roots)
+    checklist_index = repository.load_checklists_bulk(client, [r["id"] for r in roots])
+
+    rows, checklists = [], []
+    for root in roots:
+        items = [item["item"] for item in checklist_index.get(root["id"], [])]
+        for due in plan_series(root, latest[root["id"]], now, horizon_days):
+            rows.append(occurrence_row(root, due))
+            checklists.append(items)
+    return repository.insert_tasks_bulk(client, rows, checklists)
+
+
+def series_root(client, task):
+    """Linha da tarefa raiz da série à qual `task` pertence (None se a raiz foi excluída)."""
+    root_id = task.get("recurrence_parent_id")
+    if not root_id:
+        return task
+    res = client.table("maintenance_tasks").select(SERIES_COLUMNS).eq("id", root_id).execute()
+    return res.data[0] if res.data else None
+
+
+def materialize_series(client, task, horizon_days=DEFAULT_HORIZON_DAYS):
+    """Garante as ocorrências futuras da série de `task` (ex.: ao concluí-la)."""
+    root = series_root(client, task)
+    # Ocorrência órfã: a série acabou junto com a raiz, nada a gerar
+    return materialize(client, [root] if root else [], horizon_days)
+
+
+def link_legacy_chains(client, roots):
+    """Vincula à primeira linha as cadeias antigas gravadas como tarefas independentes.
+
+    Antes do motor de séries, cada conclusão inseria a próxima ocorrência com
+    recurrence preenchido e sem pai, e todas pareceriam raízes. Linhas sem pai com
+    mesmo título, localidade, regra e intervalo são tratadas como uma série: a de
+    due_date mais antiga vira a raiz e as demais passam a apontar para ela (o mesmo
+    que a migração 20261017001100). Devolve só as raízes.
+    """
+    chains = defaultdict(list)
+    for row in roots:
+        key = (row["title"], row.get("location_id"), row["recurrence"], row.get("recurrence_interval") or 1)
+        chains[key].append(row)
+    linked = []
+    for rows in chains.values():
+        rows.sort(key=lambda r: (parse_datetime(r["due_date"]), str(r["id"])))
+        root, legacy = rows[0], [r["id"] for r in rows[1:]]
+        for batch in repository.batched(legacy, repository.IN_FILTER_BATCH_SIZE):
+            client.table("maintenance_tasks").update({"recurrence_parent_id": root["id"]}).in_("id", batch).execute()
+        linked.append(root)
+    return linked
+
+
+def materialize_all(client, horizon_days=DEFAULT_HORIZON_DAYS):
+    """Expande todas as séries ativas até o horizonte."""
+    res = client.table("maintenance_tasks").select(SERIES_COLUMNS)\
+        .in_("recurrence", list(RULES))\
+        .is_("recurrence_parent_id", "null")\
+        .eq("is_template", False)\
+        .execute()
+    return materialize(client, link_legacy_chains(client, res.data or []), horizon_days)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Materializa ocorrências de tarefas recorrentes.")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON_DAYS, help="Horizonte em dias (padrão: %(default)s)")
+    args = parser.parse_args()
+
+    result = materialize_all(repository.get_client(), args.horizon)
+    print(f"{len(result['created'])} ocorrência(s) criada(s), {len(result['failed_tasks'])} falha(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+# repository.py — Camada de acesso a dados, sem Streamlit
+# Todas as operações recebem o client explicitamente para serem usadas tanto por
+# app.py quanto pelos jobs de linha de comando (recorrência, atrasos, KPIs...).
+#
+# O client vem de get_client(): Supabase (padrão) ou o backend local SQLite +
+# sistema de arquivos (local_backend.py), escolhido pela variável de ambiente
+#     MANUTENCAO_BACKEND=supabase | sqlite
+# Os dois expõem a mesma API encadeável (in_, eq, gte/lte, order...), então as
+# funções abaixo funcionam sem alteração em qualquer um deles.
+import os
+import threading
+
+from dotenv import load_dotenv
+
+load_dotenv()  # MANUTENCAO_BACKEND e os caminhos locais também podem vir do .env
+
+BACKEND = os.getenv("MANUTENCAO_BACKEND", "supabase")
+LOCAL_DB_PATH = os.getenv("LOCAL_DB_PATH", os.path.join(".local_data", "manutencao.sqlite3"))
+LOCAL_STORAGE_DIR = os.getenv("LOCAL_STORAGE_DIR", os.path.join(".local_data", "storage"))
+
+IN_FILTER_BATCH_SIZE = 200  # limita o tamanho da URL do filtro in_()
+INSERT_BATCH_SIZE = 500
+DEFAULT_SPECIALTIES = ["Refrigeração", "Elétrica", "Hidráulica", "Mecânica"]
+
+
+_local_clients = {}
+_local_clients_lock = threading.Lock()
+
+
+def get_client(backend=None):
+    """Client do backend configurado (MANUTENCAO_BACKEND), único por processo."""
+    backend = backend or BACKEND
+    if backend == "sqlite":
+        from local_backend import LocalClient
+        with _local_clients_lock:
+            key = (LOCAL_DB_PATH, LOCAL_STORAGE_DIR)
+            if key not in _local_clients:
+                _local_clients[key] = LocalClient(LOCAL_DB_PATH, LOCAL_STORAGE_DIR)
+            return _local_clients[key]
+    if backend != "supabase":
+        raise ValueError(f"⚠️ MANUTENCAO_BACKEND inválido: {backend}")
+    from supabase_client import get_supabase_client
+    return get_supabase_client()  # compartilhado, com pool de conexões (supabase_client.py)
+
+
+def batched(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+# ----------- Cadastros (técnicos, localidades, modelos) -----------
+def load_technicians(client):
+    return client.table("technicians").select("*").execute().data or []
+
+
+def load_locations(client):
+    return client.table("locations").select("*").execute().data or []
+
+
+def load_specialties(client):
+    res = client.table("technicians").select("specialty").execute()
+    specialties = {r["specialty"] for r in res.data or [] if r.get("specialty")}
+    return sorted(specialties) if specialties else list(DEFAULT_SPECIALTIES)
+
+
+def load_templates(client):
+    return client.table("templates").select("*").execute().data or []
+
+
+def insert_technician(client, name, specialty):
+    return client.table("technicians").insert({"name": name, "specialty": specialty}).execute().data
+
+
+def insert_location(client, name):
+    return client.table("locations").insert({"name": name}).execute().data
+
+
+# ----------- Tarefas -----------
+def find_tasks(client, columns="*", statuses=None, specialty=None, location_id=None,
+               due_from=None, due_to=None, due_before=None, updated_from=None, order_by="due_date",
+               desc=False, offset=None, limit=None, count=None, include_templates=False):
+    """Tarefas (não modelo) filtradas e ordenadas no servidor: (linhas, total).
+
+    due_from/due_to são limites inclusivos de due_date e due_before um limite
+    exclusivo; updated_from limita updated_at (inclusivo), para a sincronização
+    incremental (que usa include_templates=True para ver tarefas que viraram modelo).
+    total só é calculado com count="exact".
+    """
+    query = client.table("maintenance_tasks").select(columns, count=count)
+    if not include_templates:
+        query = query.eq("is_template", False)
+    if statuses is not None:
+        query = query.in_("status", list(statuses))
+    if specialty:
+        query = query.eq("specialty", specialty)
+    if location_id:
+        query = query.eq("location_id", location_id)
+    if due_from:
+        query = query.gte("due_date", due_from)
+    if due_to:
+        query = query.lte("due_date", due_to)
+    if due_before:
+        query = query.lt("due_date", due_before)
+    if updated_from:
+        query = query.gte("updated_at", updated_from)
+    query = query.order(order_by, desc=desc).order("id", desc=desc)
+    if limit is not None:
+        query = query.range(offset or 0, (offset or 0) + limit - 1)
+    res = query.execute()
+    return res.data or [], res.count
+
+
+def load_task(client, task_id, columns="*"):
+    """Linha completa de uma tarefa (ou None se não existir mais)."""
+    res = client.table("maintenance_tasks").select(columns).eq("id", task_id).execute()
+    return res.data[0] if res.data else None
+
+
+def load_tasks(client, task_ids, columns="*"):
+    """Linhas das tarefas informadas (as que ainda existem), em lotes de in_()."""
+    rows = []
+    for batch in batched(task_ids, IN_FILTER_BATCH_SIZE):
+        rows.extend(client.table("maintenance_tasks").select(columns).in_("id", batch).execute().data or [])
+    return rows
+
+
+def load_task_tombstones(client, since=None, offset=0, limit=1000):
+    """Tarefas excluídas (task_id, deleted_at) a partir de `since`, em ordem de exclusão."""
+    query = client.table("task_tombstones").select("task_id, deleted_at")
+    if since:
+        query = query.gte("deleted_at", since)
+    return query.order("deleted_at").order("task_id").range(offset, offset + limit - 1).execute().data or []
+
+
+def update_task(client, task_id, values):
+    return client.table("maintenance_tasks").update(values).eq("id", task_id).execute().data
+
+
+def load_checklist(client, task_id):
+    return client.table("checklists").select("id, task_id, item, is_completed").eq("task_id", task_id).execute().data or []
+
+
+def set_checklist_status(client, changes):
+    """Grava {item_id: is_completed} com no máximo um UPDATE por valor (in_ em lotes)."""
+    for value in (True, False):
+        ids = [item_id for item_id, checked in changes.items() if checked is value]
+        for batch in batched(ids, IN_FILTER_BATCH_SIZE):
+            client.table("checklists").update({"is_completed": value}).in_("id", batch).execute()
+
+
+def load_checklists_bulk(client, task_ids):
+    """Carrega os checklists de várias tarefas em lotes e devolve um índice task_id → itens."""
+    index = {task_id: [] for task_id in task_ids}
+    for batch in batched(index, IN_FILTER_BATCH_SIZE):
+        res = client.table("checklists").select("id, task_id, item, is_completed").in_("task_id", batch).execute()
+        for item in res.data or []:
+            index.setdefault(item["task_id"], []).append({"id": item["id"], "item": item["item"], "is_completed": item["is_completed"]})
+    return index
+
+
+def insert_tasks_bulk(client, task_rows, checklists=None):
+    """Insere tarefas em lote e depois todos os itens de checklist em um segundo lote.
+
+    checklists, se informado, traz para cada linha de task_rows a lista de itens
+    (texto) a criar. Falhas são reportadas por lote, sem interromper os demais:
+    {"created": [ids], "created_rows": [linhas], "failed_tasks": [(linha, erro)],
+     "failed_checklists": [(task_id, erro)]}
+    """
+    result = {"created": [], "created_rows": [], "failed_tasks": [], "failed_checklists": []}
+    checklists = checklists or [[] for _ in task_rows]
+    checklist_rows = []
+    for start in range(0, len(task_rows), INSERT_BATCH_SIZE):
+        batch = task_rows[start:start + INSERT_BATCH_SIZE]
+        try:
+            res = client.table("maintenance_tasks").insert(batch).execute()
+        except Exception as e:
+            result["failed_tasks"].extend((row, str(e)) for row in batch)
+            continue
+        # O PostgREST devolve as linhas inseridas na mesma ordem do lote
+        for row, items in zip(res.data or [], checklists[start:start + INSERT_BATCH_SIZE]):
+            result["created"].append(row["id"])
+            result["created_rows"].append(row)
+            checklist_rows.extend({"task_id": row["id"], "item": item, "is_completed": False} for item in items)
+
+    for batch in batched(checklist_rows, INSERT_BATCH_SIZE):
+        try:
+            client.table("checklists").insert(batch).execute()
+        except Exception as e:
+            failed_ids = dict.fromkeys(row["task_id"] for row in batch)
+            result["failed_checklists"].extend((task_id, str(e)) for task_id in failed_ids)
+    return result
+
+
+def upsert_tasks_batch(client, task_rows, checklist_rows):
+    """Grava um lote de tarefas e depois seus itens de checklist, com ids já definidos.
+
+    Insert ... on conflict do nothing pela chave primária: regravar o mesmo lote
+    (ex.: ao retomar uma importação interrompida) não duplica nada nem sobrescreve
+    o que já foi alterado nas linhas existentes (status, observações, checklist...).
+    Só os itens das tarefas realmente inseridas são gravados. Devolve os ids dessas
+    tarefas; as demais já existiam.
+    """
+    created = set()
+    if task_rows:
+        res = client.table("maintenance_tasks").upsert(task_rows, ignore_duplicates=True).execute()
+        created = {row["id"] for row in res.data or []}
+    checklist_rows = [row for row in checklist_rows if row["task_id"] in created]
+    for batch in batched(checklist_rows, INSERT_BATCH_SIZE):
+        client.table("checklists").upsert(batch, ignore_duplicates=True).execute()
+    return created
+
+
+def load_import_run(client, run_id):
+    res = client.table("import_runs").select("*").eq("id", run_id).execute()
+    return res.data[0] if res.data else None
+
+
+def save_import_run(client, run):
+    client.table("import_runs").upsert(run).execute()
+
+
+def delete_tasks(client, task_ids):
+    """Exclui tarefas e seus checklists de forma set-based e devolve as contagens.
+
+    Usa a função delete_tasks_bulk (supabase/migrations), que apaga tudo numa única
+    transação. Se a função ainda não existir no banco, recorre a DELETEs com in_()
+    em lotes — checklists primeiro, depois as tarefas.
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {"tasks": 0, "checklists": 0}
+    try:
+        res = client.rpc("delete_tasks_bulk", {"task_ids": task_ids}).execute()
+        return res.data
+    except Exception as e:
+        if getattr(e, "code", None) != "PGRST202":  # função não encontrada
+            raise
+    counts = {"tasks": 0, "checklists": 0}
+    for batch in batched(task_ids, IN_FILTER_BATCH_SIZE):
+        res = client.table("checklists").delete().in_("task_id", batch).execute()
+        counts["checklists"] += len(res.data or [])
+        res = client.table("maintenance_tasks").delete().in_("id", batch).execute()
+        counts["tasks"] += len(res.data or [])
+    return counts
+
+
+# ----------- Histórico -----------
+def archive_task(client, history_row):
+    """Grava a conclusão em task_history e devolve as linhas inseridas."""
+    return client.table("task_history").insert(history_row).execute().data or []
+
+
+HISTORY_PAGE_SIZE = 1000  # limite padrão de linhas por resposta do PostgREST
+
+
+def fetch_history_page(client, start, end, cursor=None, location_id=None, specialty=None,
+                       columns="*", page_size=HISTORY_PAGE_SIZE, desc=False):
+    """Uma página de task_history em ordem (completed_at, id), a partir de `cursor`.
+
+    start/end são limites de completed_at (início inclusivo, fim exclusivo) e cursor
+    é o (completed_at, id) da última linha da página anterior: a consulta continua
+    dali, então o custo por página não cresce com a profundidade.
+    """
+    query = client.table("task_history").select(columns)\
+        .gte("completed_at", start)\
+        .lt("completed_at", end)
+    if location_id:
+        query = query.eq("location_id", location_id)
+    if specialty:
+        query = query.eq("specialty", specialty)
+    if cursor:
+        last_at, last_id = cursor
+        op = "lt" if desc else "gt"
+        query = query.or_(f'completed_at.{op}."{last_at}",and(completed_at.eq."{last_at}",id.{op}.{last_id})')
+    return query.order("completed_at", desc=desc).order("id", desc=desc).limit(page_size).execute().data or []
+
+
+def history_cursor(row):
+    return (row["completed_at"], row["id"])
+
+
+def iter_history_pages(client, start, end, location_id=None, specialty=None, columns="*", page_size=HISTORY_PAGE_SIZE):
+    """Percorre todo o intervalo de task_history, página a página (ver fetch_history_page)."""
+    cursor = None
+    while True:
+        page = fetch_history_page(client, start, end, cursor, location_id, specialty, columns, page_size)
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor = history_cursor(page[-1])
+
+
+def load_history_details(client, history_ids, columns="*"):
+    """Linhas completas de task_history para os ids informados: {id: linha}."""
+    rows = {}
+    for batch in batched(history_ids, IN_FILTER_BATCH_SIZE):
+        res = client.table("task_history").select(columns).in_("id", batch).execute()
+        rows.update({row["id"]: row for row in res.data or []})
+    return rows
+
+
+# ----------- Busca textual -----------
+SEARCH_LIMIT = 50
+
+
+def search_tasks(client, query, limit=SEARCH_LIMIT):
+    """Tarefas e registros do histórico que contêm todas as palavras de `query`.
+
+    A busca roda no servidor (RPC search_tasks: índice GIN no Postgres, FTS5 no
+    backend local), sem acentos e por prefixo; cada resultado traz source
+    ("task" | "history"), id, title, status, location_id, happened_at, rank e um
+    snippet com os termos entre **, do mais relevante para o menos.
+    """
+    if not query or not query.strip():
+        return []
+    return client.rpc("search_tasks", {"search_query": query.strip(), "result_limit": limit}).execute().data or []
+
+
+# ----------- Storage -----------
+def upload_signature(client, task_id, png_bytes):
+    """Grava a assinatura no bucket "signatures" e devolve a URL pública."""
+    path = f"signatures/{task_id}.png"
+    storage = client.storage.from_("signatures")
+    storage.upload(path, png_bytes, file_options={"content-type": "image/png"})
+    return storage.get_public_url(path)
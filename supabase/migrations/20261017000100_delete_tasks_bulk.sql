@@ -0,0 +1,19 @@
+-- Exclusão em massa atômica: checklists + tarefas numa única transação.
+-- Chamado por app.py via supabase.rpc("delete_tasks_bulk", {"task_ids": [...]}).
+create or replace function public.delete_tasks_bulk(task_ids uuid[])
+returns json
+language plpgsql
+as $$
+declare
+    deleted_checklists integer;
+    deleted_tasks integer;
+begin
+    delete from public.checklists where task_id = any(task_ids);
+    get diagnostics deleted_checklists = row_count;
+
+    delete from public.maintenance_tasks where id = any(task_ids);
+    get diagnostics deleted_tasks = row_count;
+
+    return json_build_object('tasks', deleted_tasks, 'checklists', deleted_checklists);
+end;
+$$;
@@ -0,0 +1,8 @@
+-- Motor de recorrência (recurrence.py): intervalo, data final e vínculo à série.
+alter table public.maintenance_tasks
+    add column if not exists recurrence_interval integer not null default 1,
+    add column if not exists recurrence_end timestamptz,
+    add column if not exists recurrence_parent_id uuid references public.maintenance_tasks(id) on delete set null;
+
+create index if not exists maintenance_tasks_recurrence_parent_idx
+    on public.maintenance_tasks (recurrence_parent_id, due_date);
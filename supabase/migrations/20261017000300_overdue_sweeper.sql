@@ -0,0 +1,14 @@
+-- Varredura incremental de atrasos (overdue_sweeper.py).
+create table if not exists public.job_state (
+    name text primary key,
+    value timestamptz not null
+);
+
+alter table public.maintenance_tasks
+    add column if not exists created_at timestamptz not null default now();
+
+-- Só tarefas agendadas são examinadas; o índice parcial mantém a varredura barata.
+create index if not exists maintenance_tasks_scheduled_due_idx
+    on public.maintenance_tasks (due_date) where status = 'scheduled';
+create index if not exists maintenance_tasks_scheduled_created_idx
+    on public.maintenance_tasks (created_at) where status = 'scheduled';
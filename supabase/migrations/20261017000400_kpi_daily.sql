@@ -0,0 +1,39 @@
+-- Resumos diários de KPIs de manutenção (kpi.py). Dimensões ausentes são gravadas
+-- como '' para caberem na chave primária.
+create table if not exists public.kpi_daily (
+    day date not null,
+    technician_id text not null default '',
+    location_id text not null default '',
+    specialty text not null default '',
+    completed integer not null default 0,
+    on_time integer not null default 0,
+    lateness_seconds bigint not null default 0,
+    checklist_items integer not null default 0,
+    checklist_done integer not null default 0,
+    primary key (day, technician_id, location_id, specialty)
+);
+
+-- Soma deltas aos resumos (cria as linhas que faltarem) numa única instrução.
+create or replace function public.kpi_apply_deltas(deltas jsonb)
+returns void
+language sql
+as $$
+    insert into public.kpi_daily as k
+        (day, technician_id, location_id, specialty, completed, on_time, lateness_seconds, checklist_items, checklist_done)
+    select (d->>'day')::date,
+           coalesce(d->>'technician_id', ''),
+           coalesce(d->>'location_id', ''),
+           coalesce(d->>'specialty', ''),
+           (d->>'completed')::integer,
+           (d->>'on_time')::integer,
+           (d->>'lateness_seconds')::bigint,
+           (d->>'checklist_items')::integer,
+           (d->>'checklist_done')::integer
+    from jsonb_array_elements(deltas) as d
+    on conflict (day, technician_id, location_id, specialty) do update set
+        completed = k.completed + excluded.completed,
+        on_time = k.on_time + excluded.on_time,
+        lateness_seconds = k.lateness_seconds + excluded.lateness_seconds,
+        checklist_items = k.checklist_items + excluded.checklist_items,
+        checklist_done = k.checklist_done + excluded.checklist_done;
+$$;
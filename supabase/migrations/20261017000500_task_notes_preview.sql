@@ -0,0 +1,4 @@
+-- Prévia curta das observações para os cards do Kanban (records.TASK_BOARD_COLUMNS),
+-- para que o quadro não precise trazer o texto completo de notes.
+alter table public.maintenance_tasks
+    add column if not exists notes_preview text generated always as (left(notes, 50)) stored;
@@ -0,0 +1,53 @@
+-- Sincronização incremental das tarefas (task_store.py): o cliente guarda uma cópia
+-- local e, a cada execução, busca só as linhas com updated_at recente e as lápides
+-- das tarefas excluídas desde então.
+alter table public.maintenance_tasks
+    add column if not exists updated_at timestamptz not null default now();
+
+create or replace function public.touch_updated_at()
+returns trigger
+language plpgsql
+as $$
+begin
+    new.updated_at := clock_timestamp();
+    return new;
+end;
+$$;
+
+drop trigger if exists maintenance_tasks_touch_updated_at on public.maintenance_tasks;
+create trigger maintenance_tasks_touch_updated_at
+    before update on public.maintenance_tasks
+    for each row execute function public.touch_updated_at();
+
+create index if not exists maintenance_tasks_updated_at_idx
+    on public.maintenance_tasks (updated_at);
+
+-- Lápides: uma linha por tarefa excluída. Podem ser apagadas depois de alguns dias
+-- (delete ... where deleted_at < now() - interval '7 days'); o task_store refaz a
+-- carga completa quando fica mais tempo que isso sem sincronizar.
+create table if not exists public.task_tombstones (
+    task_id uuid primary key,
+    deleted_at timestamptz not null default now()
+);
+
+create index if not exists task_tombstones_deleted_at_idx
+    on public.task_tombstones (deleted_at);
+
+create or replace function public.record_task_tombstones()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into public.task_tombstones (task_id, deleted_at)
+    select id, clock_timestamp() from deleted_tasks
+    on conflict (task_id) do update set deleted_at = excluded.deleted_at;
+    return null;
+end;
+$$;
+
+-- Gatilho por comando (não por linha): delete_tasks_bulk grava todas as lápides de uma vez.
+drop trigger if exists maintenance_tasks_tombstones on public.maintenance_tasks;
+create trigger maintenance_tasks_tombstones
+    after delete on public.maintenance_tasks
+    referencing old table as deleted_tasks
+    for each statement execute function public.record_task_tombstones();
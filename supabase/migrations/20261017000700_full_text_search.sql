@@ -0,0 +1,85 @@
+-- Busca textual (repository.search_tasks): título, descrição e observações das
+-- tarefas e, no histórico, também os itens do checklist. Configuração portuguesa
+-- sem acentos ("válvula" encontra "valvula" e vice-versa), com radicais, e índices
+-- GIN sobre colunas tsvector geradas.
+create extension if not exists unaccent;
+
+do $$
+begin
+    if not exists (select 1 from pg_ts_config where cfgname = 'pt_unaccent') then
+        create text search configuration public.pt_unaccent (copy = pg_catalog.portuguese);
+        alter text search configuration public.pt_unaccent
+            alter mapping for hword, hword_part, word with unaccent, portuguese_stem;
+    end if;
+end;
+$$;
+
+alter table public.maintenance_tasks
+    add column if not exists search_vector tsvector generated always as (
+        setweight(to_tsvector('public.pt_unaccent', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('public.pt_unaccent', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('public.pt_unaccent', coalesce(notes, '')), 'C')
+    ) stored;
+
+create index if not exists maintenance_tasks_search_idx
+    on public.maintenance_tasks using gin (search_vector);
+
+-- Do checklist (jsonb [{item, is_completed}]) só entram os textos dos itens.
+alter table public.task_history
+    add column if not exists search_vector tsvector generated always as (
+        setweight(to_tsvector('public.pt_unaccent', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('public.pt_unaccent', coalesce(description, '')), 'B') ||
+        setweight(to_tsvector('public.pt_unaccent', coalesce(notes, '')), 'C') ||
+        setweight(jsonb_to_tsvector('public.pt_unaccent', coalesce(checklist::jsonb, '[]'::jsonb), '["string"]'), 'D')
+    ) stored;
+
+create index if not exists task_history_search_idx
+    on public.task_history using gin (search_vector);
+
+-- Resultados das duas tabelas por relevância. Cada palavra da busca precisa
+-- aparecer (E) e vale como prefixo ("compress" encontra "compressor"). O trecho
+-- destacado (ts_headline) só é calculado para as linhas devolvidas.
+create or replace function public.search_tasks(search_query text, result_limit integer default 50)
+returns table (
+    source text,
+    id text,
+    title text,
+    status text,
+    location_id text,
+    happened_at timestamptz,
+    rank real,
+    snippet text
+)
+language sql
+stable
+as $$
+    with q as (
+        select to_tsquery('public.pt_unaccent', string_agg(quote_literal(word) || ':*', ' & ')) as query
+        from regexp_split_to_table(lower(unaccent(search_query)), '\W+') as word
+        where word <> ''
+    ),
+    hits as (
+        (select 'task'::text as source, t.id::text as id, t.title, t.status, t.location_id::text as location_id,
+                t.due_date as happened_at, ts_rank(t.search_vector, q.query) as rank,
+                concat_ws(' — ', t.description, t.notes) as body
+         from public.maintenance_tasks t, q
+         where t.search_vector @@ q.query and not coalesce(t.is_template, false)
+         order by rank desc
+         limit result_limit)
+        union all
+        (select 'history'::text, h.id::text, h.title, 'completed', h.location_id::text,
+                h.completed_at, ts_rank(h.search_vector, q.query),
+                concat_ws(' — ', h.description, h.notes,
+                          (select string_agg(item->>'item', '; ') from jsonb_array_elements(coalesce(h.checklist::jsonb, '[]'::jsonb)) as item))
+         from public.task_history h, q
+         where h.search_vector @@ q.query
+         order by 7 desc
+         limit result_limit)
+    )
+    select hits.source, hits.id, hits.title, hits.status, hits.location_id, hits.happened_at, hits.rank,
+           ts_headline('public.pt_unaccent', coalesce(nullif(hits.body, ''), hits.title), q.query,
+                       'StartSel=**, StopSel=**, MaxFragments=2, MaxWords=18, MinWords=6, FragmentDelimiter=" … "')
+    from hits, q
+    order by hits.rank desc, hits.happened_at desc
+    limit result_limit;
+$$;
@@ -0,0 +1,12 @@
+-- Importação de tarefas em lote (importer.py). Uma linha por arquivo importado
+-- (id = sha256 do conteúdo), com o ponto de retomada: a primeira linha de dados
+-- ainda não gravada. O checkpoint avança a cada lote confirmado.
+create table if not exists public.import_runs (
+    id text primary key,
+    file_name text,
+    next_row integer not null default 0,
+    created integer not null default 0,
+    failed integer not null default 0,
+    finished_at timestamptz,
+    updated_at timestamptz not null default now()
+);
@@ -0,0 +1,35 @@
+-- Ao excluir a raiz de uma série, as ocorrências restantes viram tarefas avulsas
+-- (recurrence e recurrence_parent_id nulos). Antes ficavam com recurrence
+-- preenchido e sem pai (on delete set null), e recurrence.materialize_all passava
+-- a expandir cada uma como uma nova série, duplicando as datas.
+--
+-- A chave estrangeira passa a ser verificada no commit, para que o gatilho por
+-- comando abaixo (que enxerga todas as linhas excluídas de uma vez, inclusive as
+-- ocorrências apagadas junto com a raiz) desvincule os filhos antes da verificação.
+alter table public.maintenance_tasks
+    drop constraint if exists maintenance_tasks_recurrence_parent_id_fkey;
+alter table public.maintenance_tasks
+    add constraint maintenance_tasks_recurrence_parent_id_fkey
+        foreign key (recurrence_parent_id) references public.maintenance_tasks(id)
+        deferrable initially deferred;
+
+create or replace function public.detach_orphan_occurrences()
+returns trigger
+language plpgsql
+as $$
+begin
+    update public.maintenance_tasks t
+    set recurrence = null, recurrence_parent_id = null
+    where t.recurrence_parent_id in (select id from deleted_roots);
+    return null;
+end;
+$$;
+
+drop trigger if exists maintenance_tasks_detach_orphans on public.maintenance_tasks;
+create trigger maintenance_tasks_detach_orphans
+    after delete on public.maintenance_tasks
+    referencing old table as deleted_roots
+    for each statement execute function public.detach_orphan_occurrences();
+
+-- Órfãos deixados pelo on delete set null antigo não têm mais vínculo com a série
+-- e não podem ser distinguidos de raízes; revise-os manualmente se houver.
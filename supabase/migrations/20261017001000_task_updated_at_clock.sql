@@ -0,0 +1,10 @@
+-- updated_at passa a ser gravado por gatilho também no INSERT, com clock_timestamp()
+-- (o instante da escrita da linha) em vez do default now() (o início da transação).
+-- Numa transação longa (delete_tasks_bulk, materialização, lote de importação) as
+-- linhas inseridas no fim ficavam com um updated_at bem anterior ao commit e o
+-- task_store as perdia até a recarga completa. O cursor do task_store recua
+-- TASK_STORE_SYNC_OVERLAP_SECONDS, que deve cobrir a escrita mais longa.
+drop trigger if exists maintenance_tasks_touch_updated_at on public.maintenance_tasks;
+create trigger maintenance_tasks_touch_updated_at
+    before insert or update on public.maintenance_tasks
+    for each row execute function public.touch_updated_at();
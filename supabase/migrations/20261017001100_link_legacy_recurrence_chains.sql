@@ -0,0 +1,26 @@
+-- Cadeias de recorrência anteriores ao motor de séries (recurrence.py): cada
+-- conclusão inseria a próxima ocorrência como tarefa independente, com recurrence
+-- preenchido e sem recurrence_parent_id. Sem este vínculo cada linha da cadeia
+-- seria expandida como uma série própria e as datas futuras sairiam duplicadas.
+--
+-- Linhas sem pai com mesmo título, localidade, regra e intervalo formam uma série:
+-- a de due_date mais antiga vira a raiz e as demais apontam para ela. Isso também
+-- religa os órfãos deixados pelo on delete set null antigo (ver 20261017000900)
+-- quando ainda existe outra linha da mesma cadeia. recurrence.materialize_all
+-- aplica a mesma regra a cada execução (recurrence.link_legacy_chains).
+with chains as (
+    select id,
+           first_value(id) over (
+               partition by title, location_id, recurrence, recurrence_interval
+               order by due_date, id
+           ) as root_id
+    from public.maintenance_tasks
+    where recurrence is not null
+      and recurrence_parent_id is null
+      and not coalesce(is_template, false)
+)
+update public.maintenance_tasks t
+set recurrence_parent_id = c.root_id
+from chains c
+where t.id = c.id
+  and c.id <> c.root_id;
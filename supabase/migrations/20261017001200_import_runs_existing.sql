@@ -0,0 +1,4 @@
+-- importer.py: linhas válidas que já estavam no banco ao regravar um lote (on
+-- conflict do nothing), contadas à parte das tarefas realmente inseridas.
+alter table public.import_runs
+    add column if not exists existing integer not null default 0;
@@ -1,14 +1,102 @@
-from supabase import create_client
+from supabase import ClientOptions, create_client
+import atexit
 import os
+import random
+import threading
+import time
+import httpx
 from dotenv import load_dotenv
 
-load_dotenv()  # <– carrega .env automaticamente
+load_dotenv()  # <– carrega .env automaticamente (uma vez por processo, na importação)
+
+# Um único client por processo, compartilhado por todas as sessões do Streamlit e
+# threads: as conexões HTTP ficam abertas (keep-alive) e reaproveitadas entre as
+# execuções, sem novo handshake TLS a cada rerun.
+POOL_SIZE = int(os.getenv("SUPABASE_POOL_SIZE", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "60"))  # segundos
+CONNECT_TIMEOUT = float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("SUPABASE_READ_TIMEOUT", "30"))
+RETRIES = int(os.getenv("SUPABASE_RETRIES", "3"))
+RETRY_BACKOFF = float(os.getenv("SUPABASE_RETRY_BACKOFF", "0.3"))  # segundos, dobra a cada tentativa
+RETRY_BACKOFF_MAX = 5.0
+
+RETRY_STATUS = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_client = None
+_client_lock = threading.Lock()
+
+
+class RetryTransport(httpx.HTTPTransport):
+    """Transporte HTTP com novas tentativas e backoff exponencial para falhas transitórias.
+
+    Falhas de conexão (a requisição nem saiu) são repetidas para qualquer método;
+    conexões derrubadas, timeouts de leitura e respostas 429/502/503/504 só para
+    métodos idempotentes — um INSERT (POST) nunca é reenviado às cegas.
+    """
+
+    def __init__(self, retries=RETRIES, backoff=RETRY_BACKOFF, **kwargs):
+        super().__init__(**kwargs)
+        self.retries = retries
+        self.backoff = backoff
+
+    def _wait(self, attempt, response=None):
+        delay = self.backoff * (2 ** attempt)
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = float(retry_after)
+        time.sleep(min(RETRY_BACKOFF_MAX, delay) * random.uniform(0.5, 1.0))
+
+    def handle_request(self, request):
+        idempotent = request.method in IDEMPOTENT_METHODS
+        for attempt in range(self.retries + 1):
+            last = attempt == self.retries
+            try:
+                response = super().handle_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout):
+                if last:
+                    raise
+            except (httpx.ReadError, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                if last or not idempotent:
+                    raise
+            else:
+                if last or not idempotent or response.status_code not in RETRY_STATUS:
+                    return response
+                response.close()
+                self._wait(attempt, response)
+                continue
+            self._wait(attempt)
+
+
+def _build_http_client():
+    return httpx.Client(
+        transport=RetryTransport(
+            limits=httpx.Limits(
+                max_connections=POOL_SIZE,
+                max_keepalive_connections=POOL_SIZE,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            http2=True,
+        ),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        follow_redirects=True,
+    )
+
 
 def get_supabase_client():
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_KEY")
+    """Client Supabase do processo (criado na primeira chamada; thread-safe)."""
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            url = os.getenv("SUPABASE_URL")
+            key = os.getenv("SUPABASE_KEY")
 
-    if not url or not key:
-        raise ValueError("⚠️ Variáveis SUPABASE_URL ou SUPABASE_KEY não foram carregadas!")
+            if not url or not key:
+                raise ValueError("⚠️ Variáveis SUPABASE_URL ou SUPABASE_KEY não foram carregadas!")
 
-    return create_client(url, key)
+            http_client = _build_http_client()
+            atexit.register(http_client.close)
+            _client = create_client(url, key, options=ClientOptions(httpx_client=http_client))
+    return _client
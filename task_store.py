@@ -0,0 +1,164 @@
+# task_store.py — Cópia local das tarefas em memória, atualizada por deltas
+#
+# A primeira sync() traz todas as tarefas (colunas do quadro, mais updated_at); as
+# seguintes buscam só o que mudou: linhas com updated_at >= cursor e lápides de
+# task_tombstones para as exclusões (ver supabase/migrations). updated_at é o instante
+# da escrita da linha, não do commit: o cursor recua SYNC_OVERLAP_SECONDS, que deve
+# cobrir a transação de escrita mais longa, para não perder linhas confirmadas
+# depois — reaplicar uma linha já conhecida não tem efeito. Os deltas incluem os
+# modelos (is_template), para que uma tarefa transformada em modelo saia da cópia.
+#
+# Quando o client tem um feed de mudanças (client.changes, como o do backend local),
+# os eventos INSERT/UPDATE/DELETE são acumulados e aplicados na sync(), sem consulta.
+#
+# Uma cópia por processo (get_store), compartilhada pelas sessões; os filtros de
+# cada tela são aplicados em memória por tasks().
+import os
+import threading
+import time
+from collections import deque
+from datetime import timedelta
+
+import records
+import repository
+from recurrence import parse_datetime
+
+STORE_COLUMNS = records.TASK_BOARD_COLUMNS + ", updated_at, is_template"
+SYNC_PAGE_SIZE = 1000
+SYNC_OVERLAP_SECONDS = int(os.getenv("TASK_STORE_SYNC_OVERLAP_SECONDS", "300"))
+FULL_RELOAD_SECONDS = int(os.getenv("TASK_STORE_FULL_RELOAD_SECONDS", str(24 * 3600)))
+
+
+class TaskStore:
+    def __init__(self, client, columns=STORE_COLUMNS):
+        self.client = client
+        self.columns = columns
+        self._fields = [c.strip() for c in columns.split(",")]
+        self._rows = {}
+        self._cursor = None
+        self._loaded_at = None
+        self._pending = deque()  # sem trava: o feed publica segurando a trava do client
+        self._lock = threading.RLock()
+        feed = getattr(client, "changes", None)
+        self._unsubscribe = feed.subscribe("maintenance_tasks", self._on_change) if feed else None
+
+    # --- aplicação de mudanças ---
+    def _newer(self, row):
+        current = self._rows.get(row["id"])
+        return current is None or (row.get("updated_at") or "") >= (current.get("updated_at") or "")
+
+    def _apply(self, row):
+        """Guarda a linha, salvo se for mais antiga que a atual; devolve se algo mudou."""
+        if row.get("is_template"):
+            return self._rows.pop(row["id"], None) is not None
+        if not self._newer(row):
+            return False
+        projected = {f: row.get(f) for f in self._fields}
+        changed = self._rows.get(row["id"]) != projected
+        self._rows[row["id"]] = projected
+        return changed
+
+    def _advance(self, timestamp):
+        if timestamp and (self._cursor is None or parse_datetime(timestamp) > parse_datetime(self._cursor)):
+            self._cursor = timestamp
+
+    def _on_change(self, event):
+        self._pending.append(event)
+
+    # --- sincronização ---
+    def _fetch_pages(self, fetch):
+        offset = 0
+        while True:
+            page = fetch(offset)
+            yield from page
+            if len(page) < SYNC_PAGE_SIZE:
+                return
+            offset += SYNC_PAGE_SIZE
+
+    def _full_load(self, client):
+        self._pending.clear()  # o retrato completo já inclui esses eventos
+        self._rows.clear()
+        self._cursor = None
+        for row in self._fetch_pages(lambda offset: repository.find_tasks(
+                client, self.columns, order_by="updated_at", offset=offset, limit=SYNC_PAGE_SIZE)[0]):
+            self._apply(row)
+            self._advance(row.get("updated_at"))
+        self._loaded_at = time.monotonic()
+        return len(self._rows)
+
+    def _load_deltas(self, client):
+        since = (parse_datetime(self._cursor) - timedelta(seconds=SYNC_OVERLAP_SECONDS)).isoformat()
+        changed = 0
+        for row in self._fetch_pages(lambda offset: repository.find_tasks(
+                client, self.columns, updated_from=since, order_by="updated_at", offset=offset, limit=SYNC_PAGE_SIZE,
+                include_templates=True)[0]):
+            changed += self._apply(row)
+            self._advance(row.get("updated_at"))
+        for tombstone in self._fetch_pages(lambda offset: repository.load_task_tombstones(
+                client, since, offset, SYNC_PAGE_SIZE)):
+            changed += self._rows.pop(tombstone["task_id"], None) is not None
+            self._advance(tombstone["deleted_at"])
+        return changed
+
+    def _apply_events(self):
+        changed = 0
+        while self._pending:
+            event = self._pending.popleft()
+            if event["eventType"] == "DELETE":
+                changed += self._rows.pop(event["old"].get("id"), None) is not None
+            else:
+                changed += self._apply(event["new"])
+        return changed
+
+    def sync(self, client=None):
+        """Atualiza a cópia local e devolve quantas linhas mudaram.
+
+        client permite passar o client da execução (ex.: instrumentado) para as
+        consultas; por padrão usa o do construtor.
+        """
+        client = client or self.client
+        with self._lock:
+            expired = self._loaded_at is None or time.monotonic() - self._loaded_at > FULL_RELOAD_SECONDS
+            if expired or self._cursor is None and not self._unsubscribe:
+                return self._full_load(client)
+            if self._unsubscribe:
+                return self._apply_events()
+            return self._load_deltas(client)
+
+    def reset(self):
+        """Descarta a cópia local; a próxima sync() refaz a carga completa."""
+        with self._lock:
+            self._loaded_at = None
+
+    # --- consulta ---
+    def tasks(self, statuses=None, specialty=None, location_id=None, due_from=None, due_to=None):
+        """Linhas em memória com os mesmos filtros de repository.find_tasks, em ordem (due_date, id)."""
+        statuses = set(statuses) if statuses is not None else None
+        # due_date é comparado até os segundos (YYYY-MM-DDTHH:MM:SS), como nos filtros do app
+        low = due_from[:19] if due_from else None
+        high = due_to[:19] if due_to else None
+        with self._lock:
+            rows = [
+                row for row in self._rows.values()
+                if (statuses is None or row.get("status") in statuses)
+                and (not specialty or row.get("specialty") == specialty)
+                and (not location_id or row.get("location_id") == location_id)
+                and (low is None or (row.get("due_date") or "")[:19] >= low)
+                and (high is None or (row.get("due_date") or "")[:19] <= high)
+            ]
+        return sorted(rows, key=lambda r: (r.get("due_date") or "", str(r["id"])))
+
+    def __len__(self):
+        return len(self._rows)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(client):
+    """TaskStore do processo para este client."""
+    with _stores_lock:
+        if id(client) not in _stores:
+            _stores[id(client)] = TaskStore(client)
+        return _stores[id(client)]
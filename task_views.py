@@ -0,0 +1,149 @@
+# task_views.py — Dados das telas de tarefas (Kanban, Lista, Calendário e PDF), sem Streamlit
+#
+# O app chama estas funções por trás do seu cache e do session_state; o benchmark
+# (benchmark.py) chama as mesmas, de modo que mede o caminho de código real de
+# cada tela. Todas recebem o client (Supabase, local ou instrumentado).
+from collections import Counter, defaultdict
+from datetime import datetime
+
+import records
+import recurrence
+import repository
+
+STATUS_LABELS = {
+    "scheduled": "📅 Agendada",
+    "in_progress": "🛠️ Em Execução",
+    "completed": "✅ Concluída",
+    "overdue": "❗ Atrasada"
+}
+
+COLORS = {
+    "Refrigeração": "#e3f2fd",
+    "Elétrica": "#fff8e1",
+    "Hidráulica": "#f3e5f5",
+    "Mecânica": "#e8f5e9",
+    "Outra": "#eeeeee"
+}
+
+NO_FILTERS = {"specialty": None, "location_id": None, "date": None}
+CALENDAR_DAY_LIMIT = 6  # acima disso, o dia mostra contagens por especialidade
+CALENDAR_PAGE_SIZE = 1000
+
+
+def get_technician_name(tech_id, tech_dict):
+    return tech_dict.get(str(tech_id), {}).get("name", "Não atribuído")
+
+
+def get_location_name(loc_id, loc_dict):
+    return loc_dict.get(str(loc_id), "—")
+
+
+# ----------- Filtros (especialidade, localidade e dia) -----------
+def filter_due_bounds(filters):
+    """Limites inclusivos de due_date para o dia filtrado (ou None, None)."""
+    if not filters["date"]:
+        return None, None
+    return (datetime.combine(filters["date"], datetime.min.time()).isoformat(),
+            datetime.combine(filters["date"], datetime.max.time()).isoformat())
+
+
+def find_filtered_tasks(client, filters, status_list, columns, **kwargs):
+    due_from, due_to = filter_due_bounds(filters)
+    return repository.find_tasks(
+        client, columns, statuses=status_list, specialty=filters["specialty"], location_id=filters["location_id"],
+        due_from=due_from, due_to=due_to, **kwargs
+    )
+
+
+# ----------- Lista -----------
+def filtered_tasks_page(client, filters, status_list, order_by, desc, page, page_size):
+    """Uma página da lista, ordenada no servidor; devolve (tarefas, total)."""
+    rows, total = find_filtered_tasks(
+        client, filters, status_list, records.TASK_LIST_COLUMNS, order_by=order_by, desc=desc,
+        offset=page * page_size, limit=page_size, count="exact"
+    )
+    return records.TaskRecord.from_rows(rows), total or 0
+
+
+# ----------- Kanban -----------
+def board_tasks(client, store, filters, status_list):
+    """Tarefas do Kanban a partir da cópia local (task_store), sincronizada pelo client;
+    os filtros são aplicados em memória."""
+    store.sync(client)
+    due_from, due_to = filter_due_bounds(filters)
+    return records.TaskRecord.from_rows(store.tasks(
+        statuses=status_list, specialty=filters["specialty"], location_id=filters["location_id"],
+        due_from=due_from, due_to=due_to
+    ))
+
+
+def group_tasks_by_status(tasks):
+    """Particiona a lista de tarefas (já ordenada) em um índice status → tarefas."""
+    groups = {status: [] for status in STATUS_LABELS}
+    for task in tasks:
+        groups.setdefault(task["status"], []).append(task)
+    return groups
+
+
+def kanban_card(task, technicians, locations):
+    """Textos de um card do Kanban."""
+    return {
+        "title": task["title"],
+        "specialty": task.get("specialty", "—"),
+        "technician": get_technician_name(task["technician_id"], technicians),
+        "location": get_location_name(task["location_id"], locations),
+        "due": task["due_date"][:16].replace("T", " "),
+        "notes_preview": task.get("notes_preview"),
+    }
+
+
+# ----------- Calendário -----------
+def calendar_month(client, month, specialty, location_id):
+    """Tarefas com due_date no mês que começa em `month`, já filtradas."""
+    rows = []
+    while True:
+        page, _ = repository.find_tasks(
+            client, records.TASK_CALENDAR_COLUMNS, specialty=specialty, location_id=location_id,
+            due_from=month.isoformat(), due_before=recurrence.add_months(month, 1).isoformat(),
+            offset=len(rows), limit=CALENDAR_PAGE_SIZE
+        )
+        rows.extend(page)
+        if len(page) < CALENDAR_PAGE_SIZE:
+            return rows
+
+
+def calendar_events(tasks):
+    """Eventos do FullCalendar; dias com muitas tarefas viram contagens por especialidade."""
+    by_day = defaultdict(list)
+    for task in tasks:
+        by_day[task["due_date"][:10]].append(task)
+    events = []
+    for day, day_tasks in by_day.items():
+        if len(day_tasks) > CALENDAR_DAY_LIMIT:
+            for specialty, count in Counter(t.get("specialty") or "Outra" for t in day_tasks).items():
+                events.append({
+                    "title": f"{specialty}: {count} tarefa(s)",
+                    "start": day,
+                    "allDay": True,
+                    "color": COLORS.get(specialty, "#eee")
+                })
+            continue
+        for task in day_tasks:
+            events.append({
+                "title": task["title"],
+                "start": task["due_date"][:16].replace("T", " "),
+                "color": COLORS.get(task.get("specialty"), "#eee"),
+                "resourceId": task["technician_id"] or "sem_tecnico"
+            })
+    return events
+
+
+# ----------- PDF -----------
+def task_report(task, technician_name, location_name, checklist_rows):
+    """PDF da tarefa a partir dos itens de checklist como vêm do banco (item, is_completed)."""
+    import pdf_reports  # fpdf2 só é necessário aqui (o benchmark roda sem ele)
+    checklist_items = [{"text": item["item"], "checked": item["is_completed"]} for item in checklist_rows]
+    return pdf_reports.render_task_report(
+        task, technician_name, location_name, checklist_items,
+        status_label=STATUS_LABELS.get(task["status"], task["status"])
+    )
@@ -0,0 +1,15 @@
+# Os módulos do app ficam na raiz do repositório; os testes usam o backend local
+# (local_backend.py), um banco SQLite novo por teste.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_backend import LocalClient  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path):
+    return LocalClient(str(tmp_path / "manutencao.sqlite3"), str(tmp_path / "storage"))
@@ -0,0 +1,15 @@
+import benchmark
+
+
+def test_failed_case_is_recorded_and_the_run_goes_on(tmp_path, monkeypatch):
+    def case_broken(client, data, rng):
+        raise RuntimeError("quebrou")
+    monkeypatch.setitem(benchmark.CASES, "broken", case_broken)
+
+    results = benchmark.run_size(100, 2, benchmark.DEFAULT_SEED, ["broken", "kanban_render", "generate_pdf"], str(tmp_path))
+
+    assert results["broken"] == {"failed": "RuntimeError: quebrou"}
+    assert results["kanban_render"]["calls_total"] > 0
+    assert "p50_ms" in results["generate_pdf"]
+    baseline = {"results": {"100": {"broken": {"p50_ms": 1.0, "calls_total": 1}}}}
+    assert benchmark.compare({"results": {"100": results}}, baseline) == [("100", "broken", "falhou: RuntimeError: quebrou")]
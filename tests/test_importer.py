@@ -0,0 +1,35 @@
+import io
+
+import importer
+import repository
+
+CSV = (
+    "titulo,especialidade,localidade,data,checklist\n"
+    "Troca de filtro,Elétrica,Unidade 1,2026-11-03 08:00,Desligar|Trocar\n"
+    "Lubrificação,Elétrica,Unidade 1,04/11/2026,\n"
+    "Sem data,Elétrica,Unidade 1,,\n"
+)
+
+
+def _count(client, table):
+    return len(client.table(table).select("id").execute().data)
+
+
+def test_restart_counts_existing_rows_separately(client):
+    repository.insert_location(client, "Unidade 1")
+    first = importer.import_tasks(client, io.BytesIO(CSV.encode()), "tarefas.csv")
+    assert (first["created"], first["existing"], first["failed"]) == (2, 0, 1)
+
+    again = importer.import_tasks(client, io.BytesIO(CSV.encode()), "tarefas.csv")
+    assert again["already_imported"] and again["created"] == 0
+
+    # Reprocessar: só a tarefa excluída volta, com seu checklist; a outra não é tocada
+    tasks = client.table("maintenance_tasks").select("id, title").execute().data
+    kept = next(t for t in tasks if t["title"] == "Lubrificação")
+    client.table("maintenance_tasks").update({"notes": "alterada"}).eq("id", kept["id"]).execute()
+    repository.delete_tasks(client, [t["id"] for t in tasks if t["title"] == "Troca de filtro"])
+
+    restarted = importer.import_tasks(client, io.BytesIO(CSV.encode()), "tarefas.csv", restart=True)
+    assert (restarted["created"], restarted["existing"], restarted["failed"]) == (1, 1, 1)
+    assert _count(client, "maintenance_tasks") == 2 and _count(client, "checklists") == 2
+    assert client.table("maintenance_tasks").select("notes").eq("id", kept["id"]).execute().data[0]["notes"] == "alterada"
@@ -0,0 +1,33 @@
+from datetime import datetime, timedelta
+
+import overdue_sweeper
+
+
+def _insert(client, due):
+    row = {"title": "Lubrificação", "status": "scheduled", "is_template": False, "due_date": due.isoformat()}
+    return client.table("maintenance_tasks").insert(row).execute().data[0]["id"]
+
+
+def _status(client, task_id):
+    return client.table("maintenance_tasks").select("status").eq("id", task_id).execute().data[0]["status"]
+
+
+def test_cutoff_uses_the_local_clock_of_due_date(client):
+    # due_date é hora local sem fuso; uma tarefa para daqui a 1 h não pode vencer
+    # antes da hora, qualquer que seja o fuso do servidor
+    now = datetime.now().replace(microsecond=0)
+    past, soon = _insert(client, now - timedelta(minutes=5)), _insert(client, now + timedelta(hours=1))
+    assert overdue_sweeper.sweep(client)["updated"] == 1
+    assert (_status(client, past), _status(client, soon)) == ("overdue", "scheduled")
+
+
+def test_incremental_sweep_uses_both_marks(client):
+    now = datetime.now().replace(microsecond=0)
+    overdue_sweeper.sweep(client, now=now - timedelta(hours=2))
+    # Vencida depois da marca anterior, e outra cadastrada depois dela com data retroativa
+    due_since = _insert(client, now - timedelta(hours=1))
+    backdated = _insert(client, now - timedelta(days=3))
+    result = overdue_sweeper.sweep(client, now=now)
+    assert result["updated"] == 2
+    assert _status(client, due_since) == _status(client, backdated) == "overdue"
+    assert overdue_sweeper.sweep(client, now=now)["updated"] == 0
@@ -0,0 +1,35 @@
+import io
+import zipfile
+
+import pdf_reports
+
+
+def _task(title, notes=None):
+    return {"title": title, "description": "Rotina preventiva", "due_date": "2026-10-01T09:00:00", "notes": notes}
+
+
+def test_reports_with_different_text_in_one_process():
+    pdf_reports.report_cache.clear()
+    first = pdf_reports.render_task_report(_task("Troca de filtro"), "Ana", "Unidade 1", [])
+    second = pdf_reports.render_task_report(
+        _task("Válvula QXZ — inspeção", notes="Ruído no compressor; pressão ok."), "Júlio", "Galpão Y",
+        [{"text": "Verificar ção/ÿ", "checked": True}],
+    )
+    assert first.startswith(b"%PDF") and second.startswith(b"%PDF")
+    assert first != second
+
+
+def test_zip_job_with_several_reports():
+    entries = []
+    for i, title in enumerate(["Troca de filtro", "Válvula QXZ", "Inspeção elétrica", "Limpeza — ÿ/ç"]):
+        entry = dict(_task(title, notes=f"Observação {i}"), completed_at="2026-10-01T10:00:00",
+                     checklist=[{"item": f"Item {title}", "is_completed": i % 2 == 0}])
+        entries.append((f"{i}.pdf", pdf_reports.history_payload(entry, "Ana", f"Unidade {i}")))
+    job = pdf_reports.ConsolidatedReportJob(entries, mode="zip", workers=2)
+    data = job.result()
+    assert job.done()
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        names = zf.namelist()
+        assert sorted(names) == [f"{i}.pdf" for i in range(4)]
+        assert all(zf.read(name).startswith(b"%PDF") for name in names)
+    assert job.progress() == (4, 4)
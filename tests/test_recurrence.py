@@ -0,0 +1,36 @@
+from collections import Counter
+from datetime import datetime, timedelta
+
+import recurrence
+
+
+def _insert(client, **row):
+    row = dict({"title": "Inspeção mensal", "status": "completed", "recurrence": "monthly", "is_template": False}, **row)
+    return client.table("maintenance_tasks").insert(row).execute().data[0]
+
+
+def test_legacy_chain_materializes_each_date_once(client):
+    # Cadeia antiga: seis conclusões e a ocorrência em aberto, todas sem pai
+    start = datetime.now().replace(day=5, hour=8, minute=0, second=0, microsecond=0)
+    chain = [_insert(client, due_date=recurrence.add_months(start, k).isoformat()) for k in range(-6, 0)]
+    chain.append(_insert(client, due_date=start.isoformat(), status="scheduled"))
+
+    result = recurrence.materialize_all(client, horizon_days=90)
+
+    tasks = client.table("maintenance_tasks").select("id, due_date, recurrence_parent_id").execute().data
+    dues = Counter(t["due_date"] for t in tasks)
+    assert all(count == 1 for count in dues.values())
+    assert len(result["created"]) == len([d for d in dues if d > start.isoformat()])
+    assert all(t["recurrence_parent_id"] == chain[0]["id"] for t in tasks if t["id"] != chain[0]["id"])
+
+    # Uma segunda execução não gera nada novo
+    assert recurrence.materialize_all(client, horizon_days=90)["created"] == []
+
+
+def test_separate_series_are_not_merged(client):
+    due = (datetime.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+    _insert(client, due_date=due, location_id="a", status="scheduled")
+    _insert(client, due_date=due, location_id="b", status="scheduled")
+    recurrence.materialize_all(client, horizon_days=40)
+    tasks = client.table("maintenance_tasks").select("location_id, recurrence_parent_id").execute().data
+    assert Counter(t["location_id"] for t in tasks)["a"] == Counter(t["location_id"] for t in tasks)["b"] > 1